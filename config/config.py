@@ -4,8 +4,21 @@ Configuration file for Selenium tests
 
 import os
 
-# Base URL
-BASE_URL = "https://www.saucedemo.com/"
+# Target Site
+# "local" - bundled stand-in (utils/local_shop.py) started by the test session
+# "remote" - the real SauceDemo site
+TARGET = os.getenv("TARGET", "local")
+REMOTE_BASE_URL = "https://www.saucedemo.com/"
+
+# Base URL - page objects read it at construction time, the test session
+# replaces it with the local shop address when TARGET is "local"
+BASE_URL = os.getenv("BASE_URL", REMOTE_BASE_URL)
+
+# Local Shop
+LOCAL_SHOP_HOST = os.getenv("LOCAL_SHOP_HOST", "127.0.0.1")
+LOCAL_SHOP_PORT = int(os.getenv("LOCAL_SHOP_PORT", "0"))  # 0 = any free port
+# Extra server delay per page for performance_glitch_user (seconds)
+PERFORMANCE_GLITCH_DELAY = float(os.getenv("PERFORMANCE_GLITCH_DELAY", "2.5"))
 
 # Test Users (from SauceDemo documentation)
 STANDARD_USER = {"username": "standard_user", "password": "secret_sauce"}
@@ -19,18 +32,216 @@ PERFORMANCE_GLITCH_USER = {
     "password": "secret_sauce",
 }
 
+# Session
+# SauceDemo keeps the logged-in user in this cookie, tests can inject it to skip
+# the UI login
+SESSION_COOKIE_NAME = "session-username"
+SESSION_COOKIE_TTL = 600  # seconds, same as the site
+
 # Browser Configuration
 DEFAULT_BROWSER = os.getenv("BROWSER", "chrome")
 HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
 
+# Driver Lifecycle
+# "pool" - browsers live for the whole session/worker and are reset between tests
+# "test" - new browser instance for each test
+DRIVER_ISOLATION = os.getenv("DRIVER_ISOLATION", "pool")
+# Quit a pooled browser after this many tests (0 = never)
+POOL_RECYCLE_AFTER = int(os.getenv("POOL_RECYCLE_AFTER", "50"))
+# With "test" isolation, browsers launched ahead of time in the background
+# (0 = launch when the test starts)
+PREWARM_BROWSERS = int(os.getenv("PREWARM_BROWSERS", "1"))
+# Seconds a background quit may take before the browser processes are killed
+QUIT_TIMEOUT = 10
+# Seconds the processes of a finished quit get to exit on their own before
+# the watchdog kills them
+QUIT_GRACE = 2
+
+# Fast Profile
+# Browsers skip images, fonts and analytics, use the eager page load strategy
+# and run without background features (--fast-profile). Tests marked
+# full_resources always get a normal browser.
+FAST_PROFILE = os.getenv("FAST_PROFILE", "false").lower() == "true"
+# URL patterns blocked through the DevTools protocol in Chrome
+FAST_PROFILE_BLOCKED_URLS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.svg",
+    "*.webp",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*backtrace.io*",
+    "*hotjar.com*",
+    "*segment.io*",
+]
+
+# Driver Binaries
+# Resolved chromedriver/geckodriver paths are kept in a lockfile in this directory
+DRIVER_CACHE_DIR = os.getenv("DRIVER_CACHE_DIR", ".driver_cache")
+# Never contact the network, only use drivers recorded in the lockfile
+DRIVER_OFFLINE = os.getenv("DRIVER_OFFLINE", "false").lower() == "true"
+
+# Profile Template
+# Browsers start from a copy of a profile prepared once per session (per xdist
+# worker) instead of an empty incognito profile: first-run state done,
+# background features off, HTTP cache warmed on these pages (--profile-template)
+PROFILE_TEMPLATE = os.getenv("PROFILE_TEMPLATE", "false").lower() == "true"
+PROFILE_WARMUP_PATHS = ["", "inventory.html", "cart.html", "checkout-step-one.html"]
+# Templates and their copies live in a temporary directory below this one, on
+# the same filesystem so copies can share blocks (reflink) where supported
+PROFILE_TEMPLATE_DIR = os.path.join(DRIVER_CACHE_DIR, "profiles")
+
+# Parallel Execution (pytest -n auto)
+# Memory of one headless browser until a real measurement is recorded in
+# DRIVER_CACHE_DIR
+BROWSER_MEMORY_MB = int(os.getenv("BROWSER_MEMORY_MB", "400"))
+# Memory left for the OS and the pytest processes themselves
+RESERVED_MEMORY_MB = int(os.getenv("RESERVED_MEMORY_MB", "1024"))
+# Upper bound for the automatic worker count (0 = no limit)
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "0"))
+# Every xdist worker writes its log to <worker>.log in this directory
+WORKER_LOG_DIR = os.path.join("reports", "logs")
+
+# Multi-browser Runs (--browsers chrome,firefox)
+# Tests of one engine running at the same time across all workers, e.g.
+# "chrome=4,firefox=2" (engines not listed are unlimited). Idle pooled and
+# prewarmed browsers are not counted.
+ENGINE_LIMITS = os.getenv("ENGINE_LIMITS", "")
+# Side-by-side per-engine timing of the run
+ENGINE_REPORT_FILE = os.path.join("reports", "engines.json")
+
+# Test History
+# Per-test durations and outcomes, updated after every run and used by --shard
+# and --order=longest-first
+TEST_HISTORY_FILE = os.getenv("TEST_HISTORY_FILE", ".test_history.json")
+# Weight of the latest run in the moving average duration
+HISTORY_SMOOTHING = 0.3
+# Number of recent outcomes kept per test
+HISTORY_OUTCOMES = 10
+# Expected duration of a test when there is no history at all (seconds)
+DEFAULT_TEST_DURATION = 5.0
+
+# Reruns and Flake Quarantine
+# Failed tests are rerun right away in the same process, on a warm and reset
+# browser (--reruns)
+RERUNS = int(os.getenv("RERUNS", "0"))
+# Tests that needed a rerun in at least this share of their recent runs are
+# quarantined: they still run, but their failures do not fail the run
+FLAKE_THRESHOLD = float(os.getenv("FLAKE_THRESHOLD", "0.2"))
+# Runs in the test history before a test can be quarantined
+FLAKE_MIN_RUNS = 5
+
+# Test Impact Selection
+# --record-impact stores the page object methods and locators every test
+# used, --impact-select BASE runs only the tests affected by the changes
+# since BASE
+IMPACT_MAP_FILE = os.getenv("IMPACT_MAP_FILE", ".impact_map.json")
+# Older maps are reported as stale
+IMPACT_MAP_MAX_AGE_DAYS = 14
+
+# Logging
+# Without live logging (--log-cli-level) the records of the running test are
+# kept in a ring buffer and only written to the report when the test fails
+LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", "2000"))
+LOG_BUFFER_LEVEL = os.getenv("LOG_BUFFER_LEVEL", "INFO")
+
 # Timeouts (in seconds)
 IMPLICIT_WAIT = 10
 EXPLICIT_WAIT = 15
 PAGE_LOAD_TIMEOUT = 30
+# WebDriver's default script timeout, raised for page macros whose steps may
+# wait longer than that in total
+SCRIPT_TIMEOUT = 30
+# Poll interval of BasePage.wait_for() conditions
+WAIT_POLL_FREQUENCY = float(os.getenv("WAIT_POLL_FREQUENCY", "0.05"))
+# Wait engine of BasePage.wait_for() (--wait-engine)
+# "poll" - evaluate the condition every WAIT_POLL_FREQUENCY seconds
+# "observer" - block in one async script that re-evaluates the condition on
+#   DOM mutations and URL changes, plus every WAIT_OBSERVER_RECHECK_MS
+WAIT_ENGINE = os.getenv("WAIT_ENGINE", "poll")
+WAIT_OBSERVER_RECHECK_MS = int(os.getenv("WAIT_OBSERVER_RECHECK_MS", "100"))
+
+# Page Macros
+# "script" - multi-step page flows run in the browser as one async script
+# "stepwise" - every step is a separate WebDriver call (debugging)
+MACRO_MODE = os.getenv("MACRO_MODE", "script")
+
+# Element Cache
+# Page objects reuse elements found by locator until navigation or a DOM
+# changing action (--element-cache)
+ELEMENT_CACHE = os.getenv("ELEMENT_CACHE", "false").lower() == "true"
+
+# Failure Artifacts
+# Screenshot, page source and console log of failed tests, one zip per test
+ARTIFACTS_ON_FAILURE = True
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+# Retention across runs, the oldest artifacts are deleted first
+ARTIFACT_MAX_COUNT = int(os.getenv("ARTIFACT_MAX_COUNT", "50"))
+ARTIFACT_MAX_MB = int(os.getenv("ARTIFACT_MAX_MB", "200"))
+# Captures waiting for the background writer, further captures are dropped
+ARTIFACT_QUEUE_SIZE = 16
+
+# Instrumentation
+# --instrument appends one JSON line per test with every WebDriver command
+INSTRUMENT_FILE = os.path.join("reports", "commands.jsonl")
+
+# Performance Budgets (tests/test_performance.py)
+# Maximum duration of each page transition for standard_user (milliseconds),
+# navigations are measured to the load event, in-page transitions end to end
+PERFORMANCE_BUDGETS_MS = {
+    "login": 3000,
+    "sort": 1000,
+    "cart": 2000,
+    "checkout_information": 2000,
+    "checkout_overview": 2000,
+    "checkout_complete": 2000,
+}
+# Added to every budget for performance_glitch_user, whose pages are slow
+# on purpose
+GLITCH_BUDGET_ALLOWANCE_MS = int(os.getenv("GLITCH_BUDGET_ALLOWANCE_MS", "6000"))
+# Multiplies all budgets, e.g. 2.0 on slow CI machines
+PERFORMANCE_BUDGET_SCALE = float(os.getenv("PERFORMANCE_BUDGET_SCALE", "1.0"))
+# Timings of every run are appended to trend.jsonl in this directory, the
+# standard vs glitch comparison per browser of the last run is in latest.json.
+# Both are written by the xdist controller once all workers are done.
+PERFORMANCE_DIR = os.path.join("reports", "performance")
+PERFORMANCE_TREND_FILE = os.path.join(PERFORMANCE_DIR, "trend.jsonl")
+PERFORMANCE_COMPARISON_FILE = os.path.join(PERFORMANCE_DIR, "latest.json")
+
+# Load Generation (python -m utils.load_generator)
+# Virtual shoppers, each driving its own headless browser
+LOAD_USERS = int(os.getenv("LOAD_USERS", "4"))
+# Seconds over which the virtual users are started one after another
+LOAD_RAMP_UP = float(os.getenv("LOAD_RAMP_UP", "10"))
+# Seconds of the whole run, ramp-up included
+LOAD_DURATION = float(os.getenv("LOAD_DURATION", "60"))
+# Pause of a virtual user between two checkouts (seconds)
+LOAD_THINK_TIME = float(os.getenv("LOAD_THINK_TIME", "0"))
+# Saturation search: the host is saturated once extra users add less than
+# this fraction of their share of throughput, or too many checkouts fail
+SATURATION_MIN_EFFICIENCY = 0.5
+SATURATION_MAX_ERROR_RATE = 0.05
+LOAD_REPORT_DIR = os.path.join("reports", "load")
 
-# Screenshots
-SCREENSHOT_ON_FAILURE = True
-SCREENSHOT_DIR = "screenshots"
+# Benchmarks (--run-benchmarks)
+BENCHMARK_DIR = os.path.join("reports", "benchmarks")
+# Repetitions of every measured navigation
+BENCHMARK_ROUNDS = int(os.getenv("BENCHMARK_ROUNDS", "5"))
+# Page object benchmarks (tests/benchmarks/test_page_objects.py): calls timed
+# per method, and the stored baselines they must not regress from by more
+# than BENCHMARK_TOLERANCE (and BENCHMARK_NOISE_FLOOR_MS)
+PAGE_BENCHMARK_ROUNDS = int(os.getenv("PAGE_BENCHMARK_ROUNDS", "10"))
+BENCHMARK_BASELINE_FILE = os.path.join("tests", "benchmarks", "baselines.json")
+BENCHMARK_TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.25"))
+BENCHMARK_NOISE_FLOOR_MS = float(os.getenv("BENCHMARK_NOISE_FLOOR_MS", "5"))
 
 # Window Size
 WINDOW_WIDTH = 1920
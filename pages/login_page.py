@@ -5,10 +5,13 @@ Represents the SauceDemo login page
 
 import logging
 import time
+from urllib.parse import quote
 
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
-from pages.page_base import BasePage
+from selenium.common.exceptions import TimeoutException
+from pages.page_base import BasePage, any_of, element_shown, url_changed
+from config import config
+from config.config import SESSION_COOKIE_NAME, SESSION_COOKIE_TTL
 
 logger = logging.getLogger(__name__)
 
@@ -23,18 +26,56 @@ class LoginPage(BasePage):
     ERROR_MESSAGE = (By.CSS_SELECTOR, "[data-test='error']")
     ERROR_BUTTON = (By.CSS_SELECTOR, ".error-button")
 
-    def __init__(self, driver):
-        super().__init__(driver)
-        self.url = "https://www.saucedemo.com/"
+    def __init__(self, driver, cache_elements=None):
+        super().__init__(driver, cache_elements=cache_elements)
+        self.url = config.BASE_URL
 
     def open(self):
         """Navigate to login page"""
-        logger.info(f"Opening login page: {self.url}")
+        logger.info("Opening login page: %s", self.url)
         self.driver.get(self.url)
+        self.invalidate_element_cache()
+
+    def inject_session(self, username):
+        """
+        Create the logged-in state without going through the login form
+
+        Sets the site's session cookie directly. Chrome sets it through the
+        DevTools protocol without loading a page, other browsers need one
+        navigation to the site first because cookies can only be added for
+        the current domain.
+
+        Args:
+            username (str): User to log in as (e.g., "standard_user")
+        """
+        logger.info("Injecting session for username: %s", username)
+        expiry = int(time.time()) + SESSION_COOKIE_TTL
+
+        if hasattr(self.driver, "execute_cdp_cmd"):
+            self.driver.execute_cdp_cmd(
+                "Network.setCookie",
+                {
+                    "name": SESSION_COOKIE_NAME,
+                    "value": quote(username),
+                    "url": self.url,
+                    "path": "/",
+                    "expires": expiry,
+                },
+            )
+        else:
+            self.open()
+            self.driver.add_cookie(
+                {
+                    "name": SESSION_COOKIE_NAME,
+                    "value": quote(username),
+                    "path": "/",
+                    "expiry": expiry,
+                }
+            )
 
     def enter_username(self, username):
         """Enter username in username field"""
-        logger.info(f"Entering username: {username}")
+        logger.info("Entering username: %s", username)
         self.send_keys(self.USERNAME_INPUT, username)
 
     def enter_password(self, password):
@@ -49,33 +90,44 @@ class LoginPage(BasePage):
 
     def login(self, username, password):
         """Complete login flow"""
-        logger.info(f"Attempting login with username: {username}")
+        logger.info("Attempting login with username: %s", username)
         self.enter_username(username)
         self.enter_password(password)
+        old_url = self.driver.current_url
         self.click_login_button()
-        # Press ESC to close any popup
-        time.sleep(0.5)
+        # Wait for the redirect or the error message, whichever comes first
+        try:
+            self.wait_for(
+                any_of(url_changed(old_url), element_shown(self.ERROR_MESSAGE)),
+                description="login result",
+            )
+        except TimeoutException:
+            logger.warning("Neither redirect nor error message after login")
+        # Close a popup (e.g. a password manager prompt) if one opened
         try:
-            body = self.driver.find_element(By.TAG_NAME, "body")
-            body.send_keys(Keys.ESCAPE)
-        except Exception as e:
-            logger.debug(f"No popup to dismiss: {e}")
-            pass
+            self.dismiss_modal()
+        except TimeoutException:
+            logger.warning("Popup still open after login")
 
     def get_error_message(self):
         """Get error message text"""
         if self.is_visible(self.ERROR_MESSAGE, timeout=3):
             error_text = self.get_text(self.ERROR_MESSAGE)
-            logger.info(f"Error message displayed: {error_text}")
+            logger.info("Error message displayed: %s", error_text)
             return error_text
         return None
 
     def is_error_displayed(self):
-        """Check if error message is displayed"""
+        """Check if error message is displayed (waits up to 3s for it to appear)"""
         return self.is_visible(self.ERROR_MESSAGE, timeout=3)
 
+    def is_error_absent(self):
+        """Check that no error message is displayed, returns immediately"""
+        return self.is_absent(self.ERROR_MESSAGE)
+
     def clear_error(self):
         """Click the error button to clear error message"""
         if self.is_visible(self.ERROR_BUTTON, timeout=2):
             logger.info("Clearing error message")
             self.click(self.ERROR_BUTTON)
+            self.wait_until_gone(self.ERROR_MESSAGE, timeout=2)
@@ -0,0 +1,129 @@
+"""
+Page Macros
+Multi-step page flows declared once and executed in the browser as a single
+asynchronous script (BasePage.run_macro)
+"""
+
+from dataclasses import dataclass
+
+# Runs the steps one after another. Every step first waits (polling in the
+# page) until its element is rendered. Values are set through the native
+# value setter followed by input/change events, so framework-controlled
+# inputs (React on SauceDemo) see them like typed text. A click that loads a
+# new page is fired after the result was returned, the navigation would
+# otherwise discard it.
+MACRO_SCRIPT = """
+var steps = arguments[0];
+var timeout = arguments[1];
+var done = arguments[arguments.length - 1];
+var log = [];
+
+function rendered(el) {
+    return !!(el && el.getClientRects().length);
+}
+
+function waitFor(selector, deadline, callback) {
+    var el = document.querySelector(selector);
+    if (rendered(el)) {
+        return callback(el);
+    }
+    if (performance.now() > deadline) {
+        return callback(null);
+    }
+    setTimeout(function () { waitFor(selector, deadline, callback); }, 50);
+}
+
+function setValue(el, value) {
+    var proto = el instanceof HTMLTextAreaElement
+        ? HTMLTextAreaElement.prototype
+        : HTMLInputElement.prototype;
+    el.focus();
+    Object.getOwnPropertyDescriptor(proto, "value").set.call(el, value);
+    el.dispatchEvent(new Event("input", {bubbles: true}));
+    el.dispatchEvent(new Event("change", {bubbles: true}));
+    el.blur();
+}
+
+function run(index) {
+    if (index >= steps.length) {
+        return done({ok: true, log: log});
+    }
+    var step = steps[index];
+    var start = performance.now();
+    waitFor(step.selector, start + timeout, function (el) {
+        var entry = {ms: Math.round((performance.now() - start) * 10) / 10};
+        log.push(entry);
+        if (!el) {
+            entry.ok = false;
+            return done({ok: false, failed: index, log: log});
+        }
+        entry.ok = true;
+        if (step.action === "fill") {
+            setValue(el, step.value);
+        } else if (step.action === "click") {
+            if (step.navigates) {
+                done({ok: true, log: log});
+                setTimeout(function () { el.click(); }, 0);
+                return;
+            }
+            el.click();
+        }
+        run(index + 1);
+    });
+}
+
+run(0);
+"""
+
+
+@dataclass(frozen=True)
+class MacroStep:
+    """
+    One step of a macro
+
+    action is "fill" or "click". For fill, value names the keyword
+    argument of BasePage.run_macro() that holds the text.
+    """
+
+    action: str
+    locator: tuple
+    value: str = None
+    navigates: bool = False
+
+    def describe(self):
+        if self.action == "fill":
+            return f"fill {self.locator} with {self.value}"
+        return f"{self.action} {self.locator}"
+
+
+@dataclass(frozen=True)
+class Macro:
+    """
+    A named sequence of steps, optionally followed by waiting for an element
+    of the next page (then)
+    """
+
+    name: str
+    steps: tuple
+    then: tuple = None
+
+    def __post_init__(self):
+        for step in self.steps[:-1]:
+            if step.navigates:
+                raise ValueError(
+                    f"Macro '{self.name}': only the last step may load a new page"
+                )
+
+    @property
+    def navigates(self):
+        return bool(self.steps) and self.steps[-1].navigates
+
+
+def fill(locator, value):
+    """Step: set the value of an input, value is a run_macro() keyword"""
+    return MacroStep("fill", locator, value=value)
+
+
+def click(locator, navigates=False):
+    """Step: click an element, navigates=True if it loads a new page"""
+    return MacroStep("click", locator, navigates=navigates)
@@ -4,89 +4,650 @@ Contains common methods used by all page objects
 """
 
 import logging
+import time
+from contextlib import contextmanager
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from config.config import EXPLICIT_WAIT
+from selenium.common.exceptions import (
+    JavascriptException,
+    NoAlertPresentException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from config import config
+from config.config import (
+    EXPLICIT_WAIT,
+    IMPLICIT_WAIT,
+    SCRIPT_TIMEOUT,
+    WAIT_OBSERVER_RECHECK_MS,
+    WAIT_POLL_FREQUENCY,
+)
+from pages.macros import MACRO_SCRIPT
+from utils.instrumentation import record_origin
 
 logger = logging.getLogger(__name__)
 
+# Every BasePage.wait_for() call of the session: description, seconds, satisfied
+WAIT_TIMINGS = []
+
+# Element cache counters of the session, summed over all page objects
+ELEMENT_CACHE_STATS = {"hits": 0, "misses": 0, "stale": 0}
+
+# Selectors of in-page dialogs that block interaction
+MODAL_SELECTOR = "[role='dialog'], [aria-modal='true'], .modal"
+
+# Text of every element matching a CSS selector, in document order
+LIST_TEXTS_SCRIPT = """
+return Array.prototype.map.call(
+    document.querySelectorAll(arguments[0]),
+    function (el) { return el.textContent.trim(); }
+);
+"""
+
+# Number of rendered (non-hidden) elements matching a CSS selector
+RENDERED_COUNT_SCRIPT = """
+return Array.prototype.filter.call(
+    document.querySelectorAll(arguments[0]),
+    function (el) { return el.getClientRects().length > 0; }
+).length;
+"""
+
+# Observer wait engine: evaluates a condition's in-page predicate (__PREDICATE__,
+# an execute_script body reading its arguments[i]) right away, then again on
+# every DOM mutation, history/hash change and every arguments[2] ms for
+# changes no mutation reports (layout, image loads). Returns {ok, value} as
+# soon as the predicate is truthy, {ok: false} after arguments[1] ms.
+OBSERVER_WAIT_SCRIPT = """
+var args = arguments[0];
+var timeout = arguments[1];
+var recheck = arguments[2];
+var done = arguments[arguments.length - 1];
+var check = function () { __PREDICATE__ };
+var finished = false;
+var observer = null;
+var timer = null;
+var interval = null;
+
+function finish(result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    clearTimeout(timer);
+    clearInterval(interval);
+    window.removeEventListener("popstate", evaluate);
+    window.removeEventListener("hashchange", evaluate);
+    done(result);
+}
+
+function evaluate() {
+    if (finished) {
+        return;
+    }
+    try {
+        var value = check.apply(null, args);
+        // Same truthiness as the polling engine: empty lists do not count
+        if (value && !(Array.isArray(value) && !value.length)) {
+            finish({ok: true, value: value});
+        }
+    } catch (e) {
+        finish({ok: false, error: String(e)});
+    }
+}
+
+evaluate();
+if (!finished) {
+    observer = new MutationObserver(evaluate);
+    observer.observe(document, {
+        subtree: true, childList: true, attributes: true, characterData: true
+    });
+    window.addEventListener("popstate", evaluate);
+    window.addEventListener("hashchange", evaluate);
+    interval = setInterval(evaluate, recheck);
+    timer = setTimeout(function () { finish({ok: false}); }, timeout);
+}
+"""
+
+# In-page predicates of the wait conditions, see script_condition()
+ELEMENT_PRESENT_SCRIPT = "return document.querySelector(arguments[0]);"
+ELEMENTS_PRESENT_SCRIPT = """
+var els = document.querySelectorAll(arguments[0]);
+return els.length ? Array.prototype.slice.call(els) : null;
+"""
+ELEMENT_SHOWN_SCRIPT = """
+var el = document.querySelector(arguments[0]);
+return !!(el && el.getClientRects().length);
+"""
+ELEMENT_VISIBLE_SCRIPT = """
+var el = document.querySelector(arguments[0]);
+if (!el || !el.getClientRects().length) {
+    return null;
+}
+var style = window.getComputedStyle(el);
+if (style.visibility === "hidden" || style.opacity === "0") {
+    return null;
+}
+return arguments[1] && el.disabled ? null : el;
+"""
+ELEMENT_TEXT_IS_SCRIPT = """
+var el = document.querySelector(arguments[0]);
+return !!el && el.textContent.trim() === arguments[1];
+"""
+ELEMENT_GONE_SCRIPT = """
+return !Array.prototype.some.call(
+    document.querySelectorAll(arguments[0]),
+    function (el) { return el.getClientRects().length > 0; }
+);
+"""
+LIST_ORDER_CHANGED_SCRIPT = """
+var texts = Array.prototype.map.call(
+    document.querySelectorAll(arguments[0]),
+    function (el) { return el.textContent.trim(); }
+);
+return texts.length && JSON.stringify(texts) !== JSON.stringify(arguments[1])
+    ? texts
+    : false;
+"""
+URL_CHANGED_SCRIPT = """
+return location.href !== arguments[0] ? location.href : false;
+"""
+
+
+def css_selector(locator):
+    """Translate an (By, value) locator into a CSS selector for in-page scripts"""
+    by, value = locator
+    if by == By.CSS_SELECTOR:
+        return value
+    if by == By.ID:
+        return f"[id='{value}']"
+    if by == By.CLASS_NAME:
+        return f".{value}"
+    if by == By.TAG_NAME:
+        return value
+    if by == By.NAME:
+        return f"[name='{value}']"
+    raise ValueError(f"Locator cannot be expressed as CSS: {locator}")
+
+
+# Wait conditions
+# Each returns a callable for WebDriverWait.until()/BasePage.wait_for(). They
+# query the DOM through scripts, so a poll never blocks on the implicit wait.
+# Conditions with an in-page predicate (script/args attributes) can also be
+# awaited by the observer wait engine, others are always polled.
+
+
+def script_condition(script, *args, description=None):
+    """
+    Condition: an execute_script body returns a truthy value
+
+    Args:
+        script (str): Script body, reads args as arguments[0], arguments[1]...
+        *args: JSON serializable script arguments
+        description (str): Name used in logs and the wait timing report
+    """
+
+    def _predicate(driver):
+        return driver.execute_script(script, *args)
+
+    return with_script(_predicate, script, *args, description=description)
+
+
+def with_script(predicate, script, *args, description=None):
+    """Attach an in-page version (script, args) to a Python predicate"""
+    predicate.script = script
+    predicate.args = list(args)
+    predicate.description = description or getattr(
+        predicate, "description", "condition"
+    )
+    return predicate
+
+
+def url_changed(old_url):
+    """Condition: the current URL differs from old_url, returns the new URL"""
+
+    def _predicate(driver):
+        current_url = driver.current_url
+        return current_url if current_url != old_url else False
+
+    return with_script(
+        _predicate,
+        URL_CHANGED_SCRIPT,
+        old_url,
+        description=f"url changed from {old_url}",
+    )
+
+
+def element_shown(locator):
+    """Condition: an element matching locator is rendered, no implicit wait"""
+    return script_condition(
+        ELEMENT_SHOWN_SCRIPT,
+        css_selector(locator),
+        description=f"element shown {locator}",
+    )
+
+
+def element_text_is(locator, expected):
+    """Condition: the first element matching locator has exactly this text"""
+    return script_condition(
+        ELEMENT_TEXT_IS_SCRIPT,
+        css_selector(locator),
+        expected,
+        description=f"text of {locator} is {expected!r}",
+    )
+
+
+def list_order_changed(locator, previous):
+    """
+    Condition: the texts of the elements matching locator are no longer in
+    the order given by previous, returns the new list of texts
+    """
+    return script_condition(
+        LIST_ORDER_CHANGED_SCRIPT,
+        css_selector(locator),
+        list(previous),
+        description=f"order changed {locator}",
+    )
+
+
+def element_gone(locator):
+    """Condition: no element matching locator is rendered any more"""
+    return script_condition(
+        ELEMENT_GONE_SCRIPT,
+        css_selector(locator),
+        description=f"element gone {locator}",
+    )
+
+
+def element_present(locator):
+    """Condition: an element matching locator is in the DOM, returns it"""
+    return _element_condition(
+        EC.presence_of_element_located(locator),
+        ELEMENT_PRESENT_SCRIPT,
+        locator,
+        f"element present {locator}",
+    )
+
+
+def elements_present(locator):
+    """Condition: at least one element matching locator is in the DOM, returns all"""
+    return _element_condition(
+        EC.presence_of_all_elements_located(locator),
+        ELEMENTS_PRESENT_SCRIPT,
+        locator,
+        f"elements present {locator}",
+    )
+
+
+def element_visible(locator):
+    """Condition: an element matching locator is displayed, returns it"""
+    return _element_condition(
+        EC.visibility_of_element_located(locator),
+        ELEMENT_VISIBLE_SCRIPT,
+        locator,
+        f"element visible {locator}",
+        False,
+    )
+
+
+def element_clickable(locator):
+    """Condition: an element matching locator is displayed and enabled, returns it"""
+    return _element_condition(
+        EC.element_to_be_clickable(locator),
+        ELEMENT_VISIBLE_SCRIPT,
+        locator,
+        f"element clickable {locator}",
+        True,
+    )
+
+
+def _element_condition(predicate, script, locator, description, *extra_args):
+    """
+    Expected condition for polling plus the in-page predicate, locators
+    without a CSS form (XPath) are only polled
+    """
+    try:
+        selector = css_selector(locator)
+    except ValueError:
+        predicate.description = description
+        return predicate
+    return with_script(
+        predicate, script, selector, *extra_args, description=description
+    )
+
+
+def any_of(*conditions):
+    """
+    Condition: the first of conditions that is truthy, returns its value
+    Has an in-page predicate when all conditions have one
+    """
+
+    def _predicate(driver):
+        for condition in conditions:
+            result = condition(driver)
+            if result:
+                return result
+        return False
+
+    description = " or ".join(
+        getattr(condition, "description", "condition") for condition in conditions
+    )
+    if not all(hasattr(condition, "script") for condition in conditions):
+        _predicate.description = description
+        return _predicate
+
+    script = "".join(
+        f"var r{index} = (function () {{ {condition.script} }}).apply("
+        f"null, arguments[{index}]);\nif (r{index}) {{ return r{index}; }}\n"
+        for index, condition in enumerate(conditions)
+    )
+    return with_script(
+        _predicate,
+        script + "return false;",
+        *[condition.args for condition in conditions],
+        description=description,
+    )
+
+
+def no_modal_present():
+    """Condition: neither a JavaScript alert nor an in-page dialog is open"""
+    script = (
+        "return Array.prototype.some.call(document.querySelectorAll(arguments[0]),"
+        " function (el) { return el.getClientRects().length > 0; });"
+    )
+
+    def _predicate(driver):
+        if EC.alert_is_present()(driver):
+            return False
+        return not driver.execute_script(script, MODAL_SELECTOR)
+
+    _predicate.description = "no modal present"
+    return _predicate
+
 
 class BasePage:
     """Base class for all page objects"""
 
-    def __init__(self, driver):
+    def __init__(self, driver, cache_elements=None):
+        """
+        Args:
+            driver: WebDriver instance
+            cache_elements (bool): Reuse elements found by find_element() until
+                the page changes, defaults to config.ELEMENT_CACHE
+        """
         self.driver = driver
         self.wait = WebDriverWait(driver, EXPLICIT_WAIT)
+        if cache_elements is None:
+            cache_elements = config.ELEMENT_CACHE
+        self._element_cache = {} if cache_elements else None
+
+    def invalidate_element_cache(self):
+        """Forget cached elements, called after navigation and DOM changes"""
+        if self._element_cache:
+            self._element_cache.clear()
+
+    def _with_element(self, locator, action):
+        """
+        Run action(element) on the element for locator
+
+        A cached element that went stale is dropped and looked up again once,
+        so callers never see StaleElementReferenceException from the cache.
+        """
+        element = self.find_element(locator)
+        try:
+            return action(element)
+        except StaleElementReferenceException:
+            if self._element_cache is None:
+                raise
+            ELEMENT_CACHE_STATS["stale"] += 1
+            logger.debug("Cached element went stale, refetching: %s", locator)
+            self._element_cache.pop(locator, None)
+            return action(self.find_element(locator))
+
+    @record_origin("wait_for")
+    def wait_for(self, condition, timeout=EXPLICIT_WAIT, description=None):
+        """
+        Wait until condition is truthy and record how long it took
+
+        With config.WAIT_ENGINE "observer" conditions that have an in-page
+        predicate are awaited in the browser (see _observe()), everything
+        else is polled every WAIT_POLL_FREQUENCY seconds.
+
+        Args:
+            condition (callable): condition(driver), e.g. url_changed(url)
+            timeout (float): Seconds before TimeoutException is raised
+            description (str): Name used in logs and the wait timing report
+
+        Returns:
+            The truthy value returned by condition
+        """
+        description = description or getattr(condition, "description", "condition")
+        start = time.perf_counter()
+        try:
+            if config.WAIT_ENGINE == "observer" and hasattr(condition, "script"):
+                result = self._observe(condition, timeout)
+            else:
+                result = self._poll(condition, timeout)
+        except TimeoutException:
+            elapsed = time.perf_counter() - start
+            WAIT_TIMINGS.append((description, elapsed, False))
+            logger.debug("Wait '%s' timed out after %.3fs", description, elapsed)
+            raise
+
+        elapsed = time.perf_counter() - start
+        WAIT_TIMINGS.append((description, elapsed, True))
+        logger.debug("Wait '%s' satisfied after %.3fs", description, elapsed)
+        return result
+
+    def _poll(self, condition, timeout):
+        wait = WebDriverWait(self.driver, timeout, poll_frequency=WAIT_POLL_FREQUENCY)
+        return wait.until(condition)
+
+    def _observe(self, condition, timeout):
+        """
+        Wait for condition inside the browser, in one async script call
+
+        The script re-evaluates the in-page predicate whenever the DOM or the
+        URL changes. When the script is aborted (navigation) or the predicate
+        throws, the remaining time is polled instead.
+        """
+        deadline = time.monotonic() + timeout
+        script = OBSERVER_WAIT_SCRIPT.replace("__PREDICATE__", condition.script)
+        try:
+            outcome = self.driver.execute_async_script(
+                script, condition.args, timeout * 1000, WAIT_OBSERVER_RECHECK_MS
+            )
+        except (JavascriptException, TimeoutException) as e:
+            # Navigation unloaded the document, or the wait outlasted the
+            # driver's script timeout
+            logger.debug("Observer wait interrupted, polling the rest: %s", e.msg)
+            outcome = {"ok": False, "error": e.msg}
+
+        if outcome["ok"]:
+            return outcome["value"]
+        if outcome.get("error"):
+            return self._poll(condition, max(0.0, deadline - time.monotonic()))
+        raise TimeoutException(f"Condition not met after {timeout}s")
+
+    @contextmanager
+    def implicit_wait_disabled(self):
+        """
+        Temporarily set the driver's implicit wait to 0
+
+        Inside the block a lookup of a missing element fails immediately
+        instead of blocking for IMPLICIT_WAIT, so explicit waits and absence
+        checks do not stack on top of it. Nested blocks are supported.
+        """
+        depth = getattr(self.driver, "_implicit_wait_suspended", 0)
+        if depth == 0:
+            self.driver.implicitly_wait(0)
+        self.driver._implicit_wait_suspended = depth + 1
+        try:
+            yield
+        finally:
+            self.driver._implicit_wait_suspended = depth
+            if depth == 0:
+                self.driver.implicitly_wait(IMPLICIT_WAIT)
+
+    @record_origin("count_now")
+    def count_now(self, locator):
+        """Number of elements matching locator right now, never waits"""
+        try:
+            selector = css_selector(locator)
+        except ValueError:
+            with self.implicit_wait_disabled():
+                return len(self.driver.find_elements(*locator))
+        return self.driver.execute_script(
+            "return document.querySelectorAll(arguments[0]).length;", selector
+        )
+
+    @record_origin("is_absent")
+    def is_absent(self, locator):
+        """True if no element matching locator is displayed right now, never waits"""
+        try:
+            selector = css_selector(locator)
+        except ValueError:
+            with self.implicit_wait_disabled():
+                elements = self.driver.find_elements(*locator)
+                return not any(element.is_displayed() for element in elements)
+        return self.driver.execute_script(RENDERED_COUNT_SCRIPT, selector) == 0
+
+    @record_origin("wait_until_gone")
+    def wait_until_gone(self, locator, timeout=EXPLICIT_WAIT):
+        """
+        Wait until no element matching locator is displayed
+
+        Returns:
+            bool: True as soon as the element is gone, False after timeout
+        """
+        try:
+            self.wait_for(
+                element_gone(locator),
+                timeout=timeout,
+                description=f"gone {locator}",
+            )
+            return True
+        except TimeoutException:
+            logger.debug("Element still displayed after %ss: %s", timeout, locator)
+            return False
+
+    def get_texts_now(self, locator):
+        """Texts of all elements matching locator, in one round trip, no waiting"""
+        return self.driver.execute_script(LIST_TEXTS_SCRIPT, css_selector(locator))
+
+    @record_origin("dismiss_modal")
+    def dismiss_modal(self, timeout=2):
+        """
+        Close an open alert or in-page dialog and wait until it is gone
+        Returns immediately when no modal is present
+
+        Returns:
+            bool: True if a modal was dismissed
+        """
+        condition = no_modal_present()
+        if condition(self.driver):
+            return False
+
+        logger.debug("Dismissing modal")
+        try:
+            self.driver.switch_to.alert.dismiss()
+        except NoAlertPresentException:
+            self.driver.switch_to.active_element.send_keys(Keys.ESCAPE)
+        self.wait_for(condition, timeout=timeout)
+        return True
 
+    @record_origin("find_element")
     def find_element(self, locator):
-        """Find element with explicit wait"""
+        """Find element with explicit wait, served from the element cache if enabled"""
+        if self._element_cache is not None:
+            element = self._element_cache.get(locator)
+            if element is not None:
+                ELEMENT_CACHE_STATS["hits"] += 1
+                return element
+            ELEMENT_CACHE_STATS["misses"] += 1
+
         try:
-            logger.debug(f"Finding element: {locator}")
-            element = self.wait.until(EC.presence_of_element_located(locator))
+            logger.debug("Finding element: %s", locator)
+            element = self.wait_for(element_present(locator))
+            if self._element_cache is not None:
+                self._element_cache[locator] = element
             return element
         except TimeoutException:
-            logger.error(f"Element not found: {locator}")
+            logger.error("Element not found: %s", locator)
             raise
 
+    @record_origin("find_elements")
     def find_elements(self, locator):
         """Find multiple elements with explicit wait"""
         try:
-            logger.debug(f"Finding elements: {locator}")
-            elements = self.wait.until(EC.presence_of_all_elements_located(locator))
+            logger.debug("Finding elements: %s", locator)
+            elements = self.wait_for(elements_present(locator))
             return elements
         except TimeoutException:
-            logger.error(f"Elements not found: {locator}")
+            logger.error("Elements not found: %s", locator)
             raise
 
+    @record_origin("click")
     def click(self, locator):
         """Click element with explicit wait for clickability"""
         try:
-            logger.debug(f"Clicking element: {locator}")
-            element = self.wait.until(EC.element_to_be_clickable(locator))
+            logger.debug("Clicking element: %s", locator)
+            element = self.wait_for(element_clickable(locator))
             element.click()
+            # The click may have changed the page
+            self.invalidate_element_cache()
         except TimeoutException:
-            logger.error(f"Element not clickable: {locator}")
+            logger.error("Element not clickable: %s", locator)
             raise
 
+    @record_origin("send_keys")
     def send_keys(self, locator, text):
         """Send keys to element with clear first"""
         try:
-            logger.debug(f"Sending keys to element: {locator}")
-            element = self.find_element(locator)
-            element.clear()
-            element.send_keys(text)
+            logger.debug("Sending keys to element: %s", locator)
+
+            def _clear_and_type(element):
+                element.clear()
+                element.send_keys(text)
+
+            self._with_element(locator, _clear_and_type)
         except Exception as e:
-            logger.error(f"Failed to send keys to {locator}: {e}")
+            logger.error("Failed to send keys to %s: %s", locator, e)
             raise
 
+    @record_origin("get_text")
     def get_text(self, locator):
         """Get text from element"""
         try:
-            element = self.find_element(locator)
-            return element.text
+            return self._with_element(locator, lambda element: element.text)
         except Exception as e:
-            logger.error(f"Failed to locate element {locator}: {e}")
+            logger.error("Failed to locate element %s: %s", locator, e)
             return False
 
+    @record_origin("is_visible")
     def is_visible(self, locator, timeout=EXPLICIT_WAIT):
         """Check if element is visible"""
         try:
-            wait = WebDriverWait(self.driver, timeout)
-            wait.until(EC.visibility_of_element_located(locator))
+            with self.implicit_wait_disabled():
+                self.wait_for(element_visible(locator), timeout=timeout)
             return True
         except Exception as e:
-            logger.error(f"Element is not visible {locator}: {e}")
+            logger.error("Element is not visible %s: %s", locator, e)
             return False
 
+    @record_origin("is_present")
     def is_present(self, locator, timeout=EXPLICIT_WAIT):
         """Check if element is present in DOM"""
         try:
-            wait = WebDriverWait(self.driver, timeout)
-            wait.until(EC.presence_of_element_located(locator))
+            with self.implicit_wait_disabled():
+                self.wait_for(element_present(locator), timeout=timeout)
             return True
         except Exception as e:
-            logger.error(f"Element is not present in DOM {locator}: {e}")
+            logger.error("Element is not present in DOM %s: %s", locator, e)
             return False
 
     def get_current_url(self):
@@ -101,9 +662,102 @@ class BasePage:
         """Refresh the current page"""
         logger.info("Refreshing page")
         self.driver.refresh()
+        self.invalidate_element_cache()
 
     def scroll_to_element(self, locator):
         """Scroll element into view"""
-        element = self.find_element(locator)
-        self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-        logger.debug(f"Scrolled to element: {locator}")
+        self._with_element(
+            locator,
+            lambda element: self.driver.execute_script(
+                "arguments[0].scrollIntoView(true);", element
+            ),
+        )
+        logger.debug("Scrolled to element: %s", locator)
+
+    @record_origin("run_macro")
+    def run_macro(self, macro, timeout=EXPLICIT_WAIT, **values):
+        """
+        Run a multi-step flow declared as a Macro
+
+        With config.MACRO_MODE "script" all steps run in the browser as one
+        asynchronous script, "stepwise" runs them as separate WebDriver calls
+        (real key presses, easier to debug). Either way every step is logged
+        and the macro ends by waiting for macro.then.
+
+        Args:
+            macro (Macro): Steps to run
+            timeout (float): Seconds each step may wait for its element
+            **values: Texts for the fill steps, by step value name
+
+        Raises:
+            TimeoutException: A step's element did not appear in time
+        """
+        logger.info("Running macro '%s' (%s)", macro.name, config.MACRO_MODE)
+        if config.MACRO_MODE == "stepwise":
+            self._run_macro_stepwise(macro, timeout, values)
+        else:
+            self._run_macro_script(macro, timeout, values)
+
+        self.invalidate_element_cache()
+        if macro.then is not None:
+            self.wait_for(
+                element_shown(macro.then),
+                timeout=timeout,
+                description=f"macro '{macro.name}' done",
+            )
+
+    def _run_macro_script(self, macro, timeout, values):
+        steps = [
+            {
+                "action": step.action,
+                "selector": css_selector(step.locator),
+                "value": values[step.value] if step.action == "fill" else None,
+                "navigates": step.navigates,
+            }
+            for step in macro.steps
+        ]
+        self._allow_script_time(len(steps) * timeout)
+        result = self.driver.execute_async_script(MACRO_SCRIPT, steps, timeout * 1000)
+
+        total = len(macro.steps)
+        for number, (step, entry) in enumerate(zip(macro.steps, result["log"]), 1):
+            logger.info(
+                "Macro '%s' step %d/%d: %s (%s ms)",
+                macro.name,
+                number,
+                total,
+                step.describe(),
+                entry["ms"],
+            )
+        if not result["ok"]:
+            step = macro.steps[result["failed"]]
+            raise TimeoutException(
+                f"Macro '{macro.name}' step {result['failed'] + 1}/{total}: "
+                f"{step.locator} not shown after {timeout}s"
+            )
+
+    def _allow_script_time(self, seconds):
+        """
+        Raise the driver's script timeout so an async script may run for
+        seconds (plus a second to report back), never lowers it
+        """
+        needed = seconds + 1
+        if getattr(self.driver, "_script_timeout", SCRIPT_TIMEOUT) < needed:
+            self.driver.set_script_timeout(needed)
+            self.driver._script_timeout = needed
+
+    def _run_macro_stepwise(self, macro, timeout, values):
+        total = len(macro.steps)
+        for number, step in enumerate(macro.steps, 1):
+            logger.info(
+                "Macro '%s' step %d/%d: %s",
+                macro.name,
+                number,
+                total,
+                step.describe(),
+            )
+            self.wait_for(element_shown(step.locator), timeout=timeout)
+            if step.action == "fill":
+                self.send_keys(step.locator, values[step.value])
+            elif step.action == "click":
+                self.click(step.locator)
@@ -4,18 +4,100 @@ Represents the SauceDemo products/inventory page
 """
 
 import logging
+from dataclasses import dataclass
+from types import MappingProxyType
+from urllib.parse import urljoin
 
-from selenium.webdriver import Keys
 from selenium.webdriver.common.by import By
-from pages.page_base import BasePage
+from pages.macros import Macro, click, fill
+from pages.page_base import (
+    BasePage,
+    css_selector,
+    element_present,
+    element_text_is,
+    list_order_changed,
+    script_condition,
+)
+from config import config
 from selenium.webdriver.support.select import Select
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
-
+from selenium.common.exceptions import TimeoutException
 
 logger = logging.getLogger(__name__)
 
+# Clicks the add-to-cart buttons for the given id suffixes in one round trip.
+# Returns the badge count before clicking and one status per suffix:
+# "added", "in_cart" (button already says Remove) or "not_found"
+BULK_ADD_TO_CART_SCRIPT = """
+var badge = document.querySelector(arguments[1]);
+var before = badge ? parseInt(badge.textContent, 10) || 0 : 0;
+var results = arguments[0].map(function (slug) {
+    var button = document.getElementById("add-to-cart-" + slug);
+    if (button) {
+        button.click();
+        return "added";
+    }
+    return document.getElementById("remove-" + slug) ? "in_cart" : "not_found";
+});
+return {badge: before, results: results};
+"""
+
+# Reads every inventory item in one round trip:
+# [name, price text, description, image src, button id, button text]
+INVENTORY_SNAPSHOT_SCRIPT = """
+function text(item, selector) {
+    var el = item.querySelector(selector);
+    return el ? el.textContent.trim() : "";
+}
+return Array.prototype.map.call(
+    document.querySelectorAll(arguments[0]),
+    function (item) {
+        var image = item.querySelector("img");
+        var button = item.querySelector("button");
+        return [
+            text(item, ".inventory_item_name"),
+            text(item, ".inventory_item_price"),
+            text(item, ".inventory_item_desc"),
+            image ? image.getAttribute("src") : "",
+            button ? button.id : "",
+            button ? button.textContent.trim() : ""
+        ];
+    }
+);
+"""
+
+# Number of product images that finished loading, or null while any image is
+# still loading
+LOADED_IMAGES_SCRIPT = """
+var images = document.querySelectorAll(arguments[0]);
+var loaded = 0;
+for (var i = 0; i < images.length; i++) {
+    if (!images[i].complete) {
+        return null;
+    }
+    if (images[i].naturalWidth > 0) {
+        loaded++;
+    }
+}
+return {loaded: loaded};
+"""
+
+
+@dataclass(frozen=True)
+class InventoryItem:
+    """One product card of the inventory page"""
+
+    name: str
+    price: float
+    description: str
+    image_src: str
+    button_id: str
+    button_text: str
+
+    @property
+    def in_cart(self):
+        """The button says Remove instead of Add to cart"""
+        return self.button_id.startswith("remove")
+
 
 class ProductsPage(BasePage):
     """Page Object for SauceDemo products page"""
@@ -25,6 +107,7 @@ class ProductsPage(BasePage):
     INVENTORY_ITEMS = (By.CLASS_NAME, "inventory_item")
     PRODUCT_NAMES = (By.CLASS_NAME, "inventory_item_name")
     PRODUCT_PRICES = (By.CLASS_NAME, "inventory_item_price")
+    PRODUCT_IMAGES = (By.CSS_SELECTOR, ".inventory_item_img img")
     SORT_DROPDOWN = (By.CLASS_NAME, "product_sort_container")
     SHOPPING_CART_BADGE = (By.CSS_SELECTOR, ".shopping_cart_badge")
     CHECKOUT_BUTTON = (By.ID, "checkout")
@@ -35,9 +118,110 @@ class ProductsPage(BasePage):
     FINISH_BUTTON = (By.ID, "finish")
     BACK_HOME_BUTTON = (By.ID, "back-to-products")
 
-    def __init__(self, driver):
-        super().__init__(driver)
-        self.url = "https://www.saucedemo.com/inventory.html"
+    # Buttons of click_button() by name, read-only as it is shared by all
+    # instances
+    BUTTONS = MappingProxyType(
+        {
+            "checkout": CHECKOUT_BUTTON,
+            "continue": CHECKOUT_CONTINUE_BUTTON,
+            "finish": FINISH_BUTTON,
+            "back": BACK_HOME_BUTTON,
+        }
+    )
+
+    # Checkout flow macros, see BasePage.run_macro()
+    OPEN_CART_MACRO = Macro(
+        "open cart",
+        steps=(click(SHOPPING_CART_BADGE, navigates=True),),
+        then=CHECKOUT_BUTTON,
+    )
+    START_CHECKOUT_MACRO = Macro(
+        "start checkout",
+        steps=(click(CHECKOUT_BUTTON, navigates=True),),
+        then=FIRST_NAME_INPUT,
+    )
+    CHECKOUT_FORM_MACRO = Macro(
+        "fill checkout form and continue",
+        steps=(
+            fill(FIRST_NAME_INPUT, "first_name"),
+            fill(LAST_NAME_INPUT, "last_name"),
+            fill(POSTAL_CODE, "postal_code"),
+            click(CHECKOUT_CONTINUE_BUTTON, navigates=True),
+        ),
+        then=FINISH_BUTTON,
+    )
+    FINISH_CHECKOUT_MACRO = Macro(
+        "finish checkout",
+        steps=(click(FINISH_BUTTON, navigates=True),),
+        then=COMPLETE_HEADER,
+    )
+
+    # Seconds to wait for the list to re-order after choosing a sort option
+    SORT_TIMEOUT = 5
+    # Seconds to wait for the cart badge to show the new count
+    CART_BADGE_TIMEOUT = 5
+
+    def __init__(self, driver, cache_elements=None):
+        super().__init__(driver, cache_elements=cache_elements)
+        self.url = urljoin(config.BASE_URL, "inventory.html")
+        self._snapshot = None
+        self._cart_index = None
+
+    def open(self):
+        """Navigate to products page (requires a logged-in session)"""
+        logger.info("Opening products page: %s", self.url)
+        self.driver.get(self.url)
+        self.invalidate_snapshot(page_changed=True)
+
+    def get_inventory_snapshot(self):
+        """
+        Read all inventory items in a single script execution
+
+        The result is cached until invalidate_snapshot() is called, which
+        every method of this page that changes the DOM does.
+
+        Returns:
+            tuple[InventoryItem]: Items in display order
+        """
+        if self._snapshot is None:
+            rows = self.wait_for(
+                script_condition(
+                    INVENTORY_SNAPSHOT_SCRIPT,
+                    css_selector(self.INVENTORY_ITEMS),
+                    description="inventory snapshot",
+                )
+            )
+            self._snapshot = tuple(
+                InventoryItem(
+                    name=name,
+                    price=float(price.replace("$", "")),
+                    description=description,
+                    image_src=image_src,
+                    button_id=button_id,
+                    button_text=button_text,
+                )
+                for name, price, description, image_src, button_id, button_text in rows
+            )
+            logger.debug("Inventory snapshot taken: %s items", len(self._snapshot))
+        return self._snapshot
+
+    def invalidate_snapshot(self, page_changed=False):
+        """
+        Drop the cached inventory snapshot and elements after the DOM changed
+
+        Args:
+            page_changed (bool): A new page was loaded, also drop the
+                add-to-cart button index
+        """
+        self._snapshot = None
+        self.invalidate_element_cache()
+        if page_changed:
+            self._cart_index = None
+
+    def refresh_page(self):
+        """Refresh the current page"""
+        super().refresh_page()
+        self.invalidate_snapshot(page_changed=True)
 
     def is_loaded(self):
         """Check if products page is loaded"""
@@ -55,7 +239,9 @@ class ProductsPage(BasePage):
             logger.info("✅ Products page loaded successfully")
         else:
             logger.warning(
-                f"⚠️ Products page not loaded - URL: {url_correct}, Element: {element_visible}"
+                "⚠️ Products page not loaded - URL: %s, Element: %s",
+                url_correct,
+                element_visible,
             )
 
         return is_loaded
@@ -76,7 +262,9 @@ class ProductsPage(BasePage):
             logger.info("✅ Checkout complete page loaded successfully")
         else:
             logger.warning(
-                f"⚠️ checkout complete not loaded - URL: {url_correct}, Element: {element_visible}"
+                "⚠️ checkout complete not loaded - URL: %s, Element: %s",
+                url_correct,
+                element_visible,
             )
 
         return is_loaded
@@ -86,15 +274,13 @@ class ProductsPage(BasePage):
         logger.debug("Getting number of products displayed")
 
         try:
-            # Find all product items
-            elements = self.find_elements(self.INVENTORY_ITEMS)
-            count = len(elements)
+            count = len(self.get_inventory_snapshot())
 
-            logger.info(f"✅ Found {count} products on page")
+            logger.info("✅ Found %s products on page", count)
             return count
 
         except Exception as e:
-            logger.error(f"❌ Failed to get product count: {e}")
+            logger.error("❌ Failed to get product count: %s", e)
             return 0
 
     def get_product_names(self):
@@ -102,17 +288,15 @@ class ProductsPage(BasePage):
         logger.debug("Getting list of all product names")
 
         try:
-            # Find all product name elements
-            elements = self.find_elements(self.PRODUCT_NAMES)
-
-            # Extract text from each element
-            product_names = [element.text for element in elements]
+            product_names = [item.name for item in self.get_inventory_snapshot()]
 
-            logger.info(f"✅ Found {len(product_names)} product names: {product_names}")
+            logger.info(
+                "✅ Found %s product names: %s", len(product_names), product_names
+            )
             return product_names  # ✅ Return list of names!
 
         except Exception as e:
-            logger.error(f"❌ Failed to get product names: {e}")
+            logger.error("❌ Failed to get product names: %s", e)
             return []  # ❌ Return empty list on error
 
     def get_product_prices(self):
@@ -120,23 +304,43 @@ class ProductsPage(BasePage):
         logger.debug("Getting list of all product prices")
 
         try:
-            # Find all product name elements
-            elements = self.find_elements(self.PRODUCT_PRICES)
-
-            # Extract and convert in one line!
-            product_prices = [
-                float(element.text.replace("$", "")) for element in elements
-            ]
+            product_prices = [item.price for item in self.get_inventory_snapshot()]
 
             logger.info(
-                f"✅ Found {len(product_prices)} product prices: {product_prices}"
+                "✅ Found %s product prices: %s", len(product_prices), product_prices
             )
             return product_prices  # ✅ Return list of names!
 
         except Exception as e:
-            logger.error(f"❌ Failed to get product prices: {e}")
+            logger.error("❌ Failed to get product prices: %s", e)
             return []  # ❌ Return empty list on error
 
+    def get_product_image_sources(self):
+        """Get list of all product image sources"""
+        return [item.image_src for item in self.get_inventory_snapshot()]
+
+    def get_loaded_image_count(self, timeout=5):
+        """
+        Wait until the product images finished loading
+
+        Returns:
+            int: Number of images that loaded successfully, broken or blocked
+                images are not counted
+        """
+        try:
+            result = self.wait_for(
+                script_condition(
+                    LOADED_IMAGES_SCRIPT,
+                    css_selector(self.PRODUCT_IMAGES),
+                    description="product images loaded",
+                ),
+                timeout=timeout,
+            )
+            return result["loaded"]
+        except TimeoutException:
+            logger.warning("⚠️ Product images still loading after %ss", timeout)
+            return 0
+
     def add_product_to_cart_by_name(self, product_name):
         """
         Add specific product to cart by name
@@ -147,93 +351,128 @@ class ProductsPage(BasePage):
         Returns:
             bool: True if successfully added, False otherwise
         """
-        logger.debug(f"Adding product to cart: {product_name}")
+        return self.add_products_to_cart([product_name])[product_name]
 
-        try:
-            # Find all product items
-            products = self.find_elements(self.INVENTORY_ITEMS)
-            logger.debug(f"Found {len(products)} products on page")
-
-            # Loop through products to find matching name
-            for index, product in enumerate(products, 1):
-                # Get product name
-                name_element = product.find_element(
-                    By.CLASS_NAME, "inventory_item_name"
-                )
-                current_name = name_element.text
+    def add_products_to_cart(self, product_names):
+        """
+        Add several products to cart in one batched operation
 
-                logger.debug(f"Product {index}: '{current_name}'")
+        All add-to-cart buttons are clicked by a single script, then the cart
+        badge is awaited once for the final count.
 
-                if current_name == product_name:
-                    # Found the product! Click add to cart button
-                    add_button = product.find_element(
-                        By.CSS_SELECTOR, "button[id^='add-to-cart']"
-                    )
+        Args:
+            product_names (list[str]): Exact product names
 
-                    # Use JavaScript click for reliability in headless mode
-                    self.driver.execute_script("arguments[0].click();", add_button)
-                    logger.debug("Clicked add to cart button using JavaScript")
-
-                    # Wait for cart badge to appear
-                    try:
-                        WebDriverWait(self.driver, 5).until(
-                            EC.presence_of_element_located(self.SHOPPING_CART_BADGE)
-                        )
-                        logger.debug("✅ Cart badge appeared")
-                    except Exception as e:  # ✅ Fixed: was bare except
-                        logger.warning(
-                            f"⚠️ Cart badge did not appear after 5 seconds: {e}"
-                        )
-
-                    logger.info(f"✅ Successfully added '{product_name}' to cart")
-                    return True
-
-            # If we get here, product wasn't found
-            logger.warning(f"⚠️ Product '{product_name}' not found on page")
-            return False
+        Returns:
+            dict[str, bool]: Per product, True if it was added to the cart
+        """
+        names = list(dict.fromkeys(product_names))
+        logger.debug("Adding products to cart: %s", names)
 
+        try:
+            index = self._get_cart_index()
+            slugs = [index[name] for name in names if name in index]
+            outcome = self.driver.execute_script(
+                BULK_ADD_TO_CART_SCRIPT,
+                slugs,
+                css_selector(self.SHOPPING_CART_BADGE),
+            )
+            self.invalidate_snapshot()
         except Exception as e:
-            logger.error(f"❌ Failed to add '{product_name}' to cart: {e}")
-            import traceback
-
-            logger.error(traceback.format_exc())
-            return False
+            logger.error("❌ Failed to add %s to cart: %s", names, e)
+            return {name: False for name in names}
+
+        clicked = dict(zip(slugs, outcome["results"]))
+        results = {}
+        for name in names:
+            status = clicked.get(index.get(name), "not_found")
+            results[name] = status == "added"
+            if status == "not_found":
+                logger.warning("⚠️ Product '%s' not found on page", name)
+            elif status == "in_cart":
+                logger.warning("⚠️ Product '%s' is already in the cart", name)
+
+        added = sum(results.values())
+        if added:
+            expected = outcome["badge"] + added
+            try:
+                self.wait_for(
+                    element_text_is(self.SHOPPING_CART_BADGE, str(expected)),
+                    timeout=self.CART_BADGE_TIMEOUT,
+                    description="cart badge count",
+                )
+                logger.debug("✅ Cart badge shows %s", expected)
+            except TimeoutException:
+                # Find out which clicks did not register
+                logger.warning("⚠️ Cart badge did not reach %s items", expected)
+                in_cart = {
+                    item.name for item in self.get_inventory_snapshot() if item.in_cart
+                }
+                for name in names:
+                    results[name] = results[name] and name in in_cart
+
+        for name, success in results.items():
+            if success:
+                logger.info("✅ Successfully added '%s' to cart", name)
+        return results
+
+    def _get_cart_index(self):
+        """Product name -> add-to-cart button id suffix, built once per page load"""
+        if self._cart_index is None:
+            self._cart_index = {}
+            for item in self.get_inventory_snapshot():
+                for prefix in ("add-to-cart-", "remove-"):
+                    if item.button_id.startswith(prefix):
+                        self._cart_index[item.name] = item.button_id[len(prefix) :]
+        return self._cart_index
 
     def get_cart_badge_count(self):
-        """Get number shown on shopping cart badge. Returns 0 if cart is empty."""
+        """
+        Get number shown on shopping cart badge. Returns 0 if cart is empty.
+
+        Reads the DOM as it is right now: an empty cart has no badge, so
+        waiting for one would only delay the answer.
+        """
         try:
-            # Try to find visible badge (wait up to 5 seconds)
-            badge = WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located(self.SHOPPING_CART_BADGE)
-            )
+            badges = self.get_texts_now(self.SHOPPING_CART_BADGE)
+            if not badges:
+                logger.debug("No badge found (cart empty)")
+                return 0
 
             # Get and clean the text
-            count_text = badge.text.strip().strip("()")
-            count = int(count_text)
+            count = int(badges[0].strip("()"))
 
-            logger.info(f"✅ Cart has {count} items")
+            logger.info("✅ Cart has %s items", count)
             return count
 
         except Exception as e:
-            # Badge doesn't exist = cart is empty
-            logger.debug(f"No badge found (cart empty): {e}")
+            logger.debug("Could not read cart badge: %s", e)
             return 0
 
     def select_sort_option(self, option):
         """Select sort option from dropdown"""
-        logger.debug(f"Selecting sort option: {option}")
+        logger.debug("Selecting sort option: %s", option)
 
         try:
             # Find and select
-            dropdown = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located(self.SORT_DROPDOWN)
-            )
+            dropdown = self.wait_for(element_present(self.SORT_DROPDOWN), timeout=10)
 
             select = Select(dropdown)
+            previous_option = select.first_selected_option.get_attribute("value")
+            previous_names = [item.name for item in self.get_inventory_snapshot()]
             select.select_by_value(option)
-
-            # Wait for sort to apply
-            time.sleep(2)
+            self.invalidate_snapshot()
+
+            # Wait for sort to apply - a different option re-orders the list
+            if option != previous_option:
+                try:
+                    self.wait_for(
+                        list_order_changed(self.PRODUCT_NAMES, previous_names),
+                        timeout=self.SORT_TIMEOUT,
+                        description=f"sort by {option}",
+                    )
+                except TimeoutException:
+                    logger.warning("⚠️ Product order unchanged after sort: %s", option)
 
             # Verify (but this time, if it fails, we actually fail!)
             dropdown_new = self.find_element(self.SORT_DROPDOWN)
@@ -243,62 +482,41 @@ class ProductsPage(BasePage):
             if actual_value != option:
                 raise Exception(f"Sort failed! Expected {option}, got {actual_value}")
 
-            logger.info(f"✅ Successfully sorted by: {option}")
+            logger.info("✅ Successfully sorted by: %s", option)
             return True
 
         except Exception as e:
-            logger.error(f"❌ Failed to select sort option '{option}': {e}")
+            logger.error("❌ Failed to select sort option '%s': %s", option, e)
             return False
 
     def click_badge_count(self):
         """Click on shopping cart badge. Returns 0 if not successful"""
         try:
-            try:
-                body = self.driver.find_element(By.TAG_NAME, "body")
-                body.send_keys(Keys.ESCAPE)
-            except Exception as e:
-                logger.debug(f"No popup to dismiss: {e}")
-                pass
+            self.dismiss_modal()
             # Try to find visible badge (wait up to 5 seconds)
-            badge = WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located(self.SHOPPING_CART_BADGE)
-            )
+            badge = self.wait_for(element_present(self.SHOPPING_CART_BADGE), timeout=5)
             badge.click()
+            self.invalidate_snapshot(page_changed=True)
             logger.info("✅ Badge click successfully")
 
         except Exception as e:
             # Badge doesn't exist
-            logger.debug(f"❌ No badge found: {e}")
+            logger.debug("❌ No badge found: %s", e)
             return 0
 
     def click_button(self, button_id):
         f"""Click on {button_id}. Returns 0 if not successful"""
         try:
-            badge = None
-            # Try to find visible checkout button (wait up to 5 seconds)
-            if button_id == "checkout":
-                badge = WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located(self.CHECKOUT_BUTTON)
-                )
-            elif button_id == "continue":
-                badge = WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located(self.CHECKOUT_CONTINUE_BUTTON)
-                )
-            elif button_id == "finish":
-                badge = WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located(self.FINISH_BUTTON)
-                )
-            elif button_id == "back":
-                badge = WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located(self.BACK_HOME_BUTTON)
-                )
+            # Try to find visible button (wait up to 5 seconds)
+            badge = self.wait_for(element_present(self.BUTTONS[button_id]), timeout=5)
 
             badge.click()
-            logger.info(f"✅ {button_id} click successfully")
+            self.invalidate_snapshot(page_changed=True)
+            logger.info("✅ %s click successfully", button_id)
 
         except Exception as e:
             # Continue button not found
-            logger.debug(f"❌ No {button_id} button found: {e}")
+            logger.debug("❌ No %s button found: %s", button_id, e)
             return 0
 
     def enter_first_name(self, first_name="first_name"):
@@ -308,7 +526,7 @@ class ProductsPage(BasePage):
             self.send_keys(self.FIRST_NAME_INPUT, first_name)
         except Exception as e:
             # First name field not found
-            logger.debug(f"❌ No first name field found: {e}")
+            logger.debug("❌ No first name field found: %s", e)
             return 0
 
     def enter_last_name(self, last_name="last_name"):
@@ -318,7 +536,7 @@ class ProductsPage(BasePage):
             self.send_keys(self.LAST_NAME_INPUT, last_name)
         except Exception as e:
             # Last name field not found
-            logger.debug(f"❌ No last name field found: {e}")
+            logger.debug("❌ No last name field found: %s", e)
             return 0
 
     def enter_postal_code(self, postal_code="postal_code"):
@@ -328,5 +546,41 @@ class ProductsPage(BasePage):
             self.send_keys(self.POSTAL_CODE, postal_code)
         except Exception as e:
             # Postal code field not found
-            logger.debug(f"❌ No postal code field found: {e}")
+            logger.debug("❌ No postal code field found: %s", e)
             return 0
+
+    def open_cart(self):
+        """Open the cart through the cart badge and wait for the cart page"""
+        return self._run_checkout_macro(self.OPEN_CART_MACRO)
+
+    def start_checkout(self):
+        """Click Checkout on the cart page and wait for the information form"""
+        return self._run_checkout_macro(self.START_CHECKOUT_MACRO)
+
+    def fill_checkout_form_and_continue(self, first_name, last_name, postal_code):
+        """
+        Fill the checkout information form and continue to the overview
+
+        Returns:
+            bool: True once the overview page is shown
+        """
+        return self._run_checkout_macro(
+            self.CHECKOUT_FORM_MACRO,
+            first_name=first_name,
+            last_name=last_name,
+            postal_code=postal_code,
+        )
+
+    def finish_checkout(self):
+        """Click Finish on the overview and wait for the complete page"""
+        return self._run_checkout_macro(self.FINISH_CHECKOUT_MACRO)
+
+    def _run_checkout_macro(self, macro, **values):
+        try:
+            self.run_macro(macro, timeout=5, **values)
+            self.invalidate_snapshot(page_changed=True)
+            logger.info("✅ %s done", macro.name)
+            return True
+        except Exception as e:
+            logger.error("❌ Macro '%s' failed: %s", macro.name, e)
+            return False
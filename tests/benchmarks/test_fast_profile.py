@@ -0,0 +1,93 @@
+"""
+Fast Profile Benchmark
+Compares navigation times with and without --fast-profile
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+from urllib.parse import urljoin
+
+import pytest
+
+from config import config
+from config.config import BENCHMARK_DIR, BENCHMARK_ROUNDS, STANDARD_USER
+from pages.login_page import LoginPage
+from utils.driver_factory import create_driver
+
+logger = logging.getLogger(__name__)
+
+# Pages visited in every round, the session cookie is injected beforehand
+NAVIGATIONS = {
+    "login": "",
+    "inventory": "inventory.html",
+    "cart": "cart.html",
+    "checkout": "checkout-step-one.html",
+}
+
+
+def measure_navigations(driver, rounds):
+    """Seconds of every driver.get() per page, `rounds` samples each"""
+    samples = {name: [] for name in NAVIGATIONS}
+    for _ in range(rounds):
+        for name, path in NAVIGATIONS.items():
+            url = urljoin(config.BASE_URL, path)
+            start = time.perf_counter()
+            driver.get(url)
+            samples[name].append(time.perf_counter() - start)
+        driver.get("about:blank")
+    return samples
+
+
+@pytest.mark.benchmark
+def test_fast_profile_navigation_times(request):
+    """A/B: median navigation time per page with and without the fast profile"""
+    browser = request.config.getoption("--browser")
+    headless = request.config.getoption("--headless")
+    results = {}
+
+    for profile, fast in (("default", False), ("fast", True)):
+        driver = create_driver(browser, headless=headless, fast=fast)
+        try:
+            LoginPage(driver).inject_session(STANDARD_USER["username"])
+            # Warm up connections and caches, only the rounds are measured
+            measure_navigations(driver, rounds=1)
+            samples = measure_navigations(driver, rounds=BENCHMARK_ROUNDS)
+
+            driver.get(urljoin(config.BASE_URL, "inventory.html"))
+            images_loaded = driver.execute_script(
+                "return Array.prototype.filter.call(document.images, "
+                "function (i) { return i.naturalWidth > 0; }).length;"
+            )
+        finally:
+            driver.quit()
+
+        results[profile] = {
+            "images_loaded": images_loaded,
+            "median_seconds": {
+                name: round(statistics.median(values), 4)
+                for name, values in samples.items()
+            },
+        }
+
+    for name in NAVIGATIONS:
+        default = results["default"]["median_seconds"][name]
+        fast = results["fast"]["median_seconds"][name]
+        logger.info(
+            f"{name:10s} default {default * 1000:8.1f} ms  fast {fast * 1000:8.1f} ms  "
+            f"({(fast - default) / default:+.0%})"
+        )
+
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    with open(os.path.join(BENCHMARK_DIR, "fast_profile.json"), "w") as f:
+        json.dump(
+            {"browser": browser, "rounds": BENCHMARK_ROUNDS, "results": results},
+            f,
+            indent=2,
+        )
+
+    assert (
+        results["fast"]["images_loaded"] == 0
+    ), "Fast profile should not load any images"
@@ -0,0 +1,111 @@
+"""
+Logging Overhead Benchmark
+Cost of page object logging per call: live formatted output vs the per-test
+ring buffer vs logging turned off
+"""
+
+import io
+import json
+import logging
+import os
+import statistics
+import time
+
+import pytest
+
+from config.config import BENCHMARK_DIR
+from pages import page_base
+from pages.products_page import ProductsPage
+from utils.local_shop import PRODUCTS
+from utils.log_buffer import LOG_FORMAT, RingBufferHandler
+
+logger = logging.getLogger(__name__)
+
+CALLS = 2000
+REPEATS = 5
+
+
+class SnapshotDriver:
+    """Answers the inventory snapshot script without a browser"""
+
+    def __init__(self):
+        self.rows = [
+            [
+                product["name"],
+                f"${product['price']}",
+                product["desc"],
+                f"/static/media/{product['image']}.svg",
+                "add-to-cart-x",
+                "Add to cart",
+            ]
+            for product in PRODUCTS
+        ]
+
+    def execute_script(self, script, *args):
+        return self.rows
+
+
+def time_calls(page):
+    """Median microseconds of one uncached get_product_names() call"""
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            page.invalidate_snapshot()
+            page.get_product_names()
+        samples.append((time.perf_counter() - start) / CALLS * 1_000_000)
+    return statistics.median(samples)
+
+
+@pytest.mark.benchmark
+def test_logging_overhead_per_page_object_call():
+    """Ring buffer logging must be cheaper than formatting every record"""
+    page = ProductsPage(SnapshotDriver())
+    root_logger = logging.getLogger()
+    original_level = root_logger.level
+    waits_before = len(page_base.WAIT_TIMINGS)
+
+    eager = logging.StreamHandler(io.StringIO())
+    eager.setFormatter(logging.Formatter(LOG_FORMAT))
+    setups = {
+        "disabled": (logging.WARNING, None),
+        "eager": (logging.INFO, eager),
+        "ring_buffer": (logging.INFO, RingBufferHandler()),
+    }
+
+    results = {}
+    try:
+        for name, (level, handler) in setups.items():
+            root_logger.setLevel(level)
+            if handler is not None:
+                root_logger.addHandler(handler)
+            try:
+                results[name] = round(time_calls(page), 2)
+            finally:
+                if handler is not None:
+                    root_logger.removeHandler(handler)
+    finally:
+        root_logger.setLevel(original_level)
+        del page_base.WAIT_TIMINGS[waits_before:]
+
+    overhead = {
+        name: round(results[name] - results["disabled"], 2)
+        for name in ("eager", "ring_buffer")
+    }
+    logger.info(
+        f"get_product_names(): {results['disabled']:.1f} us without logging, "
+        f"+{overhead['eager']:.1f} us eager, +{overhead['ring_buffer']:.1f} us "
+        f"ring buffer"
+    )
+
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    with open(os.path.join(BENCHMARK_DIR, "logging_overhead.json"), "w") as f:
+        json.dump(
+            {"calls": CALLS, "microseconds_per_call": results, "overhead": overhead},
+            f,
+            indent=2,
+        )
+
+    assert (
+        results["ring_buffer"] < results["eager"]
+    ), f"Ring buffer should be cheaper than eager logging: {results}"
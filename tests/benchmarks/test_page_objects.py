@@ -0,0 +1,499 @@
+"""
+Page Object Benchmarks
+Times the public page object methods against the site under test (the local
+shop by default), with WebDriver round trips per call, and fails when a method
+got slower than its stored baseline
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import pytest
+
+from config.config import (
+    BENCHMARK_BASELINE_FILE,
+    BENCHMARK_DIR,
+    BENCHMARK_NOISE_FLOOR_MS,
+    BENCHMARK_TOLERANCE,
+    PAGE_BENCHMARK_ROUNDS,
+    STANDARD_USER,
+)
+from pages.login_page import LoginPage
+from pages.page_base import BasePage
+from pages.products_page import ProductsPage
+from utils.driver_factory import create_driver
+from utils.instrumentation import CommandRecorder
+from utils.metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """A page object method: setup(driver) returns the page, call(page) is timed"""
+
+    name: str
+    setup: Callable
+    call: Callable
+
+
+def fresh_login_page(driver):
+    """Login page without session or cart"""
+    page = LoginPage(driver)
+    page.open()
+    driver.delete_all_cookies()
+    driver.execute_script("window.localStorage.clear();")
+    return page
+
+
+def login_page_with_error(driver):
+    """Login page showing the error of a failed login"""
+    page = fresh_login_page(driver)
+    page.login("invalid_user", "invalid_password")
+    return page
+
+
+def fresh_products_page(driver):
+    """Products page of standard_user with an empty cart"""
+    LoginPage(driver).inject_session(STANDARD_USER["username"])
+    page = ProductsPage(driver)
+    page.open()
+    driver.execute_script("window.localStorage.clear();")
+    page.refresh_page()
+    return page
+
+
+def products_page_with_cart(driver):
+    """Products page of standard_user with one product in the cart"""
+    page = fresh_products_page(driver)
+    page.add_products_to_cart(["Sauce Labs Backpack"])
+    return page
+
+
+def cart_page(driver):
+    """Cart page with one product"""
+    page = products_page_with_cart(driver)
+    page.open_cart()
+    return page
+
+
+def checkout_information_page(driver):
+    """Empty checkout information form"""
+    page = cart_page(driver)
+    page.start_checkout()
+    return page
+
+
+def checkout_overview_page(driver):
+    """Checkout overview of one product"""
+    page = checkout_information_page(driver)
+    page.fill_checkout_form_and_continue("First", "Last", "12345")
+    return page
+
+
+def checkout_complete_page(driver):
+    """Checkout complete page"""
+    page = checkout_overview_page(driver)
+    page.finish_checkout()
+    return page
+
+
+BENCHMARKS = [
+    # BasePage
+    Benchmark(
+        "BasePage.invalidate_element_cache",
+        fresh_products_page,
+        lambda page: page.invalidate_element_cache(),
+    ),
+    Benchmark(
+        "BasePage.count_now",
+        fresh_products_page,
+        lambda page: page.count_now(ProductsPage.PRODUCT_NAMES),
+    ),
+    Benchmark(
+        "BasePage.is_absent",
+        fresh_products_page,
+        lambda page: page.is_absent(ProductsPage.SHOPPING_CART_BADGE),
+    ),
+    Benchmark(
+        "BasePage.wait_until_gone",
+        fresh_products_page,
+        lambda page: page.wait_until_gone(ProductsPage.SHOPPING_CART_BADGE),
+    ),
+    Benchmark(
+        "BasePage.get_texts_now",
+        fresh_products_page,
+        lambda page: page.get_texts_now(ProductsPage.PRODUCT_NAMES),
+    ),
+    Benchmark(
+        "BasePage.dismiss_modal",
+        fresh_products_page,
+        lambda page: page.dismiss_modal(),
+    ),
+    Benchmark(
+        "BasePage.find_element",
+        fresh_products_page,
+        lambda page: page.find_element(ProductsPage.INVENTORY_CONTAINER),
+    ),
+    Benchmark(
+        "BasePage.find_elements",
+        fresh_products_page,
+        lambda page: page.find_elements(ProductsPage.PRODUCT_NAMES),
+    ),
+    Benchmark(
+        "BasePage.click",
+        fresh_products_page,
+        lambda page: page.click(ProductsPage.INVENTORY_CONTAINER),
+    ),
+    Benchmark(
+        "BasePage.send_keys",
+        fresh_login_page,
+        lambda page: page.send_keys(LoginPage.USERNAME_INPUT, "standard_user"),
+    ),
+    Benchmark(
+        "BasePage.get_text",
+        fresh_products_page,
+        lambda page: page.get_text(ProductsPage.PRODUCT_NAMES),
+    ),
+    Benchmark(
+        "BasePage.is_visible",
+        fresh_products_page,
+        lambda page: page.is_visible(ProductsPage.INVENTORY_CONTAINER),
+    ),
+    Benchmark(
+        "BasePage.is_present",
+        fresh_products_page,
+        lambda page: page.is_present(ProductsPage.INVENTORY_CONTAINER),
+    ),
+    Benchmark(
+        "BasePage.get_current_url",
+        fresh_products_page,
+        lambda page: page.get_current_url(),
+    ),
+    Benchmark("BasePage.get_title", fresh_products_page, lambda page: page.get_title()),
+    Benchmark(
+        "BasePage.refresh_page", fresh_login_page, lambda page: page.refresh_page()
+    ),
+    Benchmark(
+        "BasePage.scroll_to_element",
+        fresh_products_page,
+        lambda page: page.scroll_to_element(ProductsPage.PRODUCT_NAMES),
+    ),
+    # LoginPage
+    Benchmark("LoginPage.open", fresh_login_page, lambda page: page.open()),
+    Benchmark(
+        "LoginPage.inject_session",
+        fresh_login_page,
+        lambda page: page.inject_session(STANDARD_USER["username"]),
+    ),
+    Benchmark(
+        "LoginPage.enter_username",
+        fresh_login_page,
+        lambda page: page.enter_username(STANDARD_USER["username"]),
+    ),
+    Benchmark(
+        "LoginPage.enter_password",
+        fresh_login_page,
+        lambda page: page.enter_password(STANDARD_USER["password"]),
+    ),
+    Benchmark(
+        "LoginPage.click_login_button",
+        fresh_login_page,
+        lambda page: page.click_login_button(),
+    ),
+    Benchmark(
+        "LoginPage.login",
+        fresh_login_page,
+        lambda page: page.login(STANDARD_USER["username"], STANDARD_USER["password"]),
+    ),
+    Benchmark(
+        "LoginPage.get_error_message",
+        login_page_with_error,
+        lambda page: page.get_error_message(),
+    ),
+    Benchmark(
+        "LoginPage.is_error_displayed",
+        login_page_with_error,
+        lambda page: page.is_error_displayed(),
+    ),
+    Benchmark(
+        "LoginPage.is_error_absent",
+        fresh_login_page,
+        lambda page: page.is_error_absent(),
+    ),
+    Benchmark(
+        "LoginPage.clear_error", login_page_with_error, lambda page: page.clear_error()
+    ),
+    # ProductsPage
+    Benchmark("ProductsPage.open", fresh_products_page, lambda page: page.open()),
+    Benchmark(
+        "ProductsPage.get_inventory_snapshot",
+        fresh_products_page,
+        lambda page: page.get_inventory_snapshot(),
+    ),
+    Benchmark(
+        "ProductsPage.invalidate_snapshot",
+        fresh_products_page,
+        lambda page: page.invalidate_snapshot(),
+    ),
+    Benchmark(
+        "ProductsPage.refresh_page",
+        fresh_products_page,
+        lambda page: page.refresh_page(),
+    ),
+    Benchmark(
+        "ProductsPage.is_loaded", fresh_products_page, lambda page: page.is_loaded()
+    ),
+    Benchmark(
+        "ProductsPage.checkout_complete_is_loaded",
+        checkout_complete_page,
+        lambda page: page.checkout_complete_is_loaded(),
+    ),
+    Benchmark(
+        "ProductsPage.get_product_count",
+        fresh_products_page,
+        lambda page: page.get_product_count(),
+    ),
+    Benchmark(
+        "ProductsPage.get_product_names",
+        fresh_products_page,
+        lambda page: page.get_product_names(),
+    ),
+    Benchmark(
+        "ProductsPage.get_product_prices",
+        fresh_products_page,
+        lambda page: page.get_product_prices(),
+    ),
+    Benchmark(
+        "ProductsPage.get_product_image_sources",
+        fresh_products_page,
+        lambda page: page.get_product_image_sources(),
+    ),
+    Benchmark(
+        "ProductsPage.get_loaded_image_count",
+        fresh_products_page,
+        lambda page: page.get_loaded_image_count(),
+    ),
+    Benchmark(
+        "ProductsPage.add_product_to_cart_by_name",
+        fresh_products_page,
+        lambda page: page.add_product_to_cart_by_name("Sauce Labs Backpack"),
+    ),
+    Benchmark(
+        "ProductsPage.add_products_to_cart",
+        fresh_products_page,
+        lambda page: page.add_products_to_cart(
+            ["Sauce Labs Backpack", "Sauce Labs Bike Light", "Sauce Labs Onesie"]
+        ),
+    ),
+    Benchmark(
+        "ProductsPage.get_cart_badge_count",
+        products_page_with_cart,
+        lambda page: page.get_cart_badge_count(),
+    ),
+    Benchmark(
+        "ProductsPage.select_sort_option",
+        fresh_products_page,
+        lambda page: page.select_sort_option("lohi"),
+    ),
+    Benchmark(
+        "ProductsPage.click_badge_count",
+        products_page_with_cart,
+        lambda page: page.click_badge_count(),
+    ),
+    Benchmark(
+        "ProductsPage.click_button",
+        cart_page,
+        lambda page: page.click_button("checkout"),
+    ),
+    Benchmark(
+        "ProductsPage.enter_first_name",
+        checkout_information_page,
+        lambda page: page.enter_first_name("First"),
+    ),
+    Benchmark(
+        "ProductsPage.enter_last_name",
+        checkout_information_page,
+        lambda page: page.enter_last_name("Last"),
+    ),
+    Benchmark(
+        "ProductsPage.enter_postal_code",
+        checkout_information_page,
+        lambda page: page.enter_postal_code("12345"),
+    ),
+    Benchmark(
+        "ProductsPage.open_cart",
+        products_page_with_cart,
+        lambda page: page.open_cart(),
+    ),
+    Benchmark(
+        "ProductsPage.start_checkout", cart_page, lambda page: page.start_checkout()
+    ),
+    Benchmark(
+        "ProductsPage.fill_checkout_form_and_continue",
+        checkout_information_page,
+        lambda page: page.fill_checkout_form_and_continue("First", "Last", "12345"),
+    ),
+    Benchmark(
+        "ProductsPage.finish_checkout",
+        checkout_overview_page,
+        lambda page: page.finish_checkout(),
+    ),
+]
+
+# Public methods without a benchmark of their own
+NOT_BENCHMARKED = {
+    "BasePage.wait_for": "generic wait, timed inside every method that waits",
+    "BasePage.implicit_wait_disabled": "context manager, used by the *_now methods",
+    "BasePage.run_macro": "timed through the checkout methods built on it",
+}
+
+
+def public_methods():
+    """Class.method names of the public API of the page objects"""
+    return {
+        f"{cls.__name__}.{name}"
+        for cls in (BasePage, LoginPage, ProductsPage)
+        for name, value in vars(cls).items()
+        if callable(value) and not name.startswith("_")
+    }
+
+
+def load_baselines():
+    try:
+        with open(BENCHMARK_BASELINE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def run_benchmark(benchmark, driver, rounds):
+    """
+    Time rounds calls (after one warm-up call), each on a freshly set up page
+
+    Returns:
+        dict: median/p90/min/max milliseconds and median round trips
+    """
+    samples = []
+    round_trips = []
+    for _ in range(rounds + 1):
+        page = benchmark.setup(driver)
+        recorder = CommandRecorder()
+        recorder.attach(driver)
+        try:
+            start = time.perf_counter()
+            benchmark.call(page)
+            samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            recorder.detach()
+        round_trips.append(len(recorder.records))
+
+    samples, round_trips = samples[1:], round_trips[1:]
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "p90_ms": round(percentile(samples, 90), 2),
+        "min_ms": round(min(samples), 2),
+        "max_ms": round(max(samples), 2),
+        "round_trips": statistics.median(round_trips),
+    }
+
+
+def regressions(result, baseline, tolerance=BENCHMARK_TOLERANCE):
+    """
+    Metrics of result worse than baseline by more than tolerance
+
+    Times also have to exceed the baseline by BENCHMARK_NOISE_FLOOR_MS and
+    round trips by at least one, so fast methods do not fail on jitter.
+    """
+    found = []
+    median = baseline["median_ms"]
+    if result["median_ms"] > max(
+        median * (1 + tolerance), median + BENCHMARK_NOISE_FLOOR_MS
+    ):
+        found.append(f"median {result['median_ms']:.1f} ms > baseline {median:.1f} ms")
+    trips = baseline["round_trips"]
+    if result["round_trips"] > max(trips * (1 + tolerance), trips + 1):
+        found.append(f"round trips {result['round_trips']} > baseline {trips}")
+    return found
+
+
+@pytest.fixture(scope="module")
+def benchmark_driver(request):
+    """One browser for all page object benchmarks"""
+    driver = create_driver(
+        request.config.getoption("--browser"),
+        headless=request.config.getoption("--headless"),
+        offline=request.config.getoption("--driver-offline"),
+    )
+    yield driver
+    driver.quit()
+
+
+@pytest.fixture(scope="module")
+def benchmark_results(request):
+    """
+    Results of this module, written to BENCHMARK_DIR and, with
+    --update-baselines, merged into the baseline file
+    """
+    results = {}
+
+    yield results
+
+    if not results:
+        return
+    browser = request.config.getoption("--browser")
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    with open(os.path.join(BENCHMARK_DIR, "page_objects.json"), "w") as f:
+        json.dump(
+            {"browser": browser, "rounds": PAGE_BENCHMARK_ROUNDS, "results": results},
+            f,
+            indent=2,
+        )
+
+    if request.config.getoption("--update-baselines"):
+        baselines = load_baselines()
+        baselines.setdefault(browser, {}).update(results)
+        with open(BENCHMARK_BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        logger.info(f"Updated {len(results)} baselines in {BENCHMARK_BASELINE_FILE}")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("benchmark", BENCHMARKS, ids=lambda b: b.name)
+def test_page_object_method(benchmark, benchmark_driver, benchmark_results, request):
+    """Test that a page object method is not slower than its baseline"""
+    result = run_benchmark(benchmark, benchmark_driver, PAGE_BENCHMARK_ROUNDS)
+    benchmark_results[benchmark.name] = result
+    logger.info(
+        f"{benchmark.name}: median {result['median_ms']:.1f} ms, "
+        f"p90 {result['p90_ms']:.1f} ms, {result['round_trips']} round trips"
+    )
+
+    if request.config.getoption("--update-baselines"):
+        return
+    browser = request.config.getoption("--browser")
+    baseline = load_baselines().get(browser, {}).get(benchmark.name)
+    if baseline is None:
+        message = (
+            f"No {browser} baseline for {benchmark.name} in "
+            f"{BENCHMARK_BASELINE_FILE}, record one with --update-baselines"
+        )
+        if request.config.getoption("--require-baselines"):
+            pytest.fail(message)
+        pytest.skip(message)
+
+    found = regressions(result, baseline)
+    assert not found, f"{benchmark.name} regressed: {'; '.join(found)}"
+
+
+def test_every_public_method_has_a_benchmark():
+    """Test that new page object methods get a benchmark (or a reason why not)"""
+    benchmarked = {benchmark.name for benchmark in BENCHMARKS}
+    missing = public_methods() - benchmarked - set(NOT_BENCHMARKED)
+    assert not missing, f"Page object methods without a benchmark: {sorted(missing)}"
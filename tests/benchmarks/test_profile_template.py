@@ -0,0 +1,113 @@
+"""
+Profile Template Benchmark
+Compares browser cold starts on a copy of the profile template with the
+default incognito launch
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+
+import pytest
+
+from config import config
+from config.config import BENCHMARK_DIR, BENCHMARK_ROUNDS
+from utils.driver_factory import create_driver
+from utils.profile_template import ProfileTemplate
+
+logger = logging.getLogger(__name__)
+
+
+def measure_cold_starts(launch, rounds):
+    """
+    Start rounds browsers with launch(), each loading the login page once
+
+    Returns:
+        dict: Median seconds to a ready browser and to the loaded first
+            page, and the state the first page found (cookies, storage)
+    """
+    launches = []
+    first_pages = []
+    leftovers = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        driver = launch()
+        launched = time.perf_counter()
+        try:
+            driver.get(config.BASE_URL)
+            first_pages.append(time.perf_counter() - start)
+            launches.append(launched - start)
+            leftovers.append(
+                len(driver.get_cookies())
+                + driver.execute_script("return window.localStorage.length;")
+            )
+        finally:
+            driver.quit()
+    return {
+        "median_launch_seconds": round(statistics.median(launches), 4),
+        "median_first_page_seconds": round(statistics.median(first_pages), 4),
+        "leftover_state": max(leftovers),
+    }
+
+
+@pytest.mark.benchmark
+def test_profile_template_cold_start(request):
+    """Cold start on a template copy vs incognito, and the one-off preparation"""
+    browser = request.config.getoption("--browser")
+    headless = request.config.getoption("--headless")
+    template = ProfileTemplate(
+        factory=lambda browser, **options: create_driver(
+            browser, headless=headless, **options
+        )
+    )
+    try:
+        template.prepare(browser)
+        results = {
+            "incognito": measure_cold_starts(
+                lambda: create_driver(browser, headless=headless), BENCHMARK_ROUNDS
+            ),
+            "template": measure_cold_starts(
+                lambda: template.launch(browser), BENCHMARK_ROUNDS
+            ),
+        }
+    finally:
+        template.close()
+
+    prepare_seconds = template.stats["prepare_seconds"]
+    saving = (
+        results["incognito"]["median_first_page_seconds"]
+        - results["template"]["median_first_page_seconds"]
+    )
+    for name, result in results.items():
+        logger.info(
+            f"{name:10s} launch {result['median_launch_seconds'] * 1000:8.1f} ms  "
+            f"first page {result['median_first_page_seconds'] * 1000:8.1f} ms"
+        )
+    logger.info(
+        f"Template prepared in {prepare_seconds:.2f}s, saving {saving * 1000:.1f} ms "
+        f"per browser"
+    )
+    if saving > 0:
+        logger.info(
+            f"Preparation pays off after {prepare_seconds / saving:.0f} browsers"
+        )
+
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    with open(os.path.join(BENCHMARK_DIR, "profile_template.json"), "w") as f:
+        json.dump(
+            {
+                "browser": browser,
+                "rounds": BENCHMARK_ROUNDS,
+                "prepare_seconds": round(prepare_seconds, 4),
+                "saving_seconds": round(saving, 4),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+    assert (
+        results["template"]["leftover_state"] == 0
+    ), "Template copies should start without cookies or local storage"
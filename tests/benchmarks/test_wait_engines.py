@@ -0,0 +1,125 @@
+"""
+Wait Engine Benchmark
+Compares how fast BasePage.wait_for() reacts to a DOM change, and how many
+WebDriver commands it sends, with the observer engine and with polling
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+
+import pytest
+from selenium.webdriver.common.by import By
+
+from config import config
+from config.config import (
+    BENCHMARK_DIR,
+    BENCHMARK_ROUNDS,
+    STANDARD_USER,
+    WAIT_POLL_FREQUENCY,
+)
+from pages import page_base
+from pages.login_page import LoginPage
+from pages.page_base import element_shown
+from pages.products_page import ProductsPage
+from utils.driver_factory import create_driver
+from utils.instrumentation import CommandRecorder
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds after which the page inserts the awaited element
+CHANGE_DELAY_MS = 700
+
+# Engine name: (config.WAIT_ENGINE, poll interval in seconds)
+ENGINES = {
+    "observer": ("observer", WAIT_POLL_FREQUENCY),
+    "poll": ("poll", WAIT_POLL_FREQUENCY),
+    "poll-0.5s": ("poll", 0.5),
+}
+
+SCHEDULE_CHANGE_SCRIPT = """
+var old = document.getElementById("late");
+if (old) {
+    old.remove();
+}
+setTimeout(function () {
+    var el = document.createElement("div");
+    el.id = "late";
+    el.textContent = "late";
+    document.body.appendChild(el);
+}, arguments[0]);
+"""
+
+
+def measure_reactions(page, rounds):
+    """
+    Wait for a scheduled DOM change rounds times
+
+    Returns:
+        dict: median/max reaction latency (ms after the change) and median
+            WebDriver commands per wait
+    """
+    latencies = []
+    commands = []
+    for _ in range(rounds):
+        page.driver.execute_script(SCHEDULE_CHANGE_SCRIPT, CHANGE_DELAY_MS)
+        start = time.perf_counter()
+        recorder = CommandRecorder()
+        recorder.attach(page.driver)
+        try:
+            page.wait_for(element_shown((By.ID, "late")), timeout=5)
+        finally:
+            recorder.detach()
+        latencies.append((time.perf_counter() - start) * 1000 - CHANGE_DELAY_MS)
+        commands.append(len(recorder.records))
+    return {
+        "median_latency_ms": round(statistics.median(latencies), 2),
+        "max_latency_ms": round(max(latencies), 2),
+        "commands": statistics.median(commands),
+    }
+
+
+@pytest.mark.benchmark
+def test_wait_engine_reaction(request, monkeypatch):
+    """Observer vs polling: reaction latency and commands per wait"""
+    browser = request.config.getoption("--browser")
+    driver = create_driver(browser, headless=request.config.getoption("--headless"))
+    results = {}
+    try:
+        LoginPage(driver).inject_session(STANDARD_USER["username"])
+        page = ProductsPage(driver)
+        page.open()
+
+        for name, (engine, poll_frequency) in ENGINES.items():
+            monkeypatch.setattr(config, "WAIT_ENGINE", engine)
+            monkeypatch.setattr(page_base, "WAIT_POLL_FREQUENCY", poll_frequency)
+            # Warm up, only the rounds are measured
+            measure_reactions(page, rounds=1)
+            results[name] = measure_reactions(page, rounds=BENCHMARK_ROUNDS)
+    finally:
+        driver.quit()
+
+    for name, result in results.items():
+        logger.info(
+            f"{name:10s} latency median {result['median_latency_ms']:7.1f} ms, "
+            f"max {result['max_latency_ms']:7.1f} ms, {result['commands']} commands"
+        )
+
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    with open(os.path.join(BENCHMARK_DIR, "wait_engines.json"), "w") as f:
+        json.dump(
+            {
+                "browser": browser,
+                "rounds": BENCHMARK_ROUNDS,
+                "change_delay_ms": CHANGE_DELAY_MS,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+    assert (
+        results["observer"]["commands"] < results["poll"]["commands"]
+    ), "Observer engine should need fewer WebDriver commands than polling"
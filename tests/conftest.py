@@ -3,124 +3,678 @@ Pytest configuration and fixtures
 """
 
 import pytest
+import base64
+import html
+import json
 import logging
 import os
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
+import time
+import warnings
+from contextlib import ExitStack
+from _pytest.runner import runtestprotocol
+from selenium.common.exceptions import InvalidSessionIdException
+from utils import driver_cache
+from utils.artifacts import ArtifactWriter
+from utils.browser_launcher import BrowserLauncher
+from utils.driver_factory import create_driver
+from utils.driver_pool import DriverPool
+from utils import engine_matrix
+from utils import impact_map
+from utils.instrumentation import CommandRecorder, dump_jsonl, summary_html
+from utils.local_shop import LocalShop
+from utils.metrics import add_counts
+from utils.log_buffer import LOG_FORMAT, RingBufferHandler
+from utils import page_timing
+from utils import parallel
+from utils.profile_template import ProfileTemplate
+from utils import test_history
+from pages import page_base
+from pages.login_page import LoginPage
+from pages.products_page import ProductsPage
+from config import config as settings
 from config.config import (
     DEFAULT_BROWSER,
-    IMPLICIT_WAIT,
-    WINDOW_WIDTH,
-    WINDOW_HEIGHT,
-    SCREENSHOT_ON_FAILURE,
-    SCREENSHOT_DIR,
+    DRIVER_ISOLATION,
+    DRIVER_OFFLINE,
+    ELEMENT_CACHE,
+    ENGINE_LIMITS,
+    ENGINE_REPORT_FILE,
+    FLAKE_THRESHOLD,
+    MACRO_MODE,
+    WAIT_ENGINE,
+    FAST_PROFILE,
+    IMPACT_MAP_FILE,
+    POOL_RECYCLE_AFTER,
+    PREWARM_BROWSERS,
+    PROFILE_TEMPLATE,
+    RERUNS,
+    ARTIFACTS_ON_FAILURE,
+    ARTIFACT_DIR,
+    INSTRUMENT_FILE,
+    LOG_BUFFER_LEVEL,
+    PERFORMANCE_COMPARISON_FILE,
+    PERFORMANCE_GLITCH_USER,
+    PERFORMANCE_TREND_FILE,
+    STANDARD_USER,
+    TARGET,
+    TEST_HISTORY_FILE,
+    WORKER_LOG_DIR,
 )
 
+try:
+    from pytest_html import extras as html_extras
+except ImportError:  # HTML report plugin not installed
+    html_extras = None
+
 logger = logging.getLogger(__name__)
 
+# Duration and outcome of every test in this run, keyed by node id
+_run_results = {}
 
-def get_chrome_options(headless=False):
-    """Configure Chrome options"""
-    options = webdriver.ChromeOptions()
+# Per-engine timing of a --browsers run
+_engine_report = engine_matrix.EngineReport()
 
-    if headless:
-        options.add_argument("--headless=new")
+# Page object symbols used per test with --record-impact, keyed by node id
+_impact_symbols = {}
 
-    # Basic args
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--start-maximized")
-    options.add_argument("--incognito")
-    options.add_argument("--disable-save-password-bubble")
+# Journey timings of the performance tests of this run, see write_trend()
+_performance_runs = []
 
-    # Disable automation
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option("useAutomationExtension", False)
+# Reruns needed by tests of this run, keyed by node id
+_reruns = {}
 
-    # Disable everything
-    prefs = {
-        "credentials_enable_service": False,
-        "profile.password_manager_enabled": False,
-        "profile.default_content_setting_values.notifications": 2,
-        "autofill.profile_enabled": False,
-    }
-    options.add_experimental_option("prefs", prefs)
+# Counters the session fixtures leave on the config, sent by xdist workers
+# to the controller and added up there
+FIXTURE_STATS = ("launcher_stats", "profile_template_stats", "artifact_stats")
 
-    return options
+# Markers of tests that are never rerun, a retry would hide a slowdown
+NO_RERUN_MARKERS = ("performance", "benchmark")
 
+# Item attributes set during one attempt of a test, cleared before a rerun
+ATTEMPT_ATTRIBUTES = (
+    "command_summary",
+    "driver_crashed",
+    "failure_screenshot",
+    "log_flushed",
+    "rep_setup",
+    "rep_call",
+    "rep_teardown",
+)
 
-def get_firefox_options(headless=False):
-    """Configure Firefox options"""
-    options = webdriver.FirefoxOptions()
 
-    if headless:
-        options.add_argument("--headless")
-        logger.info("Running Firefox in headless mode")
+def selected_browsers(config):
+    """Browsers of this run: --browsers when given, otherwise --browser"""
+    browsers = config.getoption("--browsers")
+    if browsers:
+        return engine_matrix.parse_browsers(browsers)
+    return [config.getoption("--browser")]
 
-    return options
 
+def pytest_configure(config):
+    """Apply command line switches that page objects read from config"""
+    settings.ELEMENT_CACHE = config.getoption("--element-cache")
+    settings.MACRO_MODE = config.getoption("--macro-mode")
+    settings.WAIT_ENGINE = config.getoption("--wait-engine")
+    root_logger = logging.getLogger()
 
-@pytest.fixture(scope="function")
-def driver(request):
+    # Unless logs are streamed live, records are only kept in memory and
+    # formatted for failed tests
+    live_logging = config.getoption("--log-cli-level") is not None or config.getini(
+        "log_cli"
+    )
+    config.log_buffer = None
+    if not live_logging:
+        config.log_buffer = RingBufferHandler(level=LOG_BUFFER_LEVEL)
+        root_logger.addHandler(config.log_buffer)
+        root_logger.setLevel(config.log_buffer.level)
+
+    # xdist workers do not stream live logs, each one gets its own log file
+    # with warnings and errors
+    if parallel.is_worker():
+        os.makedirs(WORKER_LOG_DIR, exist_ok=True)
+        handler = logging.FileHandler(
+            os.path.join(WORKER_LOG_DIR, f"{parallel.worker_id()}.log"), mode="w"
+        )
+        handler.setLevel(logging.WARNING)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root_logger.addHandler(handler)
+
+    try:
+        config.engine_limits = engine_matrix.parse_limits(
+            config.getoption("--engine-limits")
+        )
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+
+    # Probes on the page object constants are installed before any test runs
+    config.impact_recorder = None
+    if config.getoption("--record-impact"):
+        config.impact_recorder = impact_map.ImpactRecorder().install()
+
+    config.test_history = test_history.TestHistory.load(
+        config.getoption("--history-file")
+    )
+
+    # Tests flaky in too many recent runs, by flake rate
+    config.quarantined = {}
+    if config.getoption("--quarantine") != "off":
+        config.quarantined = config.test_history.flaky_tests(
+            config.getoption("--flake-threshold")
+        )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_auto_num_workers(config):
     """
-    Setup and teardown for WebDriver
-    Scope: function - new browser instance for each test
+    Worker count for -n auto
+    Sized by CPU cores and by how many browsers fit into the available memory,
+    for --browsers by the engine with the largest footprint
+    """
+    return min(
+        parallel.recommended_workers(browser) for browser in selected_browsers(config)
+    )
+
+
+def pytest_generate_tests(metafunc):
+    """
+    With --browsers every test using a browser runs once per engine
+    The tests of all engines are collected together, so xdist runs them
+    side by side
     """
-    browser = request.config.getoption("--browser", default=DEFAULT_BROWSER)
-    headless = request.config.getoption("--headless")
+    if metafunc.config.getoption("--browsers") and (
+        "browser_name" in metafunc.fixturenames
+    ):
+        metafunc.parametrize(
+            "browser_name", selected_browsers(metafunc.config), indirect=True
+        )
 
-    logger.info(f"Initializing {browser} browser (headless={headless})")
 
-    # Initialize driver based on browser choice
-    if browser.lower() == "chrome":
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(
-            service=service, options=get_chrome_options(headless=headless)
+def pytest_collection_modifyitems(config, items):
+    """
+    Skip benchmarks unless --run-benchmarks, quarantine flaky tests, keep
+    only the tests affected by --impact-select and the tests of --shard, then
+    apply --order
+    Quarantine, sharding and ordering use the test history
+    """
+    if not config.getoption("--run-benchmarks"):
+        skip_benchmark = pytest.mark.skip(reason="benchmark, use --run-benchmarks")
+        for item in items:
+            if item.get_closest_marker("benchmark"):
+                item.add_marker(skip_benchmark)
+
+    # Quarantined tests run in a non-blocking bucket (or not at all)
+    quarantine = config.getoption("--quarantine")
+    for item in items:
+        rate = config.quarantined.get(item.nodeid)
+        if rate is None:
+            continue
+        reason = f"quarantined, needed a rerun in {rate:.0%} of recent runs"
+        item.add_marker(pytest.mark.quarantine)
+        if quarantine == "skip":
+            item.add_marker(pytest.mark.skip(reason=reason))
+        else:
+            item.add_marker(pytest.mark.xfail(reason=reason, strict=False))
+
+    base = config.getoption("--impact-select")
+    if base:
+        select_impacted(config, items, base)
+
+    history = config.test_history
+
+    shard = config.getoption("--shard")
+    if shard:
+        try:
+            index, count = test_history.parse_shard(shard)
+        except ValueError as e:
+            raise pytest.UsageError(str(e))
+
+        shards = test_history.balance_shards(items, count, history)
+        selected = shards[index - 1]
+        selected_ids = {item.nodeid for item in selected}
+        deselected = [item for item in items if item.nodeid not in selected_ids]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+        loads = ", ".join(
+            f"{test_history.expected_total(s, history):.1f}s" for s in shards
         )
-    elif browser.lower() == "firefox":
-        service = FirefoxService(GeckoDriverManager().install())
-        driver = webdriver.Firefox(
-            service=service, options=get_firefox_options(headless=headless)
+        logger.info(f"Shard {index}/{count}: {len(selected)} tests, loads {loads}")
+
+    # With xdist the scheduler hands tests out in this order, so the longest
+    # tests start first and short ones fill the gaps at the end
+    if config.getoption("--order") == "longest-first":
+        items[:] = test_history.sorted_longest_first(items, history)
+
+
+def select_impacted(config, items, base):
+    """Keep only the tests the impact map links to the changes since base"""
+    mapping = impact_map.ImpactMap.load(config.getoption("--impact-map"))
+    if not mapping.exists:
+        warnings.warn(
+            pytest.PytestWarning(
+                f"No impact map at {mapping.path}, running all tests "
+                f"(record one with --record-impact)"
+            )
         )
+        return
+
+    changes = impact_map.changed_symbols(base)
+    for reason in mapping.stale_reasons(changes["base"]):
+        warnings.warn(
+            pytest.PytestWarning(
+                f"Impact map is stale ({reason}), the selection may miss "
+                f"tests; re-record it with --record-impact"
+            )
+        )
+
+    selected_ids, notes = mapping.affected([item.nodeid for item in items], changes)
+    selected_ids = set(selected_ids)
+    deselected = [item for item in items if item.nodeid not in selected_ids]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    items[:] = [item for item in items if item.nodeid in selected_ids]
+    for note in notes:
+        logger.info(f"Impact selection: {note}")
+    logger.info(
+        f"Impact selection: {len(items)} tests affected by changes since {base}"
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(item, nextitem):
+    """
+    Rerun failed tests right away, up to --reruns times
+    Session fixtures stay up between attempts, so the rerun gets the warm
+    browser of the failed attempt after the usual reset (pool) or the next
+    prewarmed one (launcher). Only the last attempt counts, earlier failed
+    ones are reported as rerun (all phases, so a teardown error of a failed
+    attempt still shows up).
+    """
+    reruns = item.config.getoption("--reruns")
+    if not reruns or any(item.get_closest_marker(m) for m in NO_RERUN_MARKERS):
+        return None
+
+    item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+    for attempt in range(reruns + 1):
+        # Without a next item the session fixtures would be torn down after
+        # every attempt, the session finish tears them down instead
+        reports = runtestprotocol(item, nextitem=nextitem or item.parent, log=False)
+        retry = attempt < reruns and any(report.failed for report in reports)
+        for report in reports:
+            report.attempt = attempt + 1
+            if retry and report.failed:
+                report.outcome = "rerun"
+            item.ihook.pytest_runtest_logreport(report=report)
+        if not retry:
+            break
+
+        logger.warning(f"Rerunning {item.nodeid} (attempt {attempt + 2})")
+        for name in ATTEMPT_ATTRIBUTES:
+            item.__dict__.pop(name, None)
+    item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+    return True
+
+
+def pytest_report_teststatus(report):
+    """Show failed attempts that are rerun as R"""
+    if report.outcome == "rerun":
+        return "rerun", "R", ("RERUN", {"yellow": True})
+
+
+def pytest_runtest_logreport(report):
+    """Collect setup + call + teardown duration and the outcome of each test"""
+    duration, outcome = _run_results.get(report.nodeid, (0.0, "passed"))
+    if report.outcome == "rerun":
+        # Setup and teardown of one attempt may both fail, count attempts
+        _reruns[report.nodeid] = max(_reruns.get(report.nodeid, 0), report.attempt)
+    # A quarantined test that fails is reported as xfailed, the history
+    # keeps it as a failure
+    quarantine_failed = (
+        report.skipped
+        and hasattr(report, "wasxfail")
+        and "quarantine" in report.keywords
+    )
+    if report.failed or quarantine_failed:
+        outcome = "failed"
+    elif report.skipped and outcome != "failed":
+        outcome = "skipped"
+    _run_results[report.nodeid] = (duration + report.duration, outcome)
+    _engine_report.add(report)
+
+    properties = dict(report.user_properties)
+    if "impact" in properties:
+        _impact_symbols[report.nodeid] = properties["impact"]
+    if report.when == "call" and "performance" in properties:
+        _performance_runs.append(properties["performance"])
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """
+    Add the counters and wait timings of a finished xdist worker to the
+    controller's, for the terminal summary
+    """
+    output = getattr(node, "workeroutput", {})
+    driver_cache.merge_stats(output.get("driver_cache", {}))
+    add_counts(page_base.ELEMENT_CACHE_STATS, output.get("element_cache", {}))
+    page_base.WAIT_TIMINGS.extend(
+        tuple(timing) for timing in output.get("wait_timings", [])
+    )
+    for name in FIXTURE_STATS:
+        if name in output:
+            totals = getattr(node.config, name, None) or {}
+            setattr(node.config, name, add_counts(totals, output[name]))
+
+
+# After the session fixtures are torn down, which a --reruns run leaves to
+# the session finish
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session):
+    """
+    Merge the per-worker instrument logs, update the test history and write
+    the performance trend once all workers are done
+    """
+    if parallel.is_worker():
+        # Picked up by pytest_testnodedown() on the controller
+        workeroutput = session.config.workeroutput
+        workeroutput["driver_cache"] = dict(driver_cache.stats)
+        workeroutput["element_cache"] = dict(page_base.ELEMENT_CACHE_STATS)
+        workeroutput["wait_timings"] = list(page_base.WAIT_TIMINGS)
+        for name in FIXTURE_STATS:
+            stats = getattr(session.config, name, None)
+            if stats:
+                workeroutput[name] = stats
+        return
+
+    if session.config.getoption("--instrument"):
+        parallel.merge_worker_files(session.config.getoption("--instrument-file"))
+
+    if _run_results:
+        history = session.config.test_history
+        for nodeid, (duration, outcome) in _run_results.items():
+            if outcome == "passed" and nodeid in _reruns:
+                outcome = "flaky"
+            history.record(nodeid, duration, outcome)
+        history.save()
+
+    if _engine_report.is_matrix():
+        _engine_report.write_json(ENGINE_REPORT_FILE)
+
+    if _performance_runs:
+        page_timing.write_trend(PERFORMANCE_TREND_FILE, _performance_runs)
+        comparison = page_timing.compare_users(
+            _performance_runs,
+            STANDARD_USER["username"],
+            PERFORMANCE_GLITCH_USER["username"],
+        )
+        if comparison:
+            with open(PERFORMANCE_COMPARISON_FILE, "w") as f:
+                json.dump(comparison, f, indent=2)
+
+    if _impact_symbols:
+        mapping = impact_map.ImpactMap.load(session.config.getoption("--impact-map"))
+        mapping.update(_impact_symbols, session.config.impact_recorder.modules)
+        mapping.save()
+        logger.info(f"Impact map of {len(_impact_symbols)} tests saved")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix):
+    """Per-engine timing table at the top of the HTML report"""
+    if _engine_report.is_matrix():
+        prefix.append(_engine_report.to_html())
+
+
+@pytest.fixture(scope="session", autouse=True)
+def base_url(request):
+    """
+    Site under test
+    Starts the local SauceDemo stand-in for --target=local and points
+    config.BASE_URL (and so every page object) at it
+    """
+    target = request.config.getoption("--target")
+    original_url = settings.BASE_URL
+
+    if target == "local":
+        shop = LocalShop().start()
+        settings.BASE_URL = shop.base_url
     else:
-        raise ValueError(f"Unsupported browser: {browser}")
+        shop = None
+        settings.BASE_URL = settings.REMOTE_BASE_URL
+
+    logger.info(f"Testing against {target} site: {settings.BASE_URL}")
+
+    yield settings.BASE_URL
+
+    settings.BASE_URL = original_url
+    if shop is not None:
+        shop.stop()
+
+
+def browser_factory(config, template=None):
+    """
+    factory(browser, fast=False) launching browsers with the session's options,
+    each on its own copy of the profile template if there is one
+    """
+    headless = config.getoption("--headless")
+    offline = config.getoption("--driver-offline")
+
+    def factory(browser, fast=False):
+        if template is not None:
+            return template.launch(browser, fast=fast)
+        return create_driver(browser, headless=headless, offline=offline, fast=fast)
+
+    return factory
+
+
+@pytest.fixture(scope="session")
+def profile_template(request, base_url):
+    """
+    Session-wide browser profile template, None without --profile-template
+    Prepared on first use per browser, warmed up against the site under test.
+    Under xdist every worker prepares its own, like its own local shop.
+    """
+    if not request.config.getoption("--profile-template"):
+        yield None
+        return
+
+    template = ProfileTemplate(
+        factory=lambda browser, **options: create_driver(
+            browser,
+            headless=request.config.getoption("--headless"),
+            offline=request.config.getoption("--driver-offline"),
+            **options,
+        )
+    )
+
+    yield template
+
+    template.close()
+    request.config.profile_template_stats = dict(template.stats)
+
+
+@pytest.fixture(scope="session")
+def driver_pool(request, profile_template):
+    """
+    Session-wide pool of browsers
+    Only used when --isolation=pool
+    """
+    pool = DriverPool(
+        factory=browser_factory(request.config, profile_template),
+        recycle_after=request.config.getoption("--pool-recycle"),
+    )
+
+    yield pool
+
+    pool.close()
+
+
+@pytest.fixture(scope="session")
+def browser_launcher(request, profile_template):
+    """
+    Session-wide launcher of fresh browsers
+    Only used when --isolation=test: keeps --prewarm browsers launched ahead
+    of time and quits used ones in the background
+    """
+    launcher = BrowserLauncher(
+        factory=browser_factory(request.config, profile_template),
+        prewarm=request.config.getoption("--prewarm"),
+    )
+
+    yield launcher
+
+    launcher.close()
+    request.config.launcher_stats = launcher.stats_snapshot()
+
+
+@pytest.fixture(scope="session")
+def artifact_writer(request):
+    """
+    Background writer for failure artifacts
+    xdist workers write into their own subdirectory of ARTIFACT_DIR
+    """
+    directory = ARTIFACT_DIR
+    if parallel.is_worker():
+        directory = os.path.join(ARTIFACT_DIR, parallel.worker_id())
+    writer = ArtifactWriter(directory=directory, root=ARTIFACT_DIR)
+
+    yield writer
+
+    writer.close()
+    request.config.artifact_stats = dict(writer.stats)
+
+
+@pytest.fixture(scope="function")
+def browser_name(request):
+    """Browser of the test: its --browsers parameter or --browser"""
+    return getattr(
+        request, "param", request.config.getoption("--browser", default=DEFAULT_BROWSER)
+    )
+
+
+@pytest.fixture(scope="function")
+def driver(request, browser_name, artifact_writer):
+    """
+    Setup and teardown for WebDriver
+    Scope: function - each test gets a clean browser, either a pooled one that
+    was reset after the previous test (--isolation=pool) or a new browser
+    instance (--isolation=test, prewarmed and quit in the background). Under
+    xdist every worker has its own pool.
+    With --fast-profile the browser skips images, fonts and analytics unless
+    the test is marked full_resources.
+    With --browsers the test runs once per engine, each engine holding one of
+    its --engine-limits slots while the test runs.
+    """
+    browser = browser_name
+    matrix = bool(request.config.getoption("--browsers"))
+    isolation = request.config.getoption("--isolation")
+    fast = request.config.getoption("--fast-profile") and not (
+        request.node.get_closest_marker("full_resources")
+    )
 
-    # Configure driver
-    driver.implicitly_wait(IMPLICIT_WAIT)
-    driver.set_window_size(WINDOW_WIDTH, WINDOW_HEIGHT)
+    slot = ExitStack()
+    if matrix:
+        slot.enter_context(
+            engine_matrix.engine_slot(
+                browser, request.config.engine_limits.get(browser, 0)
+            )
+        )
+        request.node.user_properties.append(("browser", browser))
+    waits_before = len(page_base.WAIT_TIMINGS)
 
-    logger.info(f"Browser initialized: {browser}")
+    try:
+        if isolation == "pool":
+            pool = request.getfixturevalue("driver_pool")
+            driver = pool.acquire(browser, fast=fast)
+        else:
+            launcher = request.getfixturevalue("browser_launcher")
+            driver = launcher.acquire(browser, fast=fast)
+    except Exception:
+        slot.close()
+        raise
+
+    started = time.time()
+    recorder = None
+    if request.config.getoption("--instrument"):
+        recorder = CommandRecorder()
+        recorder.attach(driver)
 
     yield driver
 
-    # Teardown
-    if SCREENSHOT_ON_FAILURE and request.node.rep_call.failed:
-        take_screenshot(driver, request.node.nodeid)
+    # Teardown: the browser and the engine slot are given back even when
+    # recording or the failure capture raises
+    try:
+        if recorder is not None:
+            recorder.detach()
+            request.node.command_summary = recorder.summary()
+            instrument_file = parallel.worker_path(
+                request.config.getoption("--instrument-file")
+            )
+            os.makedirs(os.path.dirname(instrument_file) or ".", exist_ok=True)
+            dump_jsonl(instrument_file, request.node.nodeid, recorder)
+
+        # No call report when a later fixture failed during setup
+        failed = any(
+            rep is not None and rep.failed
+            for rep in (
+                getattr(request.node, "rep_setup", None),
+                getattr(request.node, "rep_call", None),
+            )
+        )
+        if ARTIFACTS_ON_FAILURE and failed:
+            capture = artifact_writer.capture(
+                driver, request.node.nodeid, since=started
+            )
+            if capture is not None:
+                request.node.failure_screenshot = capture.screenshot
+
+        parallel.record_browser_footprint(driver, browser)
+    finally:
+        try:
+            if isolation == "pool":
+                pool.release(
+                    driver, crashed=getattr(request.node, "driver_crashed", False)
+                )
+            else:
+                logger.info(f"Closing {browser} browser")
+                launcher.quit_async(driver)
+        finally:
+            if matrix:
+                waits = {}
+                for description, seconds, _ in page_base.WAIT_TIMINGS[waits_before:]:
+                    waits[description] = waits.get(description, 0.0) + seconds
+                request.node.user_properties.append(("waits", waits))
+            slot.close()
+
 
-    logger.info(f"Closing {browser} browser")
-    driver.quit()
+@pytest.fixture(scope="function")
+def products_page(driver):
+    """
+    Products page opened as standard_user without the UI login
+    The session cookie is injected directly, the UI login itself is covered by
+    the login and smoke tests
+    """
+    LoginPage(driver).inject_session(STANDARD_USER["username"])
+
+    products_page = ProductsPage(driver)
+    products_page.open()
+    return products_page
 
 
 @pytest.fixture(scope="function", autouse=True)
 def log_test_name(request):
-    """Log test name before and after execution"""
-    test_name = request.node.nodeid
-    logger.info(f"{'=' * 80}")
-    logger.info(f"STARTING TEST: {test_name}")
-    logger.info(f"{'=' * 80}")
+    """Log test name before execution"""
+    logger.info("STARTING TEST: %s", request.node.nodeid)
 
-    yield
 
-    logger.info(f"{'=' * 80}")
-    logger.info(f"FINISHED TEST: {test_name}")
-    logger.info(f"{'=' * 80}")
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Every test starts with an empty log buffer and impact recording"""
+    if item.config.log_buffer is not None:
+        item.config.log_buffer.clear()
+    if item.config.impact_recorder is not None:
+        item.config.impact_recorder.start()
 
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
@@ -133,22 +687,125 @@ def pytest_runtest_makereport(item, call):
     rep = outcome.get_result()
     setattr(item, f"rep_{rep.when}", rep)
 
+    # Per-command WebDriver timings, collected by the driver fixture teardown
+    summary = getattr(item, "command_summary", None)
+    if rep.when == "teardown" and summary and html_extras is not None:
+        rep.extras = getattr(rep, "extras", []) + [
+            html_extras.html(summary_html(summary))
+        ]
+
+    # Embed the failure screenshot, so the report stays complete when xdist
+    # workers send their results to the controller
+    screenshot = getattr(item, "failure_screenshot", None)
+    if rep.when == "teardown" and screenshot and html_extras is not None:
+        encoded = base64.b64encode(screenshot).decode("ascii")
+        rep.extras = getattr(rep, "extras", []) + [
+            html_extras.png(encoded, name="failure screenshot")
+        ]
+
+    # Buffered logs are only formatted for failed tests, attached to the
+    # first failing phase
+    log_buffer = item.config.log_buffer
+    if rep.failed and log_buffer is not None and not hasattr(item, "log_flushed"):
+        item.log_flushed = True
+        log_text = log_buffer.flush_text()
+        rep.sections.append(("Captured log (buffered)", log_text))
+        if html_extras is not None:
+            rep.extras = getattr(rep, "extras", []) + [
+                html_extras.html(f"<pre>{html.escape(log_text)}</pre>")
+            ]
+
+    # Page object symbols used from setup to teardown, sent with the report
+    # so the xdist controller can build the impact map
+    recorder = item.config.impact_recorder
+    if rep.when == "teardown" and recorder is not None:
+        rep.user_properties.append(("impact", recorder.stop()))
+
+    # A dead session cannot be reset, tell the pool to recycle the browser
+    if call.excinfo is not None and call.excinfo.errisinstance(
+        InvalidSessionIdException
+    ):
+        item.driver_crashed = True
+
+
+def pytest_terminal_summary(terminalreporter):
+    """
+    Report driver cache savings, hidden launch time, profile template cost,
+    failure artifact cost, element cache hit rate, slowest waits, per-engine
+    timing, reruns and the quarantine bucket
+    """
+    stats = driver_cache.stats
+    if stats["resolved"] or stats["cache_hits"]:
+        terminalreporter.write_sep("-", "driver cache")
+        terminalreporter.write_line(driver_cache.format_stats())
+
+    launcher_stats = getattr(terminalreporter.config, "launcher_stats", None)
+    if launcher_stats:
+        terminalreporter.write_sep("-", "browser launcher")
+        terminalreporter.write_line(BrowserLauncher.format_stats(launcher_stats))
+
+    profile_stats = getattr(terminalreporter.config, "profile_template_stats", None)
+    if profile_stats:
+        terminalreporter.write_sep("-", "profile template")
+        terminalreporter.write_line(ProfileTemplate.format_stats(profile_stats))
+
+    artifact_stats = getattr(terminalreporter.config, "artifact_stats", None)
+    if artifact_stats and artifact_stats["captured"]:
+        terminalreporter.write_sep("-", "failure artifacts")
+        terminalreporter.write_line(ArtifactWriter.format_stats(artifact_stats))
+
+    cache_stats = page_base.ELEMENT_CACHE_STATS
+    lookups = cache_stats["hits"] + cache_stats["misses"]
+    if lookups:
+        terminalreporter.write_sep("-", "element cache")
+        terminalreporter.write_line(
+            f"{cache_stats['hits']}/{lookups} lookups served from cache "
+            f"({cache_stats['hits'] / lookups:.0%} hit rate), "
+            f"{cache_stats['stale']} stale elements refetched"
+        )
 
-def take_screenshot(driver, test_name):
-    """Take screenshot and save to file"""
-    try:
-        os.makedirs(SCREENSHOT_DIR, exist_ok=True)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        clean_name = test_name.replace("::", "_").replace("/", "_")
-        filename = f"{clean_name}_{timestamp}.png"
-        filepath = os.path.join(SCREENSHOT_DIR, filename)
-
-        driver.save_screenshot(filepath)
-        logger.info(f"Screenshot saved: {filepath}")
-
-    except Exception as e:
-        logger.error(f"Failed to take screenshot: {e}")
+    if page_base.WAIT_TIMINGS:
+        totals = {}
+        for description, seconds, satisfied in page_base.WAIT_TIMINGS:
+            count, total, longest, timeouts = totals.get(description, (0, 0.0, 0.0, 0))
+            totals[description] = (
+                count + 1,
+                total + seconds,
+                max(longest, seconds),
+                timeouts + (not satisfied),
+            )
+
+        terminalreporter.write_sep("-", "slowest waits")
+        slowest = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)
+        for description, (count, total, longest, timeouts) in slowest[:10]:
+            terminalreporter.write_line(
+                f"{total:8.3f}s total  {longest:7.3f}s max  {count:4d} calls  "
+                f"{timeouts:3d} timeouts  {description}"
+            )
+
+    if _engine_report.is_matrix():
+        terminalreporter.write_sep("-", "per-engine timing")
+        for line in _engine_report.lines():
+            terminalreporter.write_line(line)
+        terminalreporter.write_line(f"Full comparison: {ENGINE_REPORT_FILE}")
+
+    if _reruns:
+        terminalreporter.write_sep("-", "reruns")
+        for nodeid, count in sorted(_reruns.items()):
+            outcome = _run_results.get(nodeid, (0.0, "unknown"))[1]
+            terminalreporter.write_line(f"{count} rerun(s), {outcome}: {nodeid}")
+
+    quarantined = [
+        nodeid
+        for nodeid in terminalreporter.config.quarantined
+        if nodeid in _run_results
+    ]
+    if quarantined:
+        terminalreporter.write_sep("-", "quarantine (non-blocking)")
+        for nodeid in sorted(quarantined):
+            rate = terminalreporter.config.quarantined[nodeid]
+            outcome = _run_results[nodeid][1]
+            terminalreporter.write_line(f"{outcome:8s} {rate:4.0%} flaky  {nodeid}")
 
 
 def pytest_addoption(parser):
@@ -159,9 +816,198 @@ def pytest_addoption(parser):
         default=DEFAULT_BROWSER,
         help="Browser to run tests on: chrome, firefox",
     )
+    parser.addoption(
+        "--browsers",
+        action="store",
+        default=None,
+        help="Comma separated browsers (e.g. chrome,firefox), runs every "
+        "browser test once per engine with a side-by-side timing report",
+    )
+    parser.addoption(
+        "--engine-limits",
+        action="store",
+        default=ENGINE_LIMITS,
+        help="Tests of one engine running at the same time across all workers "
+        "on the machine, e.g. chrome=4,firefox=2 (idle pooled and prewarmed "
+        "browsers stay open without counting)",
+    )
     parser.addoption(
         "--headless",
         action="store_true",
         default=False,  # ✅ Changed to False - browser visible by default
         help="Run browser in headless mode",
     )
+    parser.addoption(
+        "--target",
+        action="store",
+        default=TARGET,
+        choices=("local", "remote"),
+        help="Site under test: local (bundled SauceDemo stand-in) "
+        "or remote (https://www.saucedemo.com/)",
+    )
+    parser.addoption(
+        "--isolation",
+        action="store",
+        default=DRIVER_ISOLATION,
+        choices=("pool", "test"),
+        help="Browser lifecycle: pool (reuse and reset browsers between tests) "
+        "or test (new browser for each test)",
+    )
+    parser.addoption(
+        "--pool-recycle",
+        action="store",
+        type=int,
+        default=POOL_RECYCLE_AFTER,
+        help="Quit a pooled browser after this many tests (0 = never)",
+    )
+    parser.addoption(
+        "--prewarm",
+        action="store",
+        type=int,
+        default=PREWARM_BROWSERS,
+        help="With --isolation=test, browsers launched ahead of time in the "
+        "background (0 = launch when the test starts)",
+    )
+    parser.addoption(
+        "--instrument",
+        action="store_true",
+        default=False,
+        help="Time every WebDriver command, add a per-test summary to the HTML "
+        "report and dump all commands to --instrument-file",
+    )
+    parser.addoption(
+        "--instrument-file",
+        action="store",
+        default=INSTRUMENT_FILE,
+        help="JSONL file the --instrument command log is appended to",
+    )
+    parser.addoption(
+        "--element-cache",
+        action="store_true",
+        default=ELEMENT_CACHE,
+        help="Let page objects reuse elements by locator until the page changes",
+    )
+    parser.addoption(
+        "--macro-mode",
+        action="store",
+        default=MACRO_MODE,
+        choices=("script", "stepwise"),
+        help="Run page macros as one browser script (script) or as separate "
+        "WebDriver calls for debugging (stepwise)",
+    )
+    parser.addoption(
+        "--wait-engine",
+        action="store",
+        default=WAIT_ENGINE,
+        choices=("poll", "observer"),
+        help="Poll page conditions (poll) or wait for them in the browser on "
+        "DOM and URL changes (observer)",
+    )
+    parser.addoption(
+        "--fast-profile",
+        action="store_true",
+        default=FAST_PROFILE,
+        help="Block images, fonts and analytics, load pages eagerly and turn off "
+        "background browser features (tests marked full_resources opt out)",
+    )
+    parser.addoption(
+        "--profile-template",
+        action="store_true",
+        default=PROFILE_TEMPLATE,
+        help="Start browsers on copies of a profile prepared once per session "
+        "(warm HTTP cache, no first-run work) instead of incognito",
+    )
+    parser.addoption(
+        "--run-benchmarks",
+        action="store_true",
+        default=False,
+        help="Run the tests marked benchmark (tests/benchmarks)",
+    )
+    parser.addoption(
+        "--update-baselines",
+        action="store_true",
+        default=False,
+        help="Store the page object benchmark results as the new baselines "
+        "instead of checking them for regressions",
+    )
+    parser.addoption(
+        "--require-baselines",
+        action="store_true",
+        default=False,
+        help="Fail page object benchmarks without a stored baseline instead "
+        "of skipping them (CI)",
+    )
+    parser.addoption(
+        "--shard",
+        action="store",
+        default=None,
+        help="Run only shard i of n (e.g. 2/4), shards are balanced by the "
+        "expected test durations from the test history",
+    )
+    parser.addoption(
+        "--order",
+        action="store",
+        default="collection",
+        choices=("collection", "longest-first"),
+        help="Test order: collection or longest-first (by test history, "
+        "shortens parallel runs)",
+    )
+    parser.addoption(
+        "--reruns",
+        action="store",
+        type=int,
+        default=RERUNS,
+        help="Rerun a failed test up to this many times in the same process, "
+        "on a warm browser (tests marked performance or benchmark are not rerun)",
+    )
+    parser.addoption(
+        "--quarantine",
+        action="store",
+        default="xfail",
+        choices=("xfail", "skip", "off"),
+        help="Tests above --flake-threshold: run them without failing the run "
+        "(xfail), do not run them (skip) or treat them like any test (off)",
+    )
+    parser.addoption(
+        "--flake-threshold",
+        action="store",
+        type=float,
+        default=FLAKE_THRESHOLD,
+        help="Share of recent runs that needed a rerun at which a test is "
+        "quarantined",
+    )
+    parser.addoption(
+        "--record-impact",
+        action="store_true",
+        default=False,
+        help="Record the page object methods and locators every test uses "
+        "into --impact-map (slows the run down, use on full runs)",
+    )
+    parser.addoption(
+        "--impact-select",
+        action="store",
+        default=None,
+        metavar="BASE",
+        help="Run only the tests affected by the changes since git revision "
+        "BASE (e.g. origin/main), according to --impact-map",
+    )
+    parser.addoption(
+        "--impact-map",
+        action="store",
+        default=IMPACT_MAP_FILE,
+        help="JSON file with the page object symbols used per test",
+    )
+    parser.addoption(
+        "--history-file",
+        action="store",
+        default=TEST_HISTORY_FILE,
+        help="JSON file with per-test durations and outcomes, updated after "
+        "every run",
+    )
+    parser.addoption(
+        "--driver-offline",
+        action="store_true",
+        default=DRIVER_OFFLINE,
+        help="Only use driver binaries recorded in the driver cache lockfile, "
+        "never contact the network",
+    )
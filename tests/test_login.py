@@ -127,6 +127,6 @@ class TestLogin:
 
         login_page.clear_error()
 
-        assert not login_page.is_error_displayed(), "Error message should be dismissed"
+        assert login_page.is_error_absent(), "Error message should be dismissed"
 
         logger.info("✅ Error message successfully dismissed")
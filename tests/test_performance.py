@@ -0,0 +1,133 @@
+"""
+Performance Tests for SauceDemo
+Times every page transition of the shopping journey and checks it against
+the budgets in config.PERFORMANCE_BUDGETS_MS
+"""
+
+import logging
+from datetime import datetime
+
+import pytest
+
+from pages.login_page import LoginPage
+from pages.products_page import ProductsPage
+from config import config
+from config.config import (
+    GLITCH_BUDGET_ALLOWANCE_MS,
+    PERFORMANCE_BUDGET_SCALE,
+    PERFORMANCE_BUDGETS_MS,
+    PERFORMANCE_GLITCH_USER,
+    STANDARD_USER,
+)
+from utils.page_timing import measure_transition
+
+logger = logging.getLogger(__name__)
+
+
+def budget_ms(transition, username):
+    """Budget of a transition for a user, in milliseconds"""
+    budget = PERFORMANCE_BUDGETS_MS[transition]
+    if username == PERFORMANCE_GLITCH_USER["username"]:
+        budget += GLITCH_BUDGET_ALLOWANCE_MS
+    return budget * PERFORMANCE_BUDGET_SCALE
+
+
+def run_journey(driver, user):
+    """
+    Login, sort, cart and checkout, timing every transition
+
+    Returns:
+        list[dict]: One measure_transition() result per transition
+    """
+    login_page = LoginPage(driver)
+    login_page.open()
+    products_page = ProductsPage(driver)
+
+    transitions = [
+        measure_transition(
+            driver,
+            "login",
+            lambda: login_page.login(user["username"], user["password"]),
+        ),
+        measure_transition(
+            driver,
+            "sort",
+            lambda: products_page.select_sort_option("lohi"),
+            navigates=False,
+        ),
+    ]
+
+    products_page.add_products_to_cart(["Sauce Labs Backpack"])
+    transitions.append(
+        measure_transition(driver, "cart", products_page.click_badge_count)
+    )
+    transitions.append(
+        measure_transition(
+            driver,
+            "checkout_information",
+            lambda: products_page.click_button("checkout"),
+        )
+    )
+
+    products_page.enter_first_name("perf_first_name")
+    products_page.enter_last_name("perf_last_name")
+    products_page.enter_postal_code("perf_postal_code")
+    transitions.append(
+        measure_transition(
+            driver,
+            "checkout_overview",
+            lambda: products_page.click_button("continue"),
+        )
+    )
+    transitions.append(
+        measure_transition(
+            driver,
+            "checkout_complete",
+            lambda: products_page.click_button("finish"),
+        )
+    )
+
+    assert products_page.checkout_complete_is_loaded(), "Checkout should complete"
+    return transitions
+
+
+@pytest.mark.performance
+class TestPerformance:
+    """Page transition timings and budgets"""
+
+    @pytest.mark.parametrize(
+        "user",
+        [STANDARD_USER, PERFORMANCE_GLITCH_USER],
+        ids=lambda user: user["username"],
+    )
+    def test_transitions_within_budget(self, driver, browser_name, user, request):
+        """Test that every page transition stays within its budget"""
+        logger.info(f"Testing transition budgets for {user['username']}")
+
+        transitions = run_journey(driver, user)
+
+        # Trend line of this user and browser, sent with the report so the
+        # xdist controller writes the trend and the comparison of all workers
+        request.node.user_properties.append(
+            (
+                "performance",
+                {
+                    "timestamp": datetime.now().isoformat(timespec="seconds"),
+                    "user": user["username"],
+                    "browser": browser_name,
+                    "target": request.config.getoption("--target"),
+                    "base_url": config.BASE_URL,
+                    "transitions": transitions,
+                },
+            )
+        )
+
+        over_budget = [
+            f"{t['name']}: {t['duration_ms']:.0f} ms > "
+            f"{budget_ms(t['name'], user['username']):.0f} ms"
+            for t in transitions
+            if t["duration_ms"] > budget_ms(t["name"], user["username"])
+        ]
+        assert not over_budget, f"Transitions over budget: {over_budget}"
+
+        logger.info(f"✅ All transitions within budget for {user['username']}")
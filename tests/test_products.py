@@ -8,7 +8,7 @@ import logging
 
 from pages.login_page import LoginPage
 from pages.products_page import ProductsPage
-from config.config import STANDARD_USER
+from config.config import PROBLEM_USER, STANDARD_USER
 
 logger = logging.getLogger(__name__)
 
@@ -34,17 +34,10 @@ class TestProducts:
         logger.info("✅ Products page loaded successfully")
 
     @pytest.mark.products
-    def test_all_products_displayed(self, driver):
+    def test_all_products_displayed(self, products_page):
         """Test that all 6 products are displayed"""
         logger.info("Testing all 6 products are displayed")
 
-        # Login
-        login_page = LoginPage(driver)
-        login_page.open()
-        login_page.login(STANDARD_USER["username"], STANDARD_USER["password"])
-
-        # Check count
-        products_page = ProductsPage(driver)
         count = products_page.get_product_count()
 
         assert count == 6, f"Expected 6 products, but got {count}"
@@ -52,17 +45,10 @@ class TestProducts:
         logger.info(f"✅ All {count} products displayed")
 
     @pytest.mark.products
-    def test_add_product_to_cart(self, driver):
+    def test_add_product_to_cart(self, products_page):
         """Test adding a product to cart"""
         logger.info("Testing add product to cart")
 
-        # Login
-        login_page = LoginPage(driver)
-        login_page.open()
-        login_page.login(STANDARD_USER["username"], STANDARD_USER["password"])
-
-        products_page = ProductsPage(driver)
-
         # Verify cart is empty
         initial_count = products_page.get_cart_badge_count()
         assert initial_count == 0, "Cart should be empty initially"
@@ -78,17 +64,10 @@ class TestProducts:
         logger.info("✅ Product added to cart successfully")
 
     @pytest.mark.products
-    def test_add_multiple_products_to_cart(self, driver):
+    def test_add_multiple_products_to_cart(self, products_page):
         """Test adding multiple products to cart"""
         logger.info("Testing add multiple products to cart")
 
-        # Login
-        login_page = LoginPage(driver)
-        login_page.open()
-        login_page.login(STANDARD_USER["username"], STANDARD_USER["password"])
-
-        products_page = ProductsPage(driver)
-
         # Add 3 products
         products_to_add = [
             "Sauce Labs Backpack",
@@ -96,8 +75,8 @@ class TestProducts:
             "Sauce Labs Bolt T-Shirt",
         ]
 
-        for product in products_to_add:
-            success = products_page.add_product_to_cart_by_name(product)
+        results = products_page.add_products_to_cart(products_to_add)
+        for product, success in results.items():
             assert success, f"Failed to add {product}"
 
         # Verify cart has 3 items
@@ -107,17 +86,10 @@ class TestProducts:
         logger.info("✅ Multiple products added successfully")
 
     @pytest.mark.products
-    def test_sort_products_by_price_low_to_high(self, driver):
+    def test_sort_products_by_price_low_to_high(self, products_page):
         """Test sorting products by price (low to high)"""
         logger.info("Testing sort by price low to high")
 
-        # Login
-        login_page = LoginPage(driver)
-        login_page.open()
-        login_page.login(STANDARD_USER["username"], STANDARD_USER["password"])
-
-        products_page = ProductsPage(driver)
-
         # Sort by price low to high
         success = products_page.select_sort_option("lohi")
         assert success, "Failed to select sort option"
@@ -131,17 +103,10 @@ class TestProducts:
         logger.info(f"✅ Products sorted correctly: {prices}")
 
     @pytest.mark.products
-    def test_sort_products_by_name_z_to_a(self, driver):
+    def test_sort_products_by_name_z_to_a(self, products_page):
         """Test sorting products by name (Z to A)"""
         logger.info("Testing sort by name Z to A")
 
-        # Login
-        login_page = LoginPage(driver)
-        login_page.open()
-        login_page.login(STANDARD_USER["username"], STANDARD_USER["password"])
-
-        products_page = ProductsPage(driver)
-
         # Sort by name Z to A
         success = products_page.select_sort_option("za")
         assert success, "Failed to select sort option"
@@ -157,24 +122,18 @@ class TestProducts:
         logger.info("✅ Products sorted correctly by name")
 
     @pytest.mark.products
-    def test_add_two_products_and_checkout(self, driver):
+    def test_add_two_products_and_checkout(self, products_page):
         """Test adding two products and checkout"""
         logger.info("Testing add two products to cart and checkout")
 
-        # Login
-        login_page = LoginPage(driver)
-        login_page.open()
-        login_page.login(STANDARD_USER["username"], STANDARD_USER["password"])
-
-        products_page = ProductsPage(driver)
         # Add 2 products
         products_to_add = [
             "Sauce Labs Bike Light",
             "Sauce Labs Onesie",
         ]
 
-        for product in products_to_add:
-            success = products_page.add_product_to_cart_by_name(product)
+        results = products_page.add_products_to_cart(products_to_add)
+        for product, success in results.items():
             assert success, f"Failed to add {product}"
 
         # Verify cart has 2 items
@@ -183,14 +142,32 @@ class TestProducts:
         assert cart_count == 2, f"Cart should have 2 items, got {cart_count}"
         logger.info("✅ Multiple products added successfully")
         # Processing checkout
-        products_page.click_badge_count()
-        products_page.click_button("checkout")
-        products_page.enter_first_name("tmp_first_name")
-        products_page.enter_last_name("tmp_last_name")
-        products_page.enter_postal_code("tmp_postal_code")
-        products_page.click_button("continue")
-        products_page.click_button("finish")
+        assert products_page.open_cart(), "Cart page should open"
+        assert products_page.start_checkout(), "Checkout form should open"
+        assert products_page.fill_checkout_form_and_continue(
+            "tmp_first_name", "tmp_last_name", "tmp_postal_code"
+        ), "Checkout overview should open"
+        assert products_page.finish_checkout(), "Checkout should finish"
 
         assert products_page.checkout_complete_is_loaded(), "Checkout completed"
         products_page.click_button("back")
         assert products_page.is_loaded(), "Products page should be loaded"
+
+    @pytest.mark.products
+    @pytest.mark.full_resources
+    def test_problem_user_sees_wrong_product_images(self, driver):
+        """Test that problem_user gets the same wrong image for every product"""
+        logger.info("Testing product images of problem_user")
+
+        LoginPage(driver).inject_session(PROBLEM_USER["username"])
+        products_page = ProductsPage(driver)
+        products_page.open()
+
+        # Images are rendered, but all of them show the same picture
+        loaded = products_page.get_loaded_image_count()
+        assert loaded == 6, f"Expected 6 loaded images, got {loaded}"
+
+        sources = products_page.get_product_image_sources()
+        assert len(set(sources)) == 1, f"Expected one shared image, got {sources}"
+
+        logger.info("✅ problem_user sees the same image for every product")
@@ -0,0 +1,195 @@
+"""
+Driver Cache Tests
+Lockfile reads, writes and locking of utils/driver_cache.py with a fake
+resolver in a temporary cache directory, no browser needed
+"""
+
+import json
+import multiprocessing
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from utils import driver_cache
+from utils.driver_cache import DriverCacheError, resolve_driver_path
+
+
+class FakeResolver:
+    """
+    Stand-in for the webdriver-manager classes: install() writes a driver
+    binary and appends a line to resolutions.log for every resolution
+    """
+
+    directory = None
+
+    def install(self):
+        path = os.path.join(self.directory, "chromedriver")
+        with open(path, "w") as f:
+            f.write("#!/bin/sh\n")
+        with open(os.path.join(self.directory, "resolutions.log"), "a") as f:
+            f.write(f"{os.getpid()}\n")
+        return path
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """
+    Empty driver cache in tmp_path with a fake resolver, the installed
+    browser version is cache.version
+    """
+    state = SimpleNamespace()
+    state.dir = tmp_path / "cache"
+    state.version = "120.0"
+    state.lock_path = state.dir / driver_cache.LOCK_FILE
+
+    def resolutions():
+        log = tmp_path / "resolutions.log"
+        return len(log.read_text().splitlines()) if log.exists() else 0
+
+    state.resolutions = resolutions
+    monkeypatch.setattr(FakeResolver, "directory", str(tmp_path))
+    monkeypatch.setattr(driver_cache, "DRIVER_CACHE_DIR", str(state.dir))
+    monkeypatch.setattr(
+        driver_cache,
+        "DRIVER_MANAGERS",
+        {"chrome": FakeResolver, "firefox": FakeResolver},
+    )
+    monkeypatch.setattr(driver_cache, "_browser_version", lambda b: state.version)
+    monkeypatch.setattr(driver_cache, "_resolved", {})
+    monkeypatch.setattr(driver_cache, "stats", {key: 0 for key in driver_cache.stats})
+    return state
+
+
+def forget_process_cache(monkeypatch):
+    """Start over like a new worker process, only the lockfile is left"""
+    monkeypatch.setattr(driver_cache, "_resolved", {})
+
+
+def resolve_in_process(browser):
+    resolve_driver_path(browser)
+
+
+@pytest.mark.unit
+class TestDriverCache:
+    """Test suite for the driver binary lockfile"""
+
+    def test_first_resolution_writes_the_lockfile(self, cache):
+        """Test that a resolution is recorded for other processes"""
+        path = resolve_driver_path("chrome")
+
+        lock = json.loads(cache.lock_path.read_text(encoding="utf-8"))
+        assert lock["chrome"]["path"] == path
+        assert lock["chrome"]["browser_version"] == "120.0"
+        assert cache.resolutions() == 1
+        assert driver_cache.stats["resolved"] == 1
+
+    def test_cache_hit(self, cache, monkeypatch):
+        """Test that a verified lock entry is used without resolving"""
+        path = resolve_driver_path("chrome")
+        forget_process_cache(monkeypatch)
+
+        assert resolve_driver_path("chrome") == path
+        assert cache.resolutions() == 1
+        assert driver_cache.stats["cache_hits"] == 1
+
+    def test_reuse_in_process(self, cache):
+        """Test that later calls in a process neither read nor resolve"""
+        resolve_driver_path("chrome")
+        cache.lock_path.unlink()
+
+        resolve_driver_path("chrome")
+
+        assert cache.resolutions() == 1
+        assert driver_cache.stats["reused"] == 1
+        assert driver_cache.stats["cache_hits"] == 0
+
+    def test_stale_browser_version(self, cache, monkeypatch):
+        """Test that a browser update resolves the driver again"""
+        resolve_driver_path("chrome")
+        forget_process_cache(monkeypatch)
+        cache.version = "121.0"
+
+        resolve_driver_path("chrome")
+
+        lock = json.loads(cache.lock_path.read_text(encoding="utf-8"))
+        assert lock["chrome"]["browser_version"] == "121.0"
+        assert cache.resolutions() == 2
+
+    def test_stale_browser_version_offline(self, cache, monkeypatch):
+        """Test that offline mode keeps using the recorded driver"""
+        path = resolve_driver_path("chrome")
+        forget_process_cache(monkeypatch)
+        cache.version = "121.0"
+
+        assert resolve_driver_path("chrome", offline=True) == path
+        assert cache.resolutions() == 1
+
+    def test_changed_binary(self, cache, monkeypatch):
+        """Test that a binary not matching its checksum is resolved again"""
+        path = resolve_driver_path("chrome")
+        forget_process_cache(monkeypatch)
+        with open(path, "a") as f:
+            f.write("tampered\n")
+
+        resolve_driver_path("chrome")
+
+        assert cache.resolutions() == 2
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "{not json",
+            "[]",
+            json.dumps({"chrome": "path"}),
+            json.dumps({"chrome": {"path": "/usr/bin/chromedriver"}}),
+        ],
+        ids=["invalid-json", "not-an-object", "entry-not-an-object", "no-checksum"],
+    )
+    def test_corrupt_lockfile(self, cache, content):
+        """Test that a corrupt lockfile is resolved and rewritten"""
+        cache.dir.mkdir()
+        cache.lock_path.write_text(content, encoding="utf-8")
+
+        path = resolve_driver_path("chrome")
+
+        lock = json.loads(cache.lock_path.read_text(encoding="utf-8"))
+        assert lock["chrome"]["path"] == path
+        assert cache.resolutions() == 1
+
+    def test_offline_without_lockfile(self, cache):
+        """Test that offline mode fails instead of resolving"""
+        with pytest.raises(DriverCacheError, match="Offline driver resolution"):
+            resolve_driver_path("chrome", offline=True)
+        assert cache.resolutions() == 0
+
+    def test_unsupported_browser(self, cache):
+        """Test that unknown browsers are rejected"""
+        with pytest.raises(ValueError, match="Unsupported browser"):
+            resolve_driver_path("safari")
+
+    @pytest.mark.skipif(driver_cache.fcntl is None, reason="needs fcntl.flock")
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork"
+    )
+    def test_concurrent_writers(self, cache):
+        """
+        Test that workers starting together resolve a driver once and do not
+        lose each other's lock entries
+        """
+        context = multiprocessing.get_context("fork")
+        browsers = ["chrome"] * 4 + ["firefox"] * 4
+        processes = [
+            context.Process(target=resolve_in_process, args=(browser,))
+            for browser in browsers
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+
+        assert [process.exitcode for process in processes] == [0] * len(browsers)
+        assert cache.resolutions() == 2
+        lock = json.loads(cache.lock_path.read_text(encoding="utf-8"))
+        assert sorted(lock) == ["chrome", "firefox"]
+        assert not [p for p in os.listdir(cache.dir) if p.endswith(".tmp")]
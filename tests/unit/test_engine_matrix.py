@@ -0,0 +1,199 @@
+"""
+Engine Matrix Tests
+Option parsing, engine slots and the per-engine report of
+utils/engine_matrix.py, no browser needed
+"""
+
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from utils import engine_matrix
+from utils.engine_matrix import (
+    EngineReport,
+    base_test_id,
+    engine_slot,
+    parse_browsers,
+    parse_limits,
+)
+
+
+def make_report(nodeid, browser, duration, when="call", waits=None):
+    """Stand-in for a test report as the driver fixture leaves it"""
+    user_properties = [("browser", browser)] if browser else []
+    if waits is not None:
+        user_properties.append(("waits", waits))
+    return SimpleNamespace(
+        nodeid=nodeid, when=when, duration=duration, user_properties=user_properties
+    )
+
+
+@pytest.mark.unit
+class TestParsing:
+    """Test suite for --browsers and --engine-limits values"""
+
+    def test_parse_browsers(self):
+        """Test that browsers are split, trimmed and lower-cased"""
+        assert parse_browsers(" Chrome, firefox ,,") == ["chrome", "firefox"]
+
+    def test_parse_limits(self):
+        """Test that limits are read per engine"""
+        assert parse_limits("chrome=4, Firefox=2,") == {"chrome": 4, "firefox": 2}
+        assert parse_limits("") == {}
+
+    @pytest.mark.parametrize("value", ["chrome", "chrome=four", "chrome=1=2"])
+    def test_parse_invalid_limits(self, value):
+        """Test that limits other than name=count are rejected"""
+        with pytest.raises(ValueError, match="expected name=count"):
+            parse_limits(value)
+
+
+@pytest.mark.unit
+class TestBaseTestId:
+    """Test suite for node ids without the browser parameter"""
+
+    @pytest.mark.parametrize(
+        "nodeid, browser, expected",
+        [
+            ("t.py::test_a[chrome]", "chrome", "t.py::test_a"),
+            (
+                "t.py::test_a[chrome-standard_user]",
+                "chrome",
+                "t.py::test_a[standard_user]",
+            ),
+            ("t.py::test_a[firefox-a-b]", "firefox", "t.py::test_a[a-b]"),
+            ("t.py::test_a[a-b-chrome]", "chrome", "t.py::test_a[a-b]"),
+            ("t.py::test_a[chrome-firefox-x]", "chrome", "t.py::test_a[firefox-x]"),
+            ("t.py::test_a[chromeless-x]", "chrome", "t.py::test_a[chromeless-x]"),
+            ("t.py::Test::test_a", "chrome", "t.py::Test::test_a"),
+        ],
+    )
+    def test_only_the_browser_id_is_removed(self, nodeid, browser, expected):
+        """Test that parameter ids containing "-" stay intact"""
+        assert base_test_id(nodeid, browser) == expected
+
+
+@pytest.mark.unit
+class TestEngineReport:
+    """Test suite for the side-by-side engine report"""
+
+    def test_phases_add_up_per_engine(self):
+        """Test that setup, call and teardown of a test add up per engine"""
+        report = EngineReport()
+        for when, duration in (("setup", 1.0), ("call", 2.0), ("teardown", 0.5)):
+            report.add(make_report("t.py::f[chrome-u-1]", "chrome", duration, when))
+        report.add(make_report("t.py::f[firefox-u-1]", "firefox", 5.0))
+
+        assert report.tests == {"t.py::f[u-1]": {"chrome": 3.5, "firefox": 5.0}}
+        assert report.totals() == {"chrome": 3.5, "firefox": 5.0}
+        assert report.is_matrix()
+
+    def test_params_with_dashes_stay_apart(self):
+        """Test that tests differing in a dashed parameter are not merged"""
+        report = EngineReport()
+        report.add(make_report("t.py::f[chrome-a-b]", "chrome", 1.0))
+        report.add(make_report("t.py::f[chrome-a-c]", "chrome", 2.0))
+
+        assert report.tests == {
+            "t.py::f[a-b]": {"chrome": 1.0},
+            "t.py::f[a-c]": {"chrome": 2.0},
+        }
+
+    def test_reports_without_browser_are_ignored(self):
+        """Test that tests without a browser do not show up"""
+        report = EngineReport()
+        report.add(make_report("t.py::test_unit", None, 1.0))
+
+        assert report.tests == {}
+        assert not report.is_matrix()
+
+    def test_waits_from_teardown(self):
+        """Test that the wait times of the teardown report are added up"""
+        report = EngineReport()
+        report.add(make_report("t.py::f[chrome]", "chrome", 0.1, "teardown", {"w": 1}))
+        report.add(make_report("t.py::g[chrome]", "chrome", 0.1, "teardown", {"w": 2}))
+        report.add(make_report("t.py::g[firefox]", "firefox", 0.1, "call", {"w": 9}))
+
+        assert report.waits == {"w": {"chrome": 3}}
+
+    def test_rows_by_largest_difference(self):
+        """Test that rows are sorted by the largest engine difference"""
+        report = EngineReport()
+        for nodeid, chrome, firefox in (("a", 1, 1.5), ("b", 1, 4), ("c", 2, 1)):
+            report.add(make_report(f"t.py::{nodeid}[chrome]", "chrome", chrome))
+            report.add(make_report(f"t.py::{nodeid}[firefox]", "firefox", firefox))
+
+        assert [name for name, _ in report.rows(report.tests)] == [
+            "t.py::b",
+            "t.py::c",
+            "t.py::a",
+        ]
+        assert len(report.rows(report.tests, top=1)) == 1
+        assert report.lines()[0] == "    chrome   firefox"
+
+    def test_write_json(self, tmp_path):
+        """Test that the JSON report has engines, totals, tests and waits"""
+        report = EngineReport()
+        report.add(make_report("t.py::f[chrome]", "chrome", 1.0))
+        report.add(make_report("t.py::f[firefox]", "firefox", 2.0))
+        path = tmp_path / "reports" / "engines.json"
+
+        report.write_json(str(path))
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["engines"] == ["chrome", "firefox"]
+        assert data["totals"] == {"chrome": 1.0, "firefox": 2.0}
+        assert data["tests"] == {"t.py::f": {"chrome": 1.0, "firefox": 2.0}}
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(engine_matrix.fcntl is None, reason="needs fcntl.flock")
+class TestEngineSlot:
+    """Test suite for the machine-wide engine slots"""
+
+    @pytest.fixture(autouse=True)
+    def slot_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(engine_matrix, "SLOT_DIR", str(tmp_path))
+        monkeypatch.setattr(engine_matrix, "SLOT_POLL_INTERVAL", 0.01)
+
+    def test_limit_blocks_until_a_slot_is_free(self):
+        """Test that a test waits while all slots of its engine are held"""
+        acquired = threading.Event()
+
+        def other_test():
+            with engine_slot("chrome", 1):
+                acquired.set()
+
+        with engine_slot("chrome", 1):
+            thread = threading.Thread(target=other_test)
+            thread.start()
+            assert not acquired.wait(0.2)
+        assert acquired.wait(2)
+        thread.join()
+
+    def test_engines_have_their_own_slots(self):
+        """Test that another engine's slots do not count"""
+        with engine_slot("chrome", 1), engine_slot("firefox", 1):
+            pass
+
+    def test_second_slot_is_used(self):
+        """Test that a limit of 2 lets two tests run at the same time"""
+        with engine_slot("chrome", 2), engine_slot("chrome", 2):
+            pass
+
+    def test_slot_released_after_failure(self):
+        """Test that a failing test gives its slot back"""
+        with pytest.raises(RuntimeError), engine_slot("chrome", 1):
+            raise RuntimeError("test failed")
+
+        with engine_slot("chrome", 1):
+            pass
+
+    def test_no_limit(self, tmp_path):
+        """Test that a limit of 0 takes no slot at all"""
+        with engine_slot("chrome", 0):
+            pass
+
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,280 @@
+"""
+Impact Map Tests
+Diff hunk parsing, symbol spans and test selection of utils/impact_map.py on
+fixed diff text, no browser needed
+"""
+
+import pytest
+
+from utils import impact_map
+from utils.impact_map import (
+    ImpactMap,
+    changed_lines,
+    changed_symbols,
+    symbol_spans,
+)
+
+MERGE_BASE = "0123abc"
+
+# pages/login_page.py after the change, the diffs below refer to its lines
+LOGIN_PAGE = '''"""Login page"""
+
+from pages.page_base import BasePage
+
+TIMEOUT = 5
+
+
+class LoginPage(BasePage):
+    """Login page"""
+
+    USERNAME_INPUT = ("id", "user-name")
+    SUBMIT_BUTTON = ("id", "login-button")
+    ERROR_MESSAGE = ("css selector", "h3[data-test='error']")
+
+    def login(self, username):
+        """Log in"""
+        self.type(self.USERNAME_INPUT, username)
+        self.click(self.SUBMIT_BUTTON)
+
+    def get_error_message(self):
+        """Error text"""
+        return self.get_text(self.ERROR_MESSAGE)
+
+    @property
+    def ready(self):
+        return self.wait(TIMEOUT)
+'''
+
+RENAMED_LOCATOR_DIFF = """\
+diff --git a/pages/login_page.py b/pages/login_page.py
+--- a/pages/login_page.py
++++ b/pages/login_page.py
+@@ -12 +12 @@ class LoginPage(BasePage):
+-    LOGIN_BUTTON = ("id", "login-button")
++    SUBMIT_BUTTON = ("id", "login-button")
+@@ -18 +18 @@ class LoginPage(BasePage):
+-        self.click(self.LOGIN_BUTTON)
++        self.click(self.SUBMIT_BUTTON)
+"""
+
+EDITED_METHOD_DIFF = """\
+diff --git a/pages/login_page.py b/pages/login_page.py
+--- a/pages/login_page.py
++++ b/pages/login_page.py
+@@ -22 +22 @@ class LoginPage(BasePage):
+-        return self.find_element(self.ERROR_MESSAGE).text
++        return self.get_text(self.ERROR_MESSAGE)
+"""
+
+MODULE_CONSTANT_DIFF = """\
+diff --git a/pages/login_page.py b/pages/login_page.py
+--- a/pages/login_page.py
++++ b/pages/login_page.py
+@@ -5 +5 @@ from pages.page_base import BasePage
+-TIMEOUT = 10
++TIMEOUT = 5
+"""
+
+IMPORT_DIFF = """\
+diff --git a/pages/login_page.py b/pages/login_page.py
+--- a/pages/login_page.py
++++ b/pages/login_page.py
+@@ -3 +3 @@
+-from pages.page_base import BasePage, any_of
++from pages.page_base import BasePage
+"""
+
+# Symbols recorded per test, see ImpactRecorder
+RECORDED = {
+    "tests/test_login.py::test_login": ["LoginPage.login", "LoginPage.SUBMIT_BUTTON"],
+    "tests/test_login.py::test_error": [
+        "LoginPage.login",
+        "LoginPage.get_error_message",
+    ],
+    "tests/test_login.py::test_ready": ["LoginPage.ready"],
+    "tests/test_products.py::test_sort": ["ProductsPage.sort_products"],
+}
+
+LOGIN_SYMBOLS = [
+    "LoginPage.ERROR_MESSAGE",
+    "LoginPage.SUBMIT_BUTTON",
+    "LoginPage.USERNAME_INPUT",
+    "LoginPage.get_error_message",
+    "LoginPage.login",
+    "LoginPage.ready",
+]
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """
+    Working tree with pages/login_page.py, returns change(paths, diff) which
+    makes git report paths as changed since MERGE_BASE with diff as the
+    -U0 diff of pages/login_page.py
+    """
+    (tmp_path / "pages").mkdir()
+    (tmp_path / "pages" / "login_page.py").write_text(LOGIN_PAGE, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    def change(paths, diff=""):
+        def fake_git(*args):
+            if args[0] == "merge-base":
+                return MERGE_BASE
+            if args[:2] == ("diff", "--name-only"):
+                return "\n".join(paths)
+            if args[:2] == ("diff", "-U0") and args[-1] == "pages/login_page.py":
+                return diff
+            return ""
+
+        monkeypatch.setattr(impact_map, "git", fake_git)
+        return changed_symbols("origin/main", module_names=("pages.login_page",))
+
+    return change
+
+
+def make_map():
+    """Impact map recorded with RECORDED"""
+    mapping = ImpactMap("impact.json")
+    mapping.tests = dict(RECORDED)
+    mapping.modules = {"pages/login_page.py": LOGIN_SYMBOLS}
+    return mapping
+
+
+@pytest.mark.unit
+class TestDiffParsing:
+    """Test suite for hunk headers and symbol spans"""
+
+    @pytest.mark.parametrize(
+        "hunk, expected",
+        [
+            ("@@ -10 +12 @@", {12}),
+            ("@@ -3,0 +4,2 @@ def login(self):", {4, 5}),
+            ("@@ -7,2 +6,0 @@", {6, 7}),
+        ],
+        ids=["one-line", "insertion", "deletion"],
+    )
+    def test_changed_lines(self, monkeypatch, hunk, expected):
+        """Test that hunk headers give the changed lines of the new file"""
+        diff = f"--- a/x.py\n+++ b/x.py\n{hunk}\n-old\n+new\n"
+        monkeypatch.setattr(impact_map, "git", lambda *args: diff)
+
+        assert changed_lines(MERGE_BASE, "x.py") == expected
+
+    def test_changed_lines_without_diff(self, monkeypatch):
+        """Test that a failing git diff gives no changed lines"""
+        monkeypatch.setattr(impact_map, "git", lambda *args: None)
+
+        assert changed_lines(MERGE_BASE, "x.py") == set()
+
+    def test_symbol_spans(self):
+        """Test that spans cover decorators and docstrings map to None"""
+        spans = {
+            symbol: (first, last)
+            for symbol, first, last in symbol_spans(LOGIN_PAGE, "pages.login_page")
+        }
+
+        assert spans[None] == (9, 9)
+        assert spans["login_page.TIMEOUT"] == (5, 5)
+        assert spans["LoginPage.SUBMIT_BUTTON"] == (12, 12)
+        assert spans["LoginPage.login"] == (15, 18)
+        assert spans["LoginPage.ready"] == (24, 26)
+
+
+@pytest.mark.unit
+class TestChangedSymbols:
+    """Test suite for changed symbols and the tests they select"""
+
+    def test_renamed_locator(self, repo):
+        """Test that a renamed locator selects the tests of its users"""
+        changes = repo(["pages/login_page.py"], RENAMED_LOCATOR_DIFF)
+
+        assert changes["base"] == MERGE_BASE
+        assert changes["symbols"] == ["LoginPage.SUBMIT_BUTTON", "LoginPage.login"]
+        assert changes["full_run"] is None
+
+        selected, _ = make_map().affected(list(RECORDED), changes)
+        assert selected == [
+            "tests/test_login.py::test_login",
+            "tests/test_login.py::test_error",
+        ]
+
+    def test_edited_method_body(self, repo):
+        """Test that an edited method selects only the tests calling it"""
+        changes = repo(["pages/login_page.py"], EDITED_METHOD_DIFF)
+
+        assert changes["symbols"] == ["LoginPage.get_error_message"]
+
+        selected, _ = make_map().affected(list(RECORDED), changes)
+        assert selected == ["tests/test_login.py::test_error"]
+
+    def test_module_constant_selects_its_users(self, repo):
+        """Test that methods using a changed module constant count as changed"""
+        changes = repo(["pages/login_page.py"], MODULE_CONSTANT_DIFF)
+
+        assert changes["symbols"] == ["LoginPage.ready", "login_page.TIMEOUT"]
+
+        selected, _ = make_map().affected(list(RECORDED), changes)
+        assert selected == ["tests/test_login.py::test_ready"]
+
+    def test_module_level_code_changes_every_symbol(self, repo):
+        """Test that an import change selects every test of the module"""
+        changes = repo(["pages/login_page.py"], IMPORT_DIFF)
+
+        assert changes["modules"] == ["pages/login_page.py"]
+
+        selected, _ = make_map().affected(list(RECORDED), changes)
+        assert "tests/test_products.py::test_sort" not in selected
+        assert len(selected) == 3
+
+    def test_new_test_file(self, repo):
+        """Test that the tests of a new test file are selected"""
+        changes = repo(["tests/test_cart.py"])
+        nodeids = list(RECORDED) + ["tests/test_cart.py::test_add"]
+
+        selected, _ = make_map().affected(nodeids, changes)
+
+        assert changes["test_files"] == ["tests/test_cart.py"]
+        assert selected == ["tests/test_cart.py::test_add"]
+
+    def test_tests_missing_from_the_map_are_selected(self, repo):
+        """Test that tests the map does not know run on any change"""
+        changes = repo(["pages/login_page.py"], EDITED_METHOD_DIFF)
+
+        selected, notes = make_map().affected(
+            list(RECORDED) + ["tests/test_login.py::test_new"], changes
+        )
+
+        assert "tests/test_login.py::test_new" in selected
+        assert "1 tests not in the impact map, selected" in notes
+
+    @pytest.mark.parametrize(
+        "path",
+        ["utils/driver_factory.py", "requirements.txt", "pages/cart_page.py"],
+        ids=["python-module", "full-run-file", "new-page-module"],
+    )
+    def test_unmapped_file_runs_everything(self, repo, path):
+        """Test that a change no recorded symbol covers runs every test"""
+        changes = repo(["pages/login_page.py", path], EDITED_METHOD_DIFF)
+
+        assert changes["full_run"] == path
+        selected, notes = make_map().affected(list(RECORDED), changes)
+        assert selected == list(RECORDED)
+        assert notes == [f"{path} changed, running all"]
+
+    def test_unrecorded_page_module_runs_everything(self, repo):
+        """Test that a page module missing from the map runs every test"""
+        changes = repo(["pages/login_page.py"], EDITED_METHOD_DIFF)
+        mapping = make_map()
+        mapping.modules = {}
+
+        selected, _ = mapping.affected(list(RECORDED), changes)
+
+        assert selected == list(RECORDED)
+
+    def test_blank_line_change(self, repo):
+        """Test that a blank line added between symbols selects nothing"""
+        diff = "@@ -6,0 +7 @@\n+\n"
+        changes = repo(["pages/login_page.py"], diff)
+
+        assert changes["symbols"] == []
+        assert changes["modules"] == []
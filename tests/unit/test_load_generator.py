@@ -0,0 +1,213 @@
+"""
+Load Generator Tests
+Throughput, error rate and latency summaries and the saturation search of
+utils/load_generator.py on synthetic results, no browser needed
+"""
+
+import pytest
+
+from config.config import SATURATION_MAX_ERROR_RATE, SATURATION_MIN_EFFICIENCY
+from utils import load_generator
+from utils.load_generator import (
+    PERCENTILES,
+    STEPS,
+    LoadGenerator,
+    LoadStats,
+    find_saturation,
+    format_report,
+)
+
+
+def make_stats(checkouts=(), steps=()):
+    """LoadStats with (at, ok) checkouts and (at, step, seconds) steps"""
+    stats = LoadStats()
+    stats.checkouts.extend(checkouts)
+    stats.steps.extend(steps)
+    return stats
+
+
+def steady_report(users, checkouts_per_minute, error_rate=0.0):
+    """Report of a LoadGenerator stage with the given steady state"""
+    summary = {
+        "seconds": 60.0,
+        "checkouts": int(checkouts_per_minute),
+        "failed": 0,
+        "checkouts_per_minute": checkouts_per_minute,
+        "error_rate": error_rate,
+        "latency_ms": {
+            step: {f"p{pct}": 100.0 for pct in PERCENTILES} for step in STEPS
+        },
+    }
+    return {
+        "users": users,
+        "ramp_up": 10.0,
+        "duration": 70.0,
+        "overall": summary,
+        "steady": summary,
+        "errors": {},
+        "host": {"cpus": 4, "load_per_cpu": 0.5, "available_memory_mb": 2048},
+    }
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """
+    Replaces LoadGenerator with stages driven by a table of users ->
+    (checkouts per minute, error rate), returns the table and the runs
+    """
+    table = {}
+    runs = []
+
+    class FakeLoadGenerator:
+        def __init__(self, factory, users, **options):
+            self.users = users
+            runs.append((users, options))
+
+        def run(self):
+            return steady_report(self.users, *table[self.users])
+
+    monkeypatch.setattr(load_generator, "LoadGenerator", FakeLoadGenerator)
+    return table, runs
+
+
+@pytest.mark.unit
+class TestLoadStats:
+    """Test suite for the load summary"""
+
+    def test_throughput_and_error_rate(self):
+        """Test that checkouts per minute and errors come from the window"""
+        stats = make_stats(
+            checkouts=[(10, True), (20, True), (30, False), (40, True), (200, True)]
+        )
+
+        summary = stats.summary(0, 60)
+
+        assert summary["checkouts"] == 3
+        assert summary["failed"] == 1
+        assert summary["checkouts_per_minute"] == 3.0
+        assert summary["error_rate"] == 0.25
+        assert summary["seconds"] == 60
+
+    def test_window_bounds_are_inclusive(self):
+        """Test that results exactly at since and until count"""
+        stats = make_stats(checkouts=[(5, True), (10, True), (15, True), (16, True)])
+
+        assert stats.summary(5, 15)["checkouts"] == 3
+
+    def test_step_percentiles(self):
+        """Test that step latencies are reported in ms per step"""
+        steps = [
+            (i, "login", seconds) for i, seconds in enumerate([0.1, 0.2, 0.3, 1.0])
+        ]
+        stats = make_stats(steps=steps + [(1, "checkout", 0.5)])
+
+        latency = stats.summary(0, 60)["latency_ms"]
+
+        assert latency["login"]["p50"] == 200.0
+        assert latency["login"]["p99"] == 1000.0
+        assert latency["login"]["count"] == 4
+        assert latency["checkout"]["p90"] == 500.0
+        assert latency["add_to_cart"] == {
+            **{f"p{pct}": None for pct in PERCENTILES},
+            "count": 0,
+        }
+
+    def test_empty_window(self):
+        """Test that a window without results has no errors and no throughput"""
+        summary = make_stats(checkouts=[(100, False)]).summary(0, 60)
+
+        assert summary["checkouts_per_minute"] == 0.0
+        assert summary["error_rate"] == 0.0
+
+    def test_record(self):
+        """Test that recorded results land in the window and errors are counted"""
+        stats = LoadStats()
+        stats.record_step("login", 0.25)
+        stats.record_checkout(True)
+        stats.record_checkout(False, error="StepFailed: checkout failed")
+        stats.record_checkout(False, error="StepFailed: checkout failed")
+
+        summary = stats.summary(0, float("inf"))
+
+        assert summary["failed"] == 2
+        assert summary["latency_ms"]["login"]["count"] == 1
+        assert stats.errors == {"StepFailed: checkout failed": 2}
+
+    def test_format_report(self):
+        """Test that the report lines show users, throughput and latencies"""
+        lines = format_report(steady_report(4, 12.0))
+
+        assert lines[0] == "4 users, 70s (10s ramp-up)"
+        assert lines[1] == "Throughput: 12.0 checkouts/min steady, 12.0 overall"
+        assert lines[2] == "Error rate: 0.0% (0 of 12)"
+        assert lines[-1].startswith("Host: load 0.5 per CPU (4 CPUs)")
+
+    def test_ramp_up_shorter_than_duration(self):
+        """Test that a ramp-up as long as the run is rejected"""
+        with pytest.raises(ValueError, match="ramp_up"):
+            LoadGenerator(factory=None, ramp_up=60, duration=60)
+
+
+@pytest.mark.unit
+class TestFindSaturation:
+    """Test suite for the saturation search"""
+
+    def test_throughput_stops_growing(self, stages):
+        """Test that the stage adding too little throughput is the saturation"""
+        table, runs = stages
+        table.update({1: (10.0, 0.0), 2: (19.0, 0.0), 3: (22.0, 0.0), 4: (23.0, 0.0)})
+
+        reports, saturated = find_saturation(None, max_users=4, duration=30)
+
+        # 2 users: 9 of 10 per user (0.9), 3 users: 3 of 9.5 (0.32)
+        assert SATURATION_MIN_EFFICIENCY > 0.32
+        assert saturated == 3
+        assert [report["users"] for report in reports] == [1, 2, 3]
+        assert reports[1]["efficiency"] == 0.9
+        assert runs == [
+            (1, {"duration": 30}),
+            (2, {"duration": 30}),
+            (3, {"duration": 30}),
+        ]
+
+    def test_error_rate_saturates(self, stages):
+        """Test that too many errors saturate even with growing throughput"""
+        table, _ = stages
+        table.update({1: (10.0, 0.0), 2: (20.0, SATURATION_MAX_ERROR_RATE + 0.01)})
+
+        reports, saturated = find_saturation(None, max_users=4)
+
+        assert saturated == 2
+        assert len(reports) == 2
+
+    def test_max_users_reached(self, stages):
+        """Test that linear scaling up to max_users finds no saturation"""
+        table, _ = stages
+        table.update({users: (10.0 * users, 0.0) for users in range(1, 5)})
+
+        reports, saturated = find_saturation(None, max_users=4)
+
+        assert saturated is None
+        assert [report["efficiency"] for report in reports[1:]] == [1.0, 1.0, 1.0]
+
+    def test_step_users(self, stages):
+        """Test that stages grow by step_users and efficiency is per added user"""
+        table, runs = stages
+        table.update({2: (20.0, 0.0), 4: (30.0, 0.0), 6: (60.0, 0.0)})
+
+        reports, saturated = find_saturation(None, max_users=6, step_users=2)
+
+        # 4 users add 10 of the 20 two more users at 10 per user would add,
+        # exactly SATURATION_MIN_EFFICIENCY, which is not saturated yet
+        assert reports[1]["efficiency"] == SATURATION_MIN_EFFICIENCY == 0.5
+        assert saturated is None
+        assert [users for users, _ in runs] == [2, 4, 6]
+
+    def test_no_throughput(self, stages):
+        """Test that a stage after one without checkouts counts as saturated"""
+        table, _ = stages
+        table.update({1: (0.0, 0.0), 2: (0.0, 0.0)})
+
+        _, saturated = find_saturation(None, max_users=2)
+
+        assert saturated == 2
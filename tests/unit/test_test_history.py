@@ -0,0 +1,253 @@
+"""
+Test History Tests
+Shard balancing, ordering and flake rates of utils/test_history.py, no
+browser needed
+"""
+
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from config.config import DEFAULT_TEST_DURATION, FLAKE_MIN_RUNS, HISTORY_OUTCOMES
+from utils.test_history import (
+    HISTORY_VERSION,
+    TestHistory,
+    balance_shards,
+    expected_total,
+    parse_shard,
+    sorted_longest_first,
+)
+
+
+def make_items(*nodeids):
+    """Stand-ins for pytest items, only the node id is used"""
+    return [SimpleNamespace(nodeid=nodeid) for nodeid in nodeids]
+
+
+def make_history(tmp_path, durations):
+    """History with one passed run of every test in durations"""
+    history = TestHistory(str(tmp_path / "history.json"))
+    for nodeid, duration in durations.items():
+        history.record(nodeid, duration, "passed")
+    return history
+
+
+def nodeids(items):
+    return [item.nodeid for item in items]
+
+
+@pytest.mark.unit
+class TestShards:
+    """Test suite for shard balancing"""
+
+    def test_longest_processing_time_first(self, tmp_path):
+        """Test that each test goes to the shard with the least time so far"""
+        history = make_history(tmp_path, {"a": 10, "b": 7, "c": 6, "d": 5, "e": 4})
+        items = make_items("a", "b", "c", "d", "e")
+
+        shards = balance_shards(items, 2, history)
+
+        # a -> 0 (10), b -> 1 (7), c -> 1 (13), d -> 0 (15), e -> 1 (17)
+        assert [nodeids(shard) for shard in shards] == [["a", "d"], ["b", "c", "e"]]
+        assert [expected_total(shard, history) for shard in shards] == [15, 17]
+
+    def test_shards_keep_collection_order(self, tmp_path):
+        """Test that the tests of a shard run in collection order"""
+        history = make_history(tmp_path, {"a": 1, "b": 2, "c": 3, "d": 4})
+        items = make_items("a", "b", "c", "d")
+
+        shards = balance_shards(items, 2, history)
+
+        assert [nodeids(shard) for shard in shards] == [["a", "d"], ["b", "c"]]
+
+    def test_every_test_in_exactly_one_shard(self, tmp_path):
+        """Test that shards split the items without loss or duplicates"""
+        history = make_history(tmp_path, {f"t{i}": i % 4 + 1 for i in range(11)})
+        items = make_items(*(f"t{i}" for i in range(11)))
+
+        shards = balance_shards(items, 3, history)
+
+        assert sorted(n for shard in shards for n in nodeids(shard)) == sorted(
+            nodeids(items)
+        )
+
+    def test_equal_durations_split_the_same_everywhere(self, tmp_path):
+        """Test that ties are broken by node id, not by collection order"""
+        history = make_history(tmp_path, {"a": 1, "b": 1, "c": 1, "d": 1})
+
+        forward = balance_shards(make_items("a", "b", "c", "d"), 2, history)
+        backward = balance_shards(make_items("d", "c", "b", "a"), 2, history)
+
+        assert [sorted(nodeids(s)) for s in forward] == [["a", "c"], ["b", "d"]]
+        assert [sorted(nodeids(s)) for s in backward] == [["a", "c"], ["b", "d"]]
+
+    def test_more_shards_than_tests(self, tmp_path):
+        """Test that surplus shards are empty"""
+        history = make_history(tmp_path, {"a": 1})
+
+        shards = balance_shards(make_items("a"), 3, history)
+
+        assert [nodeids(shard) for shard in shards] == [["a"], [], []]
+
+    @pytest.mark.parametrize(
+        "value, expected", [("1/1", (1, 1)), ("2/4", (2, 4)), ("4/4", (4, 4))]
+    )
+    def test_parse_shard(self, value, expected):
+        """Test that i/n is parsed into a 1-based index and a count"""
+        assert parse_shard(value) == expected
+
+    @pytest.mark.parametrize("value", ["0/4", "5/4", "1/0", "2", "a/b", "1/2/3"])
+    def test_parse_invalid_shard(self, value):
+        """Test that shards outside 1..n or not i/n are rejected"""
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+@pytest.mark.unit
+class TestOrdering:
+    """Test suite for the expected durations of known and unknown tests"""
+
+    def test_unknown_test_takes_the_median(self, tmp_path):
+        """Test that a test without history is expected to take the median"""
+        history = make_history(tmp_path, {"a": 1, "b": 4, "c": 9})
+
+        assert history.expected_duration("new") == 4
+
+    def test_unknown_test_without_any_history(self, tmp_path):
+        """Test that an empty history falls back to DEFAULT_TEST_DURATION"""
+        history = TestHistory(str(tmp_path / "history.json"))
+
+        assert history.expected_duration("new") == DEFAULT_TEST_DURATION
+
+    def test_unknown_tests_sorted_between_known_ones(self, tmp_path):
+        """Test that unknown tests are ordered by the median, ties by node id"""
+        history = make_history(tmp_path, {"slow": 9, "mid": 4, "fast": 1})
+        items = make_items("fast", "new_b", "slow", "new_a", "mid")
+
+        ordered = sorted_longest_first(items, history)
+
+        assert nodeids(ordered) == ["slow", "mid", "new_a", "new_b", "fast"]
+
+    def test_skipped_run_keeps_the_duration(self, tmp_path):
+        """Test that a skipped run does not change the expected duration"""
+        history = make_history(tmp_path, {"a": 8})
+
+        history.record("a", 0.01, "skipped")
+
+        assert history.expected_duration("a") == 8
+
+    def test_duration_is_smoothed(self, tmp_path):
+        """Test that one slow run moves the expected duration only partly"""
+        history = make_history(tmp_path, {"a": 10})
+
+        history.record("a", 20, "passed")
+
+        assert 10 < history.expected_duration("a") < 20
+
+
+@pytest.mark.unit
+class TestFlakeRate:
+    """Test suite for flake rates over the outcome window"""
+
+    def record(self, history, outcomes, nodeid="t"):
+        for outcome in outcomes:
+            history.record(nodeid, 1.0, outcome)
+
+    def test_no_rate_below_minimum_runs(self, tmp_path):
+        """Test that too few runs give no flake rate"""
+        history = TestHistory(str(tmp_path / "history.json"))
+        self.record(history, ["flaky"] * (FLAKE_MIN_RUNS - 1))
+
+        assert history.flake_rate("t") is None
+        assert history.flake_rate("unknown") is None
+
+    def test_rate_of_recent_runs(self, tmp_path):
+        """Test that the rate is the share of runs that needed a rerun"""
+        history = TestHistory(str(tmp_path / "history.json"))
+        self.record(history, ["passed", "flaky", "passed", "failed", "flaky"])
+
+        assert history.flake_rate("t") == pytest.approx(2 / 5)
+
+    def test_skips_do_not_count(self, tmp_path):
+        """Test that skipped runs are left out of the rate"""
+        history = TestHistory(str(tmp_path / "history.json"))
+        self.record(history, ["flaky", "skipped", "passed"] * 3)
+
+        assert history.flake_rate("t") == pytest.approx(3 / 6)
+
+    def test_old_flakes_leave_the_window(self, tmp_path):
+        """Test that only the last HISTORY_OUTCOMES runs count"""
+        history = TestHistory(str(tmp_path / "history.json"))
+        self.record(history, ["flaky"] * HISTORY_OUTCOMES)
+        assert history.flake_rate("t") == 1.0
+
+        self.record(history, ["passed"] * (HISTORY_OUTCOMES - 1))
+
+        assert len(history.tests["t"]["outcomes"]) == HISTORY_OUTCOMES
+        assert history.flake_rate("t") == pytest.approx(1 / HISTORY_OUTCOMES)
+
+    def test_flaky_tests_at_threshold(self, tmp_path):
+        """Test that tests at or above the threshold are reported"""
+        history = TestHistory(str(tmp_path / "history.json"))
+        self.record(history, ["flaky", "passed", "passed", "passed", "passed"], "a")
+        self.record(history, ["flaky", "flaky", "passed", "passed", "passed"], "b")
+        self.record(history, ["flaky"] * (FLAKE_MIN_RUNS - 1), "c")
+
+        assert history.flaky_tests(0.4) == {"b": pytest.approx(0.4)}
+        assert set(history.flaky_tests(0.2)) == {"a", "b"}
+
+
+@pytest.mark.unit
+class TestHistoryFile:
+    """Test suite for loading and saving the history file"""
+
+    def test_round_trip(self, tmp_path):
+        """Test that a saved history loads with the same entries"""
+        path = str(tmp_path / "sub" / "history.json")
+        history = TestHistory(path)
+        history.record("a", 2.5, "passed")
+        history.record("a", 2.5, "flaky")
+        history.save()
+
+        loaded = TestHistory.load(path)
+
+        assert loaded.tests == history.tests
+        assert list(tmp_path.joinpath("sub").iterdir()) == [tmp_path / path]
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing file gives an empty history"""
+        history = TestHistory.load(str(tmp_path / "missing.json"))
+
+        assert history.tests == {}
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "{not json",
+            "[1, 2]",
+            json.dumps({"version": HISTORY_VERSION}),
+        ],
+        ids=["invalid-json", "not-an-object", "no-tests"],
+    )
+    def test_corrupt_file(self, tmp_path, caplog, content):
+        """Test that an unreadable file is ignored with a warning"""
+        path = tmp_path / "history.json"
+        path.write_text(content, encoding="utf-8")
+
+        with caplog.at_level(logging.WARNING):
+            history = TestHistory.load(str(path))
+
+        assert history.tests == {}
+        assert "Ignoring unreadable test history" in caplog.text
+
+    def test_other_version(self, tmp_path):
+        """Test that a history of another format version is not used"""
+        path = tmp_path / "history.json"
+        path.write_text(
+            json.dumps({"version": HISTORY_VERSION + 1, "tests": {"a": {}}}),
+            encoding="utf-8",
+        )
+
+        assert TestHistory.load(str(path)).tests == {}
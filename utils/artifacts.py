@@ -0,0 +1,227 @@
+"""
+Failure artifacts
+Captures screenshot, page source and browser console of a failed test and
+writes them from a background thread, with a retention limit across runs
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zipfile
+from datetime import datetime
+
+from selenium.common.exceptions import WebDriverException
+
+from config.config import (
+    ARTIFACT_DIR,
+    ARTIFACT_MAX_COUNT,
+    ARTIFACT_MAX_MB,
+    ARTIFACT_QUEUE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class FailureCapture:
+    """Everything read from the browser for one failed test"""
+
+    def __init__(self, test_name, url, screenshot, page_source, console):
+        self.test_name = test_name
+        self.url = url
+        self.screenshot = screenshot
+        self.page_source = page_source
+        self.console = console
+        self.captured_at = datetime.now()
+
+
+class ArtifactWriter:
+    """
+    Background writer for failure artifacts
+
+    capture() reads the browser state in the test thread (the browser is only
+    available there) and queues it. A daemon thread compresses every capture
+    into one zip file and then enforces the retention limits on root (all
+    artifacts, e.g. of every xdist worker, defaults to directory).
+    When the queue is full the capture is dropped instead of blocking the test.
+    """
+
+    def __init__(
+        self,
+        directory=ARTIFACT_DIR,
+        root=None,
+        max_count=ARTIFACT_MAX_COUNT,
+        max_mb=ARTIFACT_MAX_MB,
+        queue_size=ARTIFACT_QUEUE_SIZE,
+    ):
+        self.directory = directory
+        self.root = root or directory
+        self.max_count = max_count
+        self.max_bytes = max_mb * 1024 * 1024
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self.stats = {
+            "captured": 0,
+            "capture_seconds": 0.0,
+            "written": 0,
+            "write_seconds": 0.0,
+            "bytes": 0,
+            "dropped": 0,
+            "removed": 0,
+        }
+
+    def capture(self, driver, test_name, since=None):
+        """
+        Read screenshot, page source and console logs and queue them for writing
+
+        Args:
+            driver: WebDriver of the failed test
+            test_name (str): pytest node id
+            since (float): Epoch seconds, older console entries (e.g. from
+                earlier tests in a pooled browser) are left out
+
+        Returns:
+            FailureCapture: The captured data, None if the browser was unusable
+        """
+        start = time.perf_counter()
+        try:
+            capture = FailureCapture(
+                test_name=test_name,
+                url=driver.current_url,
+                screenshot=driver.get_screenshot_as_png(),
+                page_source=driver.page_source,
+                console=_console_logs(driver, since),
+            )
+        except WebDriverException as e:
+            logger.error(f"Failed to capture failure artifacts: {e}")
+            return None
+        finally:
+            self.stats["capture_seconds"] += time.perf_counter() - start
+
+        self.stats["captured"] += 1
+        self._start()
+        try:
+            self._queue.put_nowait(capture)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            logger.warning(f"Artifact queue full, dropped artifacts of {test_name}")
+        return capture
+
+    def close(self, timeout=30):
+        """Write the remaining captures and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Artifact writer still busy after {timeout}s")
+        self._thread = None
+
+    @staticmethod
+    def format_stats(stats):
+        """
+        Human readable summary of what the captures cost
+
+        Args:
+            stats (dict): ArtifactWriter.stats, possibly added up over xdist
+                workers
+        """
+        return (
+            f"Failure artifacts: {stats['captured']} captured in "
+            f"{stats['capture_seconds']:.2f}s (test time), {stats['written']} "
+            f"written in {stats['write_seconds']:.2f}s (background, "
+            f"{stats['bytes'] / 1024:.0f} KB), {stats['dropped']} dropped, "
+            f"{stats['removed']} old artifacts removed"
+        )
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="artifact-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            capture = self._queue.get()
+            if capture is None:
+                return
+            start = time.perf_counter()
+            try:
+                path = self._write(capture)
+                self._apply_retention()
+            except OSError as e:
+                logger.error(f"Failed to write artifacts of {capture.test_name}: {e}")
+                continue
+            finally:
+                self.stats["write_seconds"] += time.perf_counter() - start
+            self.stats["written"] += 1
+            logger.info(f"Failure artifacts saved: {path}")
+
+    def _write(self, capture):
+        os.makedirs(self.directory, exist_ok=True)
+        clean_name = capture.test_name.replace("::", "_").replace("/", "_")
+        timestamp = capture.captured_at.strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(self.directory, f"{clean_name}_{timestamp}.zip")
+
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            # PNG is already compressed, deflating it again only costs CPU
+            archive.writestr(
+                "screenshot.png", capture.screenshot, compress_type=zipfile.ZIP_STORED
+            )
+            archive.writestr("page.html", capture.page_source)
+            archive.writestr("console.json", json.dumps(capture.console, indent=1))
+            archive.writestr(
+                "meta.json",
+                json.dumps(
+                    {
+                        "test": capture.test_name,
+                        "url": capture.url,
+                        "captured_at": capture.captured_at.isoformat(),
+                    },
+                    indent=1,
+                ),
+            )
+
+        self.stats["bytes"] += os.path.getsize(path)
+        return path
+
+    def _apply_retention(self):
+        """Delete the oldest artifacts beyond max_count files or max_mb in total"""
+        artifacts = []
+        for root, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith(".zip"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except FileNotFoundError:  # removed by another worker
+                    continue
+                artifacts.append((info.st_mtime, info.st_size, path))
+
+        artifacts.sort(reverse=True)
+        total = 0
+        for position, (_, size, path) in enumerate(artifacts):
+            total += size
+            if position < self.max_count and total <= self.max_bytes:
+                continue
+            try:
+                os.remove(path)
+                self.stats["removed"] += 1
+            except FileNotFoundError:
+                pass
+
+
+def _console_logs(driver, since=None):
+    """Browser console entries, empty where unsupported"""
+    try:
+        entries = driver.get_log("browser")
+    except (AttributeError, WebDriverException):
+        # Firefox has no log endpoint
+        return []
+    if since is not None:
+        entries = [e for e in entries if e.get("timestamp", 0) >= since * 1000]
+    return entries
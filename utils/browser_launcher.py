@@ -0,0 +1,264 @@
+"""
+Browser launcher
+Keeps fresh browsers launched ahead of time and quits used ones in the
+background, for runs that give every test a new browser (--isolation=test)
+"""
+
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import WebDriverException
+
+from config.config import PREWARM_BROWSERS, QUIT_GRACE, QUIT_TIMEOUT
+from utils import processes
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two watchdog sweeps
+WATCHDOG_INTERVAL = 1.0
+
+
+class BrowserLauncher:
+    """
+    Pipeline of fresh browsers
+
+    acquire() hands out a browser launched in the background while the
+    previous test ran (falling back to a launch on the spot) and immediately
+    starts launching its replacement. quit_async() quits a browser on another
+    thread; a watchdog kills the browser's process tree when quitting hangs
+    for longer than quit_timeout or leaves processes behind for longer than
+    quit_grace after the quit.
+    """
+
+    def __init__(
+        self,
+        factory,
+        prewarm=PREWARM_BROWSERS,
+        quit_timeout=QUIT_TIMEOUT,
+        quit_grace=QUIT_GRACE,
+    ):
+        """
+        Args:
+            factory (callable): factory(browser, **options) -> WebDriver
+            prewarm (int): Browsers kept ready per browser/options combination
+            quit_timeout (float): Seconds a quit may take before the browser
+                processes are killed
+            quit_grace (float): Seconds the processes of a finished quit get
+                to exit on their own
+        """
+        self.factory = factory
+        self.prewarm = prewarm
+        self.quit_timeout = quit_timeout
+        self.quit_grace = quit_grace
+        self._ready = {}
+        self._launcher = ThreadPoolExecutor(
+            max_workers=max(1, prewarm), thread_name_prefix="browser-launch"
+        )
+        self._quitter = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="browser-quit"
+        )
+        self._quits = []
+        self._lock = threading.Lock()
+        # Counters are updated from the test, prewarm and quit threads
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watchdog = None
+        self.stats = {
+            "prewarmed": 0,
+            "cold": 0,
+            "hidden_launch_seconds": 0.0,
+            "blocked_launch_seconds": 0.0,
+            "quits": 0,
+            "hidden_quit_seconds": 0.0,
+            "killed": 0,
+        }
+
+    def acquire(self, browser, **options):
+        """
+        Return a fresh browser, prewarmed if one is ready
+
+        Args:
+            browser (str): Browser name: chrome, firefox
+            **options: Extra factory arguments, e.g. fast=True
+        """
+        key = (browser, tuple(sorted(options.items())))
+        ready = self._ready.setdefault(key, collections.deque())
+
+        driver = None
+        if ready:
+            start = time.perf_counter()
+            try:
+                driver, launch_seconds = ready.popleft().result()
+            except Exception as e:
+                logger.warning(
+                    f"Prewarmed {browser} browser failed to start: {e}", exc_info=True
+                )
+            else:
+                waited = time.perf_counter() - start
+                self._count(
+                    prewarmed=1,
+                    hidden_launch_seconds=max(0.0, launch_seconds - waited),
+                    blocked_launch_seconds=waited,
+                )
+                logger.debug(
+                    f"Using prewarmed {browser} browser (waited {waited:.2f}s)"
+                )
+
+        if driver is None:
+            start = time.perf_counter()
+            driver = self.factory(browser, **options)
+            self._count(cold=1, blocked_launch_seconds=time.perf_counter() - start)
+
+        while len(ready) < self.prewarm:
+            ready.append(self._launcher.submit(self._launch, browser, options))
+        return driver
+
+    def quit_async(self, driver):
+        """Quit a browser in the background, the caller never waits"""
+        root_pid = processes.driver_root_pid(driver)
+        tree = []
+        if root_pid is not None:
+            # Recorded now, once the driver is gone the browser processes
+            # would be re-parented and could not be found any more
+            tree = [
+                (pid, processes.start_time(pid))
+                for pid in processes.process_tree(root_pid)
+            ]
+
+        future = self._quitter.submit(self._quit, driver)
+        with self._lock:
+            self._quits.append(
+                (future, tree, time.monotonic() + self.quit_timeout, None)
+            )
+        self._start_watchdog()
+
+    def close(self):
+        """Quit prewarmed and pending browsers, kill whatever is left behind"""
+        for ready in self._ready.values():
+            for future in ready:
+                if future.cancel():
+                    continue
+                try:
+                    driver, _ = future.result()
+                except Exception as e:
+                    logger.debug(
+                        f"Prewarmed browser failed to start: {e}", exc_info=True
+                    )
+                    continue
+                self.quit_async(driver)
+        self._ready.clear()
+        self._launcher.shutdown(wait=True)
+
+        # Wait for the quits, the watchdog handles the ones that hang
+        with self._lock:
+            pending = list(self._quits)
+        for future, _, deadline, _ in pending:
+            try:
+                future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception as e:
+                logger.debug(f"Background quit unfinished: {e!r}", exc_info=True)
+        self._reap(final=True)
+        self._stop.set()
+        self._quitter.shutdown(wait=False)
+
+    def stats_snapshot(self):
+        """Copy of the counters, consistent while quit threads still count"""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    @staticmethod
+    def format_stats(stats):
+        """
+        Human readable summary of the launch and quit time kept off the tests
+
+        Args:
+            stats (dict): stats_snapshot(), possibly added up over xdist
+                workers
+        """
+        return (
+            f"Browser launcher: {stats['prewarmed']} prewarmed, {stats['cold']} "
+            f"launched on demand, {stats['hidden_launch_seconds']:.2f}s launch "
+            f"time hidden, {stats['blocked_launch_seconds']:.2f}s waited; "
+            f"{stats['quits']} quit in background "
+            f"({stats['hidden_quit_seconds']:.2f}s hidden), "
+            f"{stats['killed']} orphaned processes killed"
+        )
+
+    def _launch(self, browser, options):
+        start = time.perf_counter()
+        driver = self.factory(browser, **options)
+        return driver, time.perf_counter() - start
+
+    def _quit(self, driver):
+        start = time.perf_counter()
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            logger.debug(f"Error while quitting browser: {e}")
+        self._count(quits=1, hidden_quit_seconds=time.perf_counter() - start)
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def _start_watchdog(self):
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(
+                target=self._watch, name="browser-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    def _watch(self):
+        while not self._stop.wait(WATCHDOG_INTERVAL):
+            self._reap()
+
+    def _reap(self, final=False):
+        """
+        Check finished or overdue quits and kill processes they left alive
+
+        Processes of a finished quit get quit_grace seconds, counted from the
+        sweep that first sees the quit done, to exit on their own. A quit
+        still running after quit_timeout is killed right away.
+
+        Args:
+            final (bool): Treat every pending quit as overdue, waiting out
+                the grace of finished ones here
+        """
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            pending = []
+            for future, tree, deadline, grace_until in self._quits:
+                if future.done():
+                    if grace_until is None:
+                        grace_until = now + self.quit_grace
+                    if final or now > grace_until:
+                        due.append((tree, grace_until))
+                        continue
+                elif final or now > deadline:
+                    due.append((tree, None))
+                    continue
+                pending.append((future, tree, deadline, grace_until))
+            self._quits = pending
+
+        for tree, grace_until in due:
+            if grace_until is None:
+                logger.warning("Browser quit is hanging, killing its processes")
+            else:
+                self._wait_for_exit(tree, grace_until)
+            for pid, started in tree:
+                if processes.is_alive(pid, started) and processes.kill(pid):
+                    self._count(killed=1)
+                    logger.warning(f"Killed orphaned browser process {pid}")
+
+    @staticmethod
+    def _wait_for_exit(tree, until):
+        """Wait until the processes of tree are gone, at most until `until`"""
+        while time.monotonic() < until and any(
+            processes.is_alive(pid, started) for pid, started in tree
+        ):
+            time.sleep(0.1)
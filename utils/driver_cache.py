@@ -0,0 +1,233 @@
+"""
+Driver binary cache
+Resolves chromedriver/geckodriver once and reuses the result from a lockfile
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import ChromeType, OperationSystemManager
+from webdriver_manager.firefox import GeckoDriverManager
+
+from config.config import DRIVER_CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows - workers may resolve concurrently, which is harmless
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOCK_FILE = "drivers.lock.json"
+
+DRIVER_MANAGERS = {
+    "chrome": ChromeDriverManager,
+    "firefox": GeckoDriverManager,
+}
+
+BROWSER_TYPES = {
+    "chrome": ChromeType.GOOGLE,
+    "firefox": "firefox",
+}
+
+# Keys every lock entry needs to be verified
+LOCK_ENTRY_KEYS = ("path", "browser_version", "sha256")
+
+# Resolutions done by this process, keyed by browser
+_resolved = {}
+
+# Diagnostics for the current process (plus finished xdist workers on the
+# controller, see merge_stats()). A lockfile hit saves one resolution per
+# process and browser, later launches reuse the path in memory.
+stats = {
+    "resolved": 0,
+    "resolve_seconds": 0.0,
+    "cache_hits": 0,
+    "saved_seconds": 0.0,
+    "reused": 0,
+}
+
+
+class DriverCacheError(Exception):
+    """Raised when a driver binary cannot be resolved"""
+
+
+def resolve_driver_path(browser, offline=False):
+    """
+    Return the path of the driver binary for a browser
+
+    The first call in a process consults the lockfile in DRIVER_CACHE_DIR. A
+    lock entry is reused when its binary still exists, matches the recorded
+    checksum and was resolved for the installed browser version. Otherwise
+    webdriver-manager is asked once and the lockfile is updated for every
+    other worker and later runs.
+
+    Args:
+        browser (str): Browser name: chrome, firefox
+        offline (bool): Never touch the network, fail if the lockfile
+            has no usable entry
+
+    Returns:
+        str: Path to the driver executable
+    """
+    browser = browser.lower()
+    if browser not in DRIVER_MANAGERS:
+        raise ValueError(f"Unsupported browser: {browser}")
+
+    entry = _resolved.get(browser)
+    if entry is None:
+        with _locked():
+            entry = _load_entry(browser, offline)
+            if entry is None:
+                entry = _resolve(browser)
+        _resolved[browser] = entry
+    else:
+        stats["reused"] += 1
+
+    return entry["path"]
+
+
+def merge_stats(other):
+    """Add the stats of another process, e.g. an xdist worker"""
+    for key, value in other.items():
+        stats[key] = stats.get(key, 0) + value
+
+
+def format_stats():
+    """Human readable summary of how much resolution time the cache saved"""
+    return (
+        f"Driver resolution: {stats['resolved']} resolved via webdriver-manager "
+        f"({stats['resolve_seconds']:.2f}s), {stats['cache_hits']} served from "
+        f"the lockfile (~{stats['saved_seconds']:.2f}s saved), "
+        f"{stats['reused']} reused in process"
+    )
+
+
+def _resolve(browser):
+    """Ask webdriver-manager for the driver and record the result"""
+    logger.info(f"Resolving {browser} driver via webdriver-manager")
+    start = time.perf_counter()
+    path = DRIVER_MANAGERS[browser]().install()
+    elapsed = time.perf_counter() - start
+
+    stats["resolved"] += 1
+    stats["resolve_seconds"] += elapsed
+
+    entry = {
+        "path": path,
+        "browser_version": _browser_version(browser),
+        "sha256": _sha256(path),
+        "resolve_seconds": round(elapsed, 3),
+        "resolved_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    lock = _read_lock()
+    lock[browser] = entry
+    _write_lock(lock)
+
+    logger.info(f"Resolved {browser} driver in {elapsed:.2f}s: {path}")
+    return entry
+
+
+def _load_entry(browser, offline):
+    """Return a verified lock entry, or None if the driver must be resolved"""
+    entry = _read_lock().get(browser)
+
+    if entry is None:
+        problem = "no lock entry"
+    elif not isinstance(entry, dict) or not all(k in entry for k in LOCK_ENTRY_KEYS):
+        problem = f"incomplete lock entry: {entry!r}"
+    elif not os.path.isfile(entry["path"]):
+        problem = f"binary missing: {entry['path']}"
+    elif _sha256(entry["path"]) != entry["sha256"]:
+        problem = f"checksum mismatch: {entry['path']}"
+    else:
+        problem = None
+        version = _browser_version(browser)
+        if version != entry["browser_version"]:
+            if not offline:
+                problem = (
+                    f"browser version changed "
+                    f"({entry['browser_version']} -> {version})"
+                )
+            else:
+                logger.warning(
+                    f"Offline: using {browser} driver resolved for browser "
+                    f"{entry['browser_version']}, installed browser is {version}"
+                )
+
+    if problem is None:
+        stats["cache_hits"] += 1
+        stats["saved_seconds"] += entry.get("resolve_seconds", 0.0)
+        logger.info(f"Using cached {browser} driver: {entry['path']}")
+        return entry
+
+    if offline:
+        raise DriverCacheError(
+            f"Offline driver resolution failed for {browser} ({problem}). "
+            f"Run once without offline mode to populate {_lock_path()}"
+        )
+
+    logger.info(f"Cached {browser} driver unusable: {problem}")
+    return None
+
+
+def _browser_version(browser):
+    """Installed browser version, read from the local binary only"""
+    try:
+        return OperationSystemManager().get_browser_version_from_os(
+            BROWSER_TYPES[browser]
+        )
+    except Exception as e:
+        logger.debug(f"Could not determine {browser} version: {e}")
+        return None
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _lock_path():
+    return os.path.join(DRIVER_CACHE_DIR, LOCK_FILE)
+
+
+def _read_lock():
+    try:
+        with open(_lock_path(), encoding="utf-8") as f:
+            lock = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return lock if isinstance(lock, dict) else {}
+
+
+def _write_lock(lock):
+    tmp_path = f"{_lock_path()}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, _lock_path())
+
+
+@contextmanager
+def _locked():
+    """Serialize resolution across parallel workers"""
+    os.makedirs(DRIVER_CACHE_DIR, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+
+    with open(os.path.join(DRIVER_CACHE_DIR, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
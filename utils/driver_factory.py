@@ -0,0 +1,222 @@
+"""
+WebDriver factory
+Builds browser options and creates configured WebDriver instances
+"""
+
+import logging
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.firefox.service import Service as FirefoxService
+
+from config.config import (
+    DRIVER_OFFLINE,
+    FAST_PROFILE_BLOCKED_URLS,
+    IMPLICIT_WAIT,
+    WINDOW_HEIGHT,
+    WINDOW_WIDTH,
+)
+from utils.driver_cache import resolve_driver_path
+
+logger = logging.getLogger(__name__)
+
+# Fast profile switches: no images and none of the background work Chrome
+# does on its own
+CHROME_FAST_DISABLED_FEATURES = [
+    "Translate",
+    "OptimizationHints",
+    "MediaRouter",
+    "InterestFeedContentSuggestions",
+    "CalculateNativeWinOcclusion",
+]
+
+CHROME_FAST_ARGS = [
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-domain-reliability",
+    "--disable-extensions",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    f"--disable-features={','.join(CHROME_FAST_DISABLED_FEATURES)}",
+    "--blink-settings=imagesEnabled=false",
+]
+
+# Firefox has no URL blocklist, images, fonts, trackers and background
+# services are turned off through prefs instead
+FIREFOX_FAST_PREFS = {
+    "permissions.default.image": 2,
+    "gfx.downloadable_fonts.enabled": False,
+    "browser.display.use_document_fonts": 0,
+    "privacy.trackingprotection.enabled": True,
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.http.speculative-parallel-limit": 0,
+    "app.update.auto": False,
+    "app.update.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "toolkit.telemetry.enabled": False,
+    "extensions.update.enabled": False,
+    "media.autoplay.default": 5,
+}
+
+# Switches for browsers on a persistent profile (profile template): skip the
+# first-run work and keep background services from touching the profile
+CHROME_PROFILE_ARGS = [
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+]
+
+FIREFOX_PROFILE_PREFS = {
+    "browser.shell.checkDefaultBrowser": False,
+    "browser.startup.homepage_override.mstone": "ignore",
+    "browser.aboutwelcome.enabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "toolkit.telemetry.reportingpolicy.firstRun": False,
+    "app.update.auto": False,
+    "extensions.update.enabled": False,
+    "browser.cache.disk.enable": True,
+}
+
+
+def get_chrome_options(headless=False, fast=False, profile_dir=None):
+    """
+    Configure Chrome options
+
+    Without profile_dir Chrome runs incognito on a fresh empty profile
+    """
+    options = webdriver.ChromeOptions()
+
+    if headless:
+        options.add_argument("--headless=new")
+
+    # Basic args
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument(f"--window-size={WINDOW_WIDTH},{WINDOW_HEIGHT}")
+    options.add_argument("--start-maximized")
+    if profile_dir is None:
+        options.add_argument("--incognito")
+    else:
+        # Incognito would ignore the profile's disk cache
+        options.add_argument(f"--user-data-dir={profile_dir}")
+        for argument in CHROME_PROFILE_ARGS:
+            if not fast or argument not in CHROME_FAST_ARGS:
+                options.add_argument(argument)
+    options.add_argument("--disable-save-password-bubble")
+
+    # Disable automation
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+
+    # Keep console messages for the failure artifacts
+    options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
+
+    # Disable everything
+    prefs = {
+        "credentials_enable_service": False,
+        "profile.password_manager_enabled": False,
+        "profile.default_content_setting_values.notifications": 2,
+        "autofill.profile_enabled": False,
+    }
+
+    # Fast profile
+    if fast:
+        options.page_load_strategy = "eager"
+        for argument in CHROME_FAST_ARGS:
+            options.add_argument(argument)
+        prefs["profile.managed_default_content_settings.images"] = 2
+
+    options.add_experimental_option("prefs", prefs)
+
+    return options
+
+
+def get_firefox_options(headless=False, fast=False, profile_dir=None):
+    """
+    Configure Firefox options
+
+    Without profile_dir geckodriver creates a fresh temporary profile
+    """
+    options = webdriver.FirefoxOptions()
+
+    if headless:
+        options.add_argument("--headless")
+        logger.info("Running Firefox in headless mode")
+
+    if profile_dir is not None:
+        # Used in place, a FirefoxProfile would be zipped and sent to geckodriver
+        options.add_argument("-profile")
+        options.add_argument(profile_dir)
+        for name, value in FIREFOX_PROFILE_PREFS.items():
+            options.set_preference(name, value)
+
+    if fast:
+        options.page_load_strategy = "eager"
+        for name, value in FIREFOX_FAST_PREFS.items():
+            options.set_preference(name, value)
+
+    return options
+
+
+def create_driver(
+    browser, headless=False, offline=DRIVER_OFFLINE, fast=False, profile_dir=None
+):
+    """
+    Launch a new browser and apply the standard driver configuration
+
+    Args:
+        browser (str): Browser name: chrome, firefox
+        headless (bool): Run browser in headless mode
+        offline (bool): Only use driver binaries from the lockfile cache
+        fast (bool): Block images, fonts and analytics, load pages eagerly
+        profile_dir (str): Browser profile directory to run on, e.g. a copy
+            of the profile template, instead of a fresh profile
+
+    Returns:
+        WebDriver: Configured driver instance
+    """
+    logger.info(f"Initializing {browser} browser (headless={headless}, fast={fast})")
+
+    if browser.lower() == "chrome":
+        service = ChromeService(resolve_driver_path(browser, offline=offline))
+        driver = webdriver.Chrome(
+            service=service,
+            options=get_chrome_options(
+                headless=headless, fast=fast, profile_dir=profile_dir
+            ),
+        )
+        if fast:
+            # Survives navigation, the pool reset only clears cookies and storage
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd(
+                "Network.setBlockedURLs", {"urls": FAST_PROFILE_BLOCKED_URLS}
+            )
+    elif browser.lower() == "firefox":
+        service = FirefoxService(resolve_driver_path(browser, offline=offline))
+        driver = webdriver.Firefox(
+            service=service,
+            options=get_firefox_options(
+                headless=headless, fast=fast, profile_dir=profile_dir
+            ),
+        )
+    else:
+        raise ValueError(f"Unsupported browser: {browser}")
+
+    # Configure driver
+    driver.implicitly_wait(IMPLICIT_WAIT)
+    driver.set_window_size(WINDOW_WIDTH, WINDOW_HEIGHT)
+
+    logger.info(f"Browser initialized: {browser}")
+    return driver
@@ -0,0 +1,224 @@
+"""
+WebDriver pool
+Keeps browsers alive across tests and resets their state between checkouts
+"""
+
+import logging
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+
+from config import config
+from config.config import IMPLICIT_WAIT, WINDOW_HEIGHT, WINDOW_WIDTH
+
+logger = logging.getLogger(__name__)
+
+# Clears all client-side state of the currently loaded origin
+CLEAR_STORAGE_SCRIPT = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+# Number of web storage entries left on the currently loaded origin
+STORAGE_LENGTH_SCRIPT = """
+try {
+    return window.localStorage.length + window.sessionStorage.length;
+} catch (e) {
+    return 0;
+}
+"""
+
+# Storage.clearDataForOrigin storage types: local storage, IndexedDB, cache
+# storage, service workers, ... (not the HTTP cache)
+CLEARED_STORAGE_TYPES = "all"
+
+
+class DriverResetError(Exception):
+    """Raised when a pooled browser could not be returned to a clean state"""
+
+
+class PooledDriver:
+    """Bookkeeping for a single browser owned by the pool"""
+
+    def __init__(self, driver, browser, key):
+        self.driver = driver
+        self.browser = browser
+        self.key = key
+        self.uses = 0
+
+
+class DriverPool:
+    """
+    Pool of long-lived browsers
+
+    Browsers are created on demand by ``factory`` and handed out one per test.
+    On release the browser is reset (cookies, storage of the visited origins,
+    blank page, window size) and verified. Browsers are recycled after
+    ``recycle_after`` tests, after a failed reset or after a crash.
+
+    Browsers launched with different options (e.g. the fast profile) are kept
+    apart and only handed out again for the same options.
+    """
+
+    def __init__(self, factory, recycle_after=0):
+        """
+        Args:
+            factory (callable): factory(browser, **options) -> WebDriver
+            recycle_after (int): Quit a browser after this many tests (0 = never)
+        """
+        self.factory = factory
+        self.recycle_after = recycle_after
+        self._idle = {}
+        self._in_use = {}
+        self.created = 0
+        self.recycled = 0
+
+    def acquire(self, browser, **options):
+        """
+        Return a clean browser, creating a new one if none is idle
+
+        Args:
+            browser (str): Browser name: chrome, firefox
+            **options: Extra factory arguments, part of the pool key
+        """
+        key = (browser, tuple(sorted(options.items())))
+        idle = self._idle.setdefault(key, [])
+        if idle:
+            pooled = idle.pop()
+            logger.debug(f"Reusing pooled {browser} browser (uses={pooled.uses})")
+        else:
+            pooled = PooledDriver(self.factory(browser, **options), browser, key)
+            self.created += 1
+            logger.info(f"Pool created {browser} browser #{self.created}")
+
+        pooled.uses += 1
+        self._in_use[id(pooled.driver)] = pooled
+        return pooled.driver
+
+    def release(self, driver, crashed=False):
+        """
+        Give a browser back to the pool
+
+        Args:
+            driver: Driver previously returned by acquire()
+            crashed (bool): The browser session is known to be broken
+        """
+        pooled = self._in_use.pop(id(driver), None)
+        if pooled is None:
+            logger.warning("Released driver does not belong to the pool, quitting it")
+            self._quit(driver)
+            return
+
+        if crashed:
+            self._recycle(pooled, "browser crashed")
+            return
+
+        if self.recycle_after and pooled.uses >= self.recycle_after:
+            self._recycle(pooled, f"reached {pooled.uses} uses")
+            return
+
+        try:
+            reset_driver(driver)
+        except (DriverResetError, WebDriverException) as e:
+            self._recycle(pooled, f"reset failed: {e}")
+            return
+
+        self._idle.setdefault(pooled.key, []).append(pooled)
+
+    def close(self):
+        """Quit every browser owned by the pool"""
+        pooled_drivers = list(self._in_use.values())
+        for idle in self._idle.values():
+            pooled_drivers.extend(idle)
+
+        for pooled in pooled_drivers:
+            self._quit(pooled.driver)
+
+        self._idle.clear()
+        self._in_use.clear()
+        logger.info(
+            f"Driver pool closed: {self.created} browsers created, "
+            f"{self.recycled} recycled"
+        )
+
+    def _recycle(self, pooled, reason):
+        logger.info(f"Recycling {pooled.browser} browser: {reason}")
+        self.recycled += 1
+        self._quit(pooled.driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            logger.debug(f"Error while quitting browser: {e}")
+
+
+def origin_of(url):
+    """scheme://host[:port] of an http(s) URL, None for about:, data: etc."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        return None
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def visited_origins(driver):
+    """
+    Origins whose storage a test may have written to: the current one, the
+    application under test and, on Chrome, every origin in the tab history
+    """
+    urls = [driver.current_url, config.BASE_URL]
+    if hasattr(driver, "execute_cdp_cmd"):
+        history = driver.execute_cdp_cmd("Page.getNavigationHistory", {})
+        urls.extend(entry["url"] for entry in history["entries"])
+    return sorted({origin for origin in map(origin_of, urls) if origin})
+
+
+def reset_driver(driver):
+    """
+    Return a browser to the state of a freshly launched one
+
+    Clears cookies (of every origin on Chrome), web storage of the current
+    origin and, on Chrome, all storage of every visited origin, loads
+    about:blank and restores the configured window size, then verifies the
+    result.
+
+    Raises:
+        DriverResetError: The browser still carries state after the reset
+    """
+    driver.implicitly_wait(IMPLICIT_WAIT)
+    cdp = hasattr(driver, "execute_cdp_cmd")
+    origins = visited_origins(driver)
+    driver.delete_all_cookies()
+    if cdp:
+        # Also drop cookies of origins other than the current one
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.execute_script(CLEAR_STORAGE_SCRIPT)
+    if driver.get_cookies():
+        raise DriverResetError("Cookies survived delete_all_cookies()")
+    if driver.execute_script(STORAGE_LENGTH_SCRIPT):
+        raise DriverResetError(f"Web storage survived on {driver.current_url}")
+    if cdp:
+        for origin in origins:
+            driver.execute_cdp_cmd(
+                "Storage.clearDataForOrigin",
+                {"origin": origin, "storageTypes": CLEARED_STORAGE_TYPES},
+            )
+    driver.get("about:blank")
+    driver.set_window_size(WINDOW_WIDTH, WINDOW_HEIGHT)
+
+    # Verify
+    if driver.current_url != "about:blank":
+        raise DriverResetError(f"Browser stuck on {driver.current_url}")
+    if len(driver.window_handles) != 1:
+        raise DriverResetError(f"{len(driver.window_handles)} windows left open")
+    size = driver.get_window_size()
+    if (size["width"], size["height"]) != (WINDOW_WIDTH, WINDOW_HEIGHT):
+        raise DriverResetError(f"Window size not restored: {size}")
+    if cdp:
+        for origin in origins:
+            usage = driver.execute_cdp_cmd(
+                "Storage.getUsageAndQuota", {"origin": origin}
+            )["usage"]
+            if usage:
+                raise DriverResetError(f"{origin} still stores {usage} bytes")
@@ -0,0 +1,200 @@
+"""
+Multi-browser matrix
+Per-engine concurrency limits and the side-by-side timing report of a
+--browsers run
+"""
+
+import html
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from config.config import DRIVER_CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows - limits are not enforced
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SLOT_DIR = os.path.join(DRIVER_CACHE_DIR, "slots")
+SLOT_POLL_INTERVAL = 0.1
+
+
+def parse_browsers(value):
+    """ "chrome,firefox" -> ["chrome", "firefox"]"""
+    return [name.strip().lower() for name in value.split(",") if name.strip()]
+
+
+def parse_limits(value):
+    """ "chrome=4,firefox=2" -> {"chrome": 4, "firefox": 2}"""
+    limits = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        try:
+            name, limit = part.split("=")
+            limits[name.strip().lower()] = int(limit)
+        except ValueError:
+            raise ValueError(f"Invalid engine limit {part!r}, expected name=count")
+    return limits
+
+
+@contextmanager
+def engine_slot(browser, limit):
+    """
+    Hold one of `limit` slots of an engine for the duration of a test
+
+    Slots are lock files shared by every process on the machine, so the limit
+    applies across all xdist workers. A limit of 0 means unlimited. Slots
+    count running tests: idle pooled browsers (--isolation=pool) and
+    prewarmed ones stay open without holding a slot.
+    """
+    if not limit or fcntl is None:
+        yield
+        return
+
+    os.makedirs(SLOT_DIR, exist_ok=True)
+    start = time.perf_counter()
+    while True:
+        for slot in range(limit):
+            path = os.path.join(SLOT_DIR, f"{browser}-{slot}.lock")
+            with open(path, "w") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+
+                waited = time.perf_counter() - start
+                if waited > SLOT_POLL_INTERVAL:
+                    logger.info(f"Waited {waited:.2f}s for a free {browser} slot")
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return
+        time.sleep(SLOT_POLL_INTERVAL)
+
+
+def base_test_id(nodeid, browser):
+    """
+    Node id without the browser parameter, the same for every engine
+
+    Only the browser's own id is removed, at the start of the parameter ids
+    where pytest_generate_tests puts it (or at the end), so other parameter
+    ids containing "-" stay intact
+    """
+    name, bracket, ids = nodeid.partition("[")
+    if not bracket:
+        return nodeid
+    ids = ids[:-1]
+    if ids == browser:
+        return name
+    if ids.startswith(f"{browser}-"):
+        return f"{name}[{ids[len(browser) + 1:]}]"
+    if ids.endswith(f"-{browser}"):
+        return f"{name}[{ids[: -len(browser) - 1]}]"
+    return nodeid
+
+
+class EngineReport:
+    """
+    Test durations and page object wait times per engine
+
+    Fed with test reports whose user_properties carry the browser (set by the
+    driver fixture), so it also works on the xdist controller.
+    """
+
+    def __init__(self):
+        self.tests = {}
+        self.waits = {}
+        self.engines = []
+
+    def add(self, report):
+        properties = dict(report.user_properties)
+        engine = properties.get("browser")
+        if engine is None:
+            return
+        if engine not in self.engines:
+            self.engines.append(engine)
+
+        test = self.tests.setdefault(base_test_id(report.nodeid, engine), {})
+        test[engine] = test.get(engine, 0.0) + report.duration
+
+        if report.when == "teardown":
+            for description, seconds in properties.get("waits", {}).items():
+                waits = self.waits.setdefault(description, {})
+                waits[engine] = waits.get(engine, 0.0) + seconds
+
+    def is_matrix(self):
+        return len(self.engines) > 1
+
+    def totals(self):
+        return {
+            engine: sum(test.get(engine, 0.0) for test in self.tests.values())
+            for engine in self.engines
+        }
+
+    def rows(self, data, top=None):
+        """(name, {engine: seconds}) sorted by the largest engine difference"""
+        rows = sorted(
+            data.items(),
+            key=lambda row: max(row[1].values()) - min(row[1].values()),
+            reverse=True,
+        )
+        return rows[:top] if top else rows
+
+    def lines(self, top=10):
+        """Side-by-side timing table for the terminal summary"""
+        header = "".join(f"{engine:>10s}" for engine in self.engines)
+        lines = [header]
+        lines.append(
+            "".join(f"{self.totals()[engine]:9.2f}s" for engine in self.engines)
+            + "  all tests"
+        )
+        for title, data in (("tests", self.tests), ("waits", self.waits)):
+            lines.append(f"largest engine differences ({title}):")
+            for name, seconds in self.rows(data, top):
+                lines.append(
+                    "".join(
+                        f"{seconds[engine]:9.2f}s" if engine in seconds else " " * 10
+                        for engine in self.engines
+                    )
+                    + f"  {name}"
+                )
+        return lines
+
+    def to_html(self):
+        """Side-by-side timing table for the HTML report summary"""
+        header = "".join(f"<th>{html.escape(engine)}</th>" for engine in self.engines)
+        body = "".join(
+            f"<tr><td>{html.escape(name)}</td>"
+            + "".join(
+                f"<td>{seconds[engine]:.2f}s</td>" if engine in seconds else "<td></td>"
+                for engine in self.engines
+            )
+            + "</tr>"
+            for name, seconds in self.rows(self.tests)
+        )
+        return (
+            "<h3>Per-engine timing</h3>"
+            f"<table><tr><th>Test</th>{header}</tr>{body}</table>"
+        )
+
+    def write_json(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "engines": self.engines,
+                    "totals": self.totals(),
+                    "tests": self.tests,
+                    "waits": self.waits,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
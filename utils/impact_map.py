@@ -0,0 +1,456 @@
+"""
+Test impact map
+Records which page object methods and locator constants every test used and
+selects the tests affected by a git diff
+"""
+
+import ast
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+
+from config.config import IMPACT_MAP_MAX_AGE_DAYS
+
+logger = logging.getLogger(__name__)
+
+IMPACT_MAP_VERSION = 1
+
+# Modules whose methods and class constants are recorded per test
+PAGE_MODULES = (
+    "pages.page_base",
+    "pages.login_page",
+    "pages.products_page",
+    "pages.macros",
+)
+
+# Changed files that can affect any test, the whole suite runs
+FULL_RUN_FILES = ("requirements.txt", "pytest.ini", "tests/conftest.py")
+
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+def module_path(module_name):
+    """Repository relative path of a module, with forward slashes"""
+    return module_name.replace(".", "/") + ".py"
+
+
+class _ConstantProbe:
+    """Class attribute stand-in that reports every read to the recorder"""
+
+    def __init__(self, recorder, symbol, value):
+        self.recorder = recorder
+        self.symbol = symbol
+        self.value = value
+
+    def __get__(self, obj, owner=None):
+        used = self.recorder.used
+        if used is not None:
+            used.add(self.symbol)
+        return self.value
+
+
+class ImpactRecorder:
+    """
+    Collects the page object symbols a test touches
+
+    Methods are recorded with a profile hook that only looks up the code
+    object of every call, class constants (locators, macros) by replacing
+    them with probes that record each read.
+    """
+
+    def __init__(self, module_names=PAGE_MODULES):
+        self.used = None
+        self._codes = {}
+        self._probes = []
+        self.modules = {}
+
+        for module_name in module_names:
+            module = importlib.import_module(module_name)
+            short_name = module_name.rsplit(".", 1)[-1]
+            symbols = self.modules.setdefault(module_path(module_name), [])
+            for name, value in vars(module).items():
+                if inspect.isfunction(value) and value.__module__ == module_name:
+                    self._add_function(f"{short_name}.{name}", value)
+                    symbols.append(f"{short_name}.{name}")
+                elif inspect.isclass(value) and value.__module__ == module_name:
+                    symbols.extend(self._add_class(value))
+
+    def _add_function(self, symbol, function):
+        # Decorated methods share the code of their wrapper, record the
+        # wrapped function instead. Generated code (dataclass __init__) has
+        # no source file and is skipped.
+        code = inspect.unwrap(function).__code__
+        if code.co_filename.endswith(".py"):
+            self._codes[code] = symbol
+
+    def _add_class(self, cls):
+        symbols = []
+        for name, value in list(vars(cls).items()):
+            symbol = f"{cls.__name__}.{name}"
+            function = value
+            if isinstance(value, (staticmethod, classmethod)):
+                function = value.__func__
+            elif isinstance(value, property):
+                function = value.fget
+
+            if inspect.isfunction(function):
+                self._add_function(symbol, function)
+                symbols.append(symbol)
+            elif name.isupper():
+                self._probes.append((cls, name, value))
+                symbols.append(symbol)
+        return symbols
+
+    def install(self):
+        """Replace the class constants with probes"""
+        for cls, name, value in self._probes:
+            setattr(cls, name, _ConstantProbe(self, f"{cls.__name__}.{name}", value))
+        return self
+
+    def uninstall(self):
+        for cls, name, value in self._probes:
+            setattr(cls, name, value)
+
+    def start(self):
+        """Start recording a test"""
+        self.used = set()
+        sys.setprofile(self._profile)
+
+    def stop(self):
+        """Stop recording, returns the sorted symbols the test used"""
+        sys.setprofile(None)
+        used, self.used = self.used or set(), None
+        return sorted(used)
+
+    def _profile(self, frame, event, arg):
+        if event == "call":
+            symbol = self._codes.get(frame.f_code)
+            if symbol is not None:
+                self.used.add(symbol)
+
+
+class ImpactMap:
+    """
+    Symbols used per test, plus the page module hashes and commit they were
+    recorded at (to detect a stale map)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tests = {}
+        self.modules = {}
+        self.hashes = {}
+        self.commit = None
+        self.recorded_at = None
+
+    @classmethod
+    def load(cls, path):
+        impact_map = cls(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == IMPACT_MAP_VERSION:
+                impact_map.tests = data["tests"]
+                impact_map.modules = data["modules"]
+                impact_map.hashes = data["hashes"]
+                impact_map.commit = data["commit"]
+                impact_map.recorded_at = data["recorded_at"]
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable impact map {path}: {e}")
+        return impact_map
+
+    @property
+    def exists(self):
+        return bool(self.tests)
+
+    def update(self, tests, modules):
+        """
+        Store the symbols of the tests of a recording run, tests that did not
+        run keep their previous entry
+        """
+        self.tests.update(tests)
+        self.modules = modules
+        self.hashes = {path: file_hash(path) for path in modules}
+        self.commit = git("rev-parse", "HEAD")
+        self.recorded_at = time.time()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": IMPACT_MAP_VERSION,
+                    "commit": self.commit,
+                    "recorded_at": self.recorded_at,
+                    "hashes": self.hashes,
+                    "modules": self.modules,
+                    "tests": self.tests,
+                },
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    def stale_reasons(self, base):
+        """Why the map may not describe the code at base, empty if current"""
+        reasons = []
+        age_days = (time.time() - self.recorded_at) / 86400
+        if age_days > IMPACT_MAP_MAX_AGE_DAYS:
+            reasons.append(f"recorded {age_days:.0f} days ago")
+        changed = [
+            path
+            for path, digest in self.hashes.items()
+            if file_hash(path, revision=base) != digest
+        ]
+        if changed:
+            reasons.append(
+                f"recorded for other versions of {', '.join(sorted(changed))} "
+                f"than {base} (commit {(self.commit or 'unknown')[:10]})"
+            )
+        return reasons
+
+    def affected(self, nodeids, changes):
+        """
+        Node ids to run for the changes of changed_symbols()
+
+        Returns:
+            tuple: (selected node ids, human readable reasons)
+        """
+        if changes["full_run"]:
+            return list(nodeids), [f"{changes['full_run']} changed, running all"]
+
+        # Module constants (scripts imported by other page modules) are not
+        # recorded per test, nor are modules recorded by an older map: nobody
+        # can tell which tests use them
+        recorded = {symbol for symbols in self.modules.values() for symbol in symbols}
+        for path, path_symbols in changes["module_symbols"].items():
+            if path not in self.modules or (
+                path_symbols and not recorded.intersection(path_symbols)
+            ):
+                return list(nodeids), [
+                    f"{path} changed outside the recorded symbols, running all"
+                ]
+
+        symbols = set(changes["symbols"])
+        for path in changes["modules"]:
+            symbols.update(self.modules.get(path, []))
+
+        selected = []
+        unmapped = 0
+        for nodeid in nodeids:
+            if nodeid.split("::")[0] in changes["test_files"]:
+                selected.append(nodeid)
+            elif nodeid not in self.tests:
+                unmapped += 1
+                selected.append(nodeid)
+            elif symbols.intersection(self.tests[nodeid]):
+                selected.append(nodeid)
+
+        notes = [f"changed symbols: {', '.join(sorted(symbols)) or 'none'}"]
+        if unmapped:
+            notes.append(f"{unmapped} tests not in the impact map, selected")
+        return selected, notes
+
+
+def git(*args):
+    """Output of a git command, None if git fails"""
+    try:
+        result = subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def file_hash(path, revision=None):
+    """sha1 of a file in the working tree or at a git revision, None if absent"""
+    if revision is None:
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+    else:
+        content = git("show", f"{revision}:{path}")
+        if content is None:
+            return None
+        content = content.encode("utf-8")
+    # git output is stripped, so hash stripped content on both sides
+    return hashlib.sha1(content.strip()).hexdigest()
+
+
+def symbol_spans(source, module_name):
+    """
+    (symbol, first line, last line) of every method, class constant, module
+    function and module constant. Docstrings map to None.
+    """
+    short_name = module_name.rsplit(".", 1)[-1]
+    spans = []
+
+    def add(symbol, node):
+        first = min(
+            [node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]
+        )
+        spans.append((symbol, first, node.end_lineno))
+
+    def add_body(prefix, body):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                add(f"{prefix}.{node.name}", node)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = (
+                    node.targets if isinstance(node, ast.Assign) else [node.target]
+                )
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        add(f"{prefix}.{target.id}", node)
+            elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant):
+                add(None, node)
+
+    tree = ast.parse(source)
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            add_body(node.name, node.body)
+        else:
+            add_body(short_name, [node])
+    return spans
+
+
+def references(source, module_name):
+    """Names every symbol of symbol_spans() refers to"""
+    short_name = module_name.rsplit(".", 1)[-1]
+    tree = ast.parse(source)
+    found = {}
+
+    def names(node):
+        used = set()
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name):
+                used.add(child.id)
+            elif isinstance(child, ast.Attribute):
+                used.add(child.attr)
+        return used
+
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            for child in node.body:
+                for symbol in _symbols_of(node.name, child):
+                    found[symbol] = names(child)
+        else:
+            for symbol in _symbols_of(short_name, node):
+                found[symbol] = names(node)
+    return found
+
+
+def _symbols_of(prefix, node):
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [f"{prefix}.{node.name}"]
+    if isinstance(node, ast.Assign):
+        return [f"{prefix}.{t.id}" for t in node.targets if isinstance(t, ast.Name)]
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+        return [f"{prefix}.{node.target.id}"]
+    return []
+
+
+def changed_lines(base, path):
+    """Line numbers of path (working tree) changed since base"""
+    diff = git("diff", "-U0", base, "--", path) or ""
+    lines = set()
+    for line in diff.splitlines():
+        match = HUNK_HEADER.match(line)
+        if match:
+            start = int(match.group(1))
+            count = int(match.group(2) or 1)
+            # A pure deletion sits between two lines, both neighbours count
+            lines.update(range(start, start + count) if count else (start, start + 1))
+    return lines
+
+
+def changed_symbols(base, module_names=PAGE_MODULES):
+    """
+    What changed between the merge base of base and the working tree
+
+    Returns:
+        dict: base (the merge base compared against), symbols (changed
+            page object symbols plus the symbols that refer to them),
+            module_symbols (those symbols per changed page module),
+            modules (page modules changed outside any symbol, every symbol
+            counts as changed), test_files and full_run (a changed file that
+            affects all tests, None if there is none)
+    """
+    merge_base = git("merge-base", base, "HEAD") or base
+    paths = (git("diff", "--name-only", merge_base) or "").splitlines()
+    page_modules = {module_path(name): name for name in module_names}
+
+    changes = {
+        "base": merge_base,
+        "symbols": set(),
+        "module_symbols": {},
+        "modules": [],
+        "test_files": [],
+        "full_run": None,
+    }
+    for path in paths:
+        if path in page_modules:
+            _add_module_changes(changes, merge_base, path, page_modules[path])
+        elif path.startswith("tests/") and os.path.basename(path).startswith("test_"):
+            changes["test_files"].append(path)
+        elif (
+            path.endswith(".py") or path.startswith("pages/") or path in FULL_RUN_FILES
+        ):
+            changes["full_run"] = changes["full_run"] or path
+    changes["symbols"] = sorted(changes["symbols"])
+    return changes
+
+
+def _add_module_changes(changes, merge_base, path, module_name):
+    try:
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        spans = symbol_spans(source, module_name)
+    except (FileNotFoundError, SyntaxError):
+        changes["modules"].append(path)
+        changes["module_symbols"][path] = []
+        return
+
+    lines = source.splitlines()
+    symbols = set()
+    for line in changed_lines(merge_base, path):
+        matches = [span for span in spans if span[1] <= line <= span[2]]
+        if not matches:
+            text = lines[line - 1].strip() if line <= len(lines) else ""
+            if text and not text.startswith("#"):
+                # Imports, class statements and other module level code
+                changes["modules"].append(path)
+                changes["module_symbols"][path] = []
+                return
+            continue
+        # The innermost span (a method rather than its class) wins
+        symbol = min(matches, key=lambda span: span[2] - span[1])[0]
+        if symbol is not None:
+            symbols.add(symbol)
+
+    # Symbols referring to changed ones changed as well, e.g. the methods
+    # using a changed module constant or the macros built from a locator
+    refs = references(source, module_name)
+    pending = list(symbols)
+    while pending:
+        short = pending.pop().rsplit(".", 1)[-1]
+        for symbol, used in refs.items():
+            if short in used and symbol not in symbols:
+                symbols.add(symbol)
+                pending.append(symbol)
+    changes["symbols"].update(symbols)
+    changes["module_symbols"][path] = sorted(symbols)
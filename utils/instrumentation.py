@@ -0,0 +1,209 @@
+"""
+WebDriver command instrumentation
+Times every command sent to the browser and attributes it to the page object
+method that issued it
+"""
+
+import functools
+import html
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Page object methods whose commands count as waiting for the application
+WAIT_ORIGINS = {
+    "find_element",
+    "find_elements",
+    "wait_for",
+    "is_visible",
+    "is_present",
+    "wait_until_gone",
+}
+
+# WebDriver commands that change the application state
+ACTION_COMMANDS = {
+    "clickElement",
+    "sendKeysToElement",
+    "clearElement",
+    "get",
+    "refresh",
+    "goBack",
+    "goForward",
+    "actions",
+}
+
+_local = threading.local()
+
+# Set while at least one recorder is attached, keeps record_origin() free
+# when instrumentation is off
+_active_recorders = 0
+
+
+def record_origin(name):
+    """
+    Decorator for page object methods: commands issued while the method runs
+    are attributed to it. The outermost decorated method wins, so the
+    find_element() call inside send_keys() is reported as send_keys. Whether
+    a command is waiting or acting is decided by the innermost method, so
+    that find_element() call still counts as waiting.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not _active_recorders:
+                return func(self, *args, **kwargs)
+
+            stack = _origin_stack()
+            locator = args[0] if args and isinstance(args[0], tuple) else None
+            stack.append((name, locator))
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                stack.pop()
+
+        return wrapper
+
+    return decorator
+
+
+class CommandRecorder:
+    """
+    Records the WebDriver commands of one test
+
+    attach() wraps driver.execute, the single entry point every WebDriver and
+    WebElement command goes through, so raw driver.* calls are captured too.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._drivers = []
+
+    def attach(self, driver):
+        """Start timing every command sent through this driver"""
+        global _active_recorders
+        original = driver.execute
+        records = self.records
+
+        def execute(driver_command, params=None):
+            stack = _origin_stack()
+            origin, origin_locator = stack[0] if stack else ("driver", None)
+            innermost = stack[-1][0] if stack else "driver"
+            start = time.perf_counter()
+            try:
+                return original(driver_command, params)
+            finally:
+                duration = time.perf_counter() - start
+                records.append(
+                    {
+                        "command": driver_command,
+                        "locator": _locator(params) or origin_locator,
+                        "origin": origin,
+                        "kind": _kind(innermost, driver_command),
+                        "duration": round(duration, 6),
+                    }
+                )
+
+        driver.execute = execute
+        self._drivers.append(driver)
+        _active_recorders += 1
+
+    def detach(self):
+        """Restore the original driver.execute of every attached driver"""
+        global _active_recorders
+        for driver in self._drivers:
+            try:
+                del driver.execute
+            except AttributeError:
+                pass
+            _active_recorders -= 1
+        self._drivers = []
+
+    def summary(self, top=10):
+        """
+        Aggregate the recorded commands
+
+        Returns:
+            dict: round_trips, total/wait/act/other seconds and the top
+                (origin, command) pairs by total time
+        """
+        by_command = {}
+        totals = {"wait": 0.0, "act": 0.0, "other": 0.0}
+        for record in self.records:
+            key = (record["origin"], record["command"])
+            count, total = by_command.get(key, (0, 0.0))
+            by_command[key] = (count + 1, total + record["duration"])
+            totals[record["kind"]] += record["duration"]
+
+        top_commands = sorted(by_command.items(), key=lambda i: i[1][1], reverse=True)
+        return {
+            "round_trips": len(self.records),
+            "total_seconds": round(sum(totals.values()), 6),
+            "wait_seconds": round(totals["wait"], 6),
+            "act_seconds": round(totals["act"], 6),
+            "other_seconds": round(totals["other"], 6),
+            "top_commands": [
+                {
+                    "origin": origin,
+                    "command": command,
+                    "count": count,
+                    "total_seconds": round(total, 6),
+                }
+                for (origin, command), (count, total) in top_commands[:top]
+            ],
+        }
+
+
+def summary_html(summary):
+    """Render a recorder summary as an HTML fragment for pytest-html"""
+    rows = "".join(
+        f"<tr><td>{html.escape(c['origin'])}</td><td>{html.escape(c['command'])}</td>"
+        f"<td>{c['count']}</td><td>{c['total_seconds'] * 1000:.1f}</td></tr>"
+        for c in summary["top_commands"]
+    )
+    return (
+        '<div class="webdriver-commands">'
+        f"<p><b>WebDriver round trips:</b> {summary['round_trips']} &nbsp; "
+        f"<b>total:</b> {summary['total_seconds'] * 1000:.1f} ms &nbsp; "
+        f"<b>waiting:</b> {summary['wait_seconds'] * 1000:.1f} ms &nbsp; "
+        f"<b>acting:</b> {summary['act_seconds'] * 1000:.1f} ms &nbsp; "
+        f"<b>other:</b> {summary['other_seconds'] * 1000:.1f} ms</p>"
+        "<table><tr><th>Origin</th><th>Command</th><th>Count</th>"
+        f"<th>Total ms</th></tr>{rows}</table></div>"
+    )
+
+
+def dump_jsonl(path, test_name, recorder):
+    """Append one line with the summary and raw commands of a test"""
+    line = {
+        "test": test_name,
+        "summary": recorder.summary(),
+        "commands": recorder.records,
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(line) + "\n")
+
+
+def _origin_stack():
+    """Page object methods running in this thread, outermost first"""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _locator(params):
+    if params and "using" in params and "value" in params:
+        return [params["using"], params["value"]]
+    return None
+
+
+def _kind(origin, command):
+    if origin in WAIT_ORIGINS:
+        return "wait"
+    if command in ACTION_COMMANDS:
+        return "act"
+    return "other"
@@ -0,0 +1,417 @@
+"""
+Load generator
+Drives virtual shoppers through login -> add to cart -> checkout with the page
+objects, every shopper in its own headless browser, against the local shop
+
+Run standalone:
+    python -m utils.load_generator --users 8 --ramp-up 20 --duration 120
+    python -m utils.load_generator --find-saturation --max-users 16
+"""
+
+import argparse
+import collections
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+
+from config import config as settings
+from config.config import (
+    DEFAULT_BROWSER,
+    LOAD_DURATION,
+    LOAD_RAMP_UP,
+    LOAD_REPORT_DIR,
+    LOAD_THINK_TIME,
+    LOAD_USERS,
+    SATURATION_MAX_ERROR_RATE,
+    SATURATION_MIN_EFFICIENCY,
+    STANDARD_USER,
+)
+from pages.login_page import LoginPage
+from pages.products_page import ProductsPage
+from utils import parallel
+from utils.driver_factory import create_driver
+from utils.local_shop import LocalShop
+from utils.metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+STEPS = ("login", "add_to_cart", "checkout")
+CART_PRODUCTS = ["Sauce Labs Backpack", "Sauce Labs Bike Light"]
+PERCENTILES = (50, 90, 95, 99)
+
+
+class StepFailed(Exception):
+    """A step of the shopping flow did not reach its expected page"""
+
+    def __init__(self, step):
+        super().__init__(f"{step} failed")
+        self.step = step
+
+
+def host_load():
+    """CPU load per core and free memory of the machine running the browsers"""
+    cpus = parallel.cpu_count()
+    try:
+        load = round(os.getloadavg()[0] / cpus, 2)
+    except (AttributeError, OSError):  # not available on Windows
+        load = None
+    return {
+        "cpus": cpus,
+        "load_per_cpu": load,
+        "available_memory_mb": parallel.available_memory_mb(),
+    }
+
+
+class LoadStats:
+    """Step latencies and checkout outcomes of all virtual users"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.steps = []
+        self.checkouts = []
+        self.errors = collections.Counter()
+
+    def record_step(self, step, seconds):
+        with self._lock:
+            self.steps.append((time.monotonic(), step, seconds))
+
+    def record_checkout(self, ok, error=None):
+        with self._lock:
+            self.checkouts.append((time.monotonic(), ok))
+            if error:
+                self.errors[error] += 1
+
+    def summary(self, since, until):
+        """
+        Throughput, error rate and step latency percentiles of the checkouts
+        and steps finished between since and until (time.monotonic())
+        """
+        with self._lock:
+            checkouts = [ok for at, ok in self.checkouts if since <= at <= until]
+            steps = [(step, s) for at, step, s in self.steps if since <= at <= until]
+
+        minutes = max(until - since, 1e-9) / 60
+        completed = sum(checkouts)
+        latencies = {}
+        for step in STEPS:
+            samples = [seconds * 1000 for name, seconds in steps if name == step]
+            latencies[step] = {
+                f"p{pct}": (round(percentile(samples, pct), 1) if samples else None)
+                for pct in PERCENTILES
+            }
+            latencies[step]["count"] = len(samples)
+        return {
+            "seconds": round(until - since, 1),
+            "checkouts": completed,
+            "failed": len(checkouts) - completed,
+            "checkouts_per_minute": round(completed / minutes, 2),
+            "error_rate": (
+                round((len(checkouts) - completed) / len(checkouts), 4)
+                if checkouts
+                else 0.0
+            ),
+            "latency_ms": latencies,
+        }
+
+
+def shop_once(driver, user, stats):
+    """One login -> add to cart -> checkout iteration, raises StepFailed"""
+    login_page = LoginPage(driver)
+    products_page = ProductsPage(driver)
+
+    start = time.perf_counter()
+    login_page.open()
+    login_page.login(user["username"], user["password"])
+    if not products_page.is_loaded():
+        raise StepFailed("login")
+    stats.record_step("login", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    added = products_page.add_products_to_cart(CART_PRODUCTS)
+    if not all(added.values()):
+        raise StepFailed("add_to_cart")
+    stats.record_step("add_to_cart", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    completed = (
+        products_page.open_cart()
+        and products_page.start_checkout()
+        and products_page.fill_checkout_form_and_continue("load", "user", "12345")
+        and products_page.finish_checkout()
+        and products_page.checkout_complete_is_loaded()
+    )
+    if not completed:
+        raise StepFailed("checkout")
+    stats.record_step("checkout", time.perf_counter() - start)
+
+
+def virtual_user(factory, user, stats, stop, think_time):
+    """Shop in a loop until stop is set, relaunching a crashed browser"""
+    driver = None
+    try:
+        while not stop.is_set():
+            if driver is None:
+                try:
+                    driver = factory()
+                except WebDriverException as e:
+                    logger.warning(f"Virtual user could not launch a browser: {e}")
+                    stats.record_checkout(False, "browser launch failed")
+                    return
+
+            try:
+                shop_once(driver, user, stats)
+            except StepFailed as e:
+                stats.record_checkout(False, str(e))
+            except WebDriverException as e:
+                stats.record_checkout(False, type(e).__name__)
+                if isinstance(e, InvalidSessionIdException):
+                    driver = None
+                    continue
+            else:
+                stats.record_checkout(True)
+
+            # Next iteration starts logged out with an empty cart
+            try:
+                driver.delete_all_cookies()
+                driver.execute_script("window.localStorage.clear();")
+            except WebDriverException as e:
+                logger.debug(f"Could not reset browser state: {e}")
+            stop.wait(think_time)
+    finally:
+        if driver is not None:
+            try:
+                driver.quit()
+            except WebDriverException as e:
+                logger.debug(f"Error while quitting browser: {e}")
+
+
+class LoadGenerator:
+    """
+    Virtual users on a thread pool, started one by one over the ramp-up
+
+    Every user drives its own browser created by factory(). Results are
+    reported for the whole run and for the steady state after the ramp-up.
+    """
+
+    def __init__(
+        self,
+        factory,
+        users=LOAD_USERS,
+        ramp_up=LOAD_RAMP_UP,
+        duration=LOAD_DURATION,
+        think_time=LOAD_THINK_TIME,
+        user=STANDARD_USER,
+    ):
+        """
+        Args:
+            factory (callable): factory() -> WebDriver
+            users (int): Concurrent virtual users
+            ramp_up (float): Seconds over which the users are started
+            duration (float): Seconds of the whole run, ramp-up included
+            think_time (float): Pause between two checkouts of one user
+            user (dict): Shop account with username and password
+        """
+        if ramp_up >= duration:
+            raise ValueError("ramp_up must be shorter than duration")
+        self.factory = factory
+        self.users = users
+        self.ramp_up = ramp_up
+        self.duration = duration
+        self.think_time = think_time
+        self.user = user
+
+    def run(self):
+        """Run the load and return the report dict"""
+        stats = LoadStats()
+        stop = threading.Event()
+        logger.info(
+            f"Starting {self.users} virtual users over {self.ramp_up:.0f}s, "
+            f"running {self.duration:.0f}s"
+        )
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=self.users, thread_name_prefix="virtual-user"
+        ) as pool:
+            for index in range(self.users):
+                delay = start + index * self.ramp_up / self.users - time.monotonic()
+                time.sleep(max(0.0, delay))
+                pool.submit(
+                    virtual_user,
+                    self.factory,
+                    self.user,
+                    stats,
+                    stop,
+                    self.think_time,
+                )
+
+            time.sleep(max(0.0, start + self.duration - time.monotonic()))
+            # Sampled at full load, before the browsers shut down
+            host = host_load()
+            stop.set()
+            end = time.monotonic()
+
+        return {
+            "users": self.users,
+            "ramp_up": self.ramp_up,
+            "duration": self.duration,
+            "overall": stats.summary(start, end),
+            "steady": stats.summary(start + self.ramp_up, end),
+            "errors": dict(stats.errors),
+            "host": host,
+        }
+
+
+def find_saturation(factory, max_users, step_users=1, **options):
+    """
+    Run stages with more and more users until the host saturates
+
+    The host is saturated at the first stage whose extra users add less than
+    SATURATION_MIN_EFFICIENCY of their share of steady-state throughput (the
+    throughput per user of the previous stage), or whose error rate exceeds
+    SATURATION_MAX_ERROR_RATE.
+
+    Args:
+        factory (callable): factory() -> WebDriver
+        max_users (int): Largest stage
+        step_users (int): Users added per stage
+        **options: LoadGenerator arguments of every stage
+
+    Returns:
+        tuple: (list of stage reports, user count of the saturated stage or
+            None if max_users was reached first)
+    """
+    stages = []
+    previous = previous_users = None
+    for users in range(step_users, max_users + 1, step_users):
+        report = LoadGenerator(factory, users=users, **options).run()
+        stages.append(report)
+        steady = report["steady"]
+        logger.info(
+            f"{users} users: {steady['checkouts_per_minute']:.1f} checkouts/min, "
+            f"{steady['error_rate']:.1%} errors"
+        )
+
+        if steady["error_rate"] > SATURATION_MAX_ERROR_RATE:
+            return stages, users
+        if previous is not None:
+            per_user = previous["checkouts_per_minute"] / previous_users
+            gain = steady["checkouts_per_minute"] - previous["checkouts_per_minute"]
+            efficiency = gain / (per_user * step_users) if per_user else 0.0
+            report["efficiency"] = round(efficiency, 2)
+            if efficiency < SATURATION_MIN_EFFICIENCY:
+                return stages, users
+        previous, previous_users = steady, users
+    return stages, None
+
+
+def format_report(report):
+    """Human readable lines of a LoadGenerator report"""
+    steady = report["steady"]
+    host = report["host"]
+    lines = [
+        (
+            f"{report['users']} users, {report['duration']:.0f}s "
+            f"({report['ramp_up']:.0f}s ramp-up)"
+        ),
+        (
+            f"Throughput: {steady['checkouts_per_minute']:.1f} checkouts/min "
+            f"steady, {report['overall']['checkouts_per_minute']:.1f} overall"
+        ),
+        (
+            f"Error rate: {steady['error_rate']:.1%} "
+            f"({steady['failed']} of {steady['checkouts'] + steady['failed']})"
+        ),
+    ]
+    for step, latency in steady["latency_ms"].items():
+        values = "  ".join(
+            f"p{pct} {latency[f'p{pct}']:7.0f} ms"
+            for pct in PERCENTILES
+            if latency[f"p{pct}"] is not None
+        )
+        lines.append(f"  {step:12s} {values}")
+    for error, count in report["errors"].items():
+        lines.append(f"  {count:4d}x {error}")
+    lines.append(
+        f"Host: load {host['load_per_cpu']} per CPU ({host['cpus']} CPUs), "
+        f"{host['available_memory_mb']} MB available"
+    )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive virtual shoppers through the shop with the page objects"
+    )
+    parser.add_argument("--users", type=int, default=LOAD_USERS)
+    parser.add_argument("--ramp-up", type=float, default=LOAD_RAMP_UP)
+    parser.add_argument("--duration", type=float, default=LOAD_DURATION)
+    parser.add_argument("--think-time", type=float, default=LOAD_THINK_TIME)
+    parser.add_argument("--browser", default=DEFAULT_BROWSER)
+    parser.add_argument(
+        "--fast-profile", action="store_true", help="Block images, fonts, analytics"
+    )
+    parser.add_argument(
+        "--url", default=None, help="Shop to load, default: a local shop stand-in"
+    )
+    parser.add_argument(
+        "--find-saturation",
+        action="store_true",
+        help="Add --step-users per stage up to --max-users until throughput "
+        "stops growing",
+    )
+    parser.add_argument("--max-users", type=int, default=4 * LOAD_USERS)
+    parser.add_argument("--step-users", type=int, default=1)
+    parser.add_argument("--output", default=os.path.join(LOAD_REPORT_DIR, "load.json"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    shop = None
+    if args.url:
+        settings.BASE_URL = args.url
+    else:
+        shop = LocalShop().start()
+        settings.BASE_URL = shop.base_url
+
+    def factory():
+        return create_driver(args.browser, headless=True, fast=args.fast_profile)
+
+    options = {
+        "ramp_up": args.ramp_up,
+        "duration": args.duration,
+        "think_time": args.think_time,
+    }
+    try:
+        if args.find_saturation:
+            stages, saturated_at = find_saturation(
+                factory, args.max_users, args.step_users, **options
+            )
+            result = {"stages": stages, "saturated_at": saturated_at}
+            for stage in stages:
+                logger.info("\n".join(format_report(stage)))
+            if saturated_at is None:
+                logger.info(f"No saturation up to {args.max_users} users")
+            else:
+                logger.info(f"Host saturates at {saturated_at} users")
+        else:
+            result = LoadGenerator(factory, users=args.users, **options).run()
+            logger.info("\n".join(format_report(result)))
+    finally:
+        if shop is not None:
+            shop.stop()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,636 @@
+"""
+Local SauceDemo stand-in
+Serves the login, inventory, cart and checkout pages with the same element
+IDs and classes as https://www.saucedemo.com/ so the suite can run offline
+
+Run standalone:
+    python -m utils.local_shop --port 8000
+"""
+
+import argparse
+import html
+import json
+import logging
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlparse
+
+from config.config import (
+    LOCAL_SHOP_HOST,
+    LOCAL_SHOP_PORT,
+    PERFORMANCE_GLITCH_DELAY,
+    SESSION_COOKIE_NAME,
+)
+
+logger = logging.getLogger(__name__)
+
+# Static files never change while a shop runs, browsers may cache them (pages
+# are always revalidated)
+STATIC_CACHE_CONTROL = "public, max-age=3600"
+
+# Same catalogue as SauceDemo, in its default (A to Z) order
+PRODUCTS = [
+    {
+        "id": 4,
+        "name": "Sauce Labs Backpack",
+        "price": 29.99,
+        "desc": "carry.allTheThings() with the sleek, streamlined Sly Pack that "
+        "melds uncompromising style with unequaled laptop and tablet protection.",
+        "image": "sauce-backpack",
+    },
+    {
+        "id": 0,
+        "name": "Sauce Labs Bike Light",
+        "price": 9.99,
+        "desc": "A red light isn't the desired state in testing but it sure helps "
+        "when riding your bike at night. Water-resistant with 3 lighting modes.",
+        "image": "bike-light",
+    },
+    {
+        "id": 1,
+        "name": "Sauce Labs Bolt T-Shirt",
+        "price": 15.99,
+        "desc": "Get your testing superhero on with the Sauce Labs bolt T-shirt. "
+        "From American Apparel, 100% ringspun combed cotton.",
+        "image": "bolt-shirt",
+    },
+    {
+        "id": 5,
+        "name": "Sauce Labs Fleece Jacket",
+        "price": 49.99,
+        "desc": "It's not every day that you come across a midweight quarter-zip "
+        "fleece jacket capable of handling everything from a relaxing day outdoors "
+        "to a busy day at the office.",
+        "image": "sauce-pullover",
+    },
+    {
+        "id": 2,
+        "name": "Sauce Labs Onesie",
+        "price": 7.99,
+        "desc": "Rib snap infant onesie for the junior automation engineer in "
+        "development. Reinforced 3-snap bottom closure.",
+        "image": "red-onesie",
+    },
+    {
+        "id": 3,
+        "name": "Test.allTheThings() T-Shirt (Red)",
+        "price": 15.99,
+        "desc": "This classic Sauce Labs t-shirt is perfect to wear when cozying "
+        "up to your keyboard to automate a few tests. Super-soft and comfy.",
+        "image": "red-tatt",
+    },
+]
+
+USERS = {
+    "standard_user",
+    "locked_out_user",
+    "problem_user",
+    "performance_glitch_user",
+}
+PASSWORD = "secret_sauce"
+CART_STORAGE_KEY = "cart-contents"
+
+PROTECTED_PAGES = {
+    "/inventory.html",
+    "/cart.html",
+    "/checkout-step-one.html",
+    "/checkout-step-two.html",
+    "/checkout-complete.html",
+}
+
+PLACEHOLDER_IMAGE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="200" height="200">'
+    '<rect width="200" height="200" fill="#e2231a"/></svg>'
+)
+
+STYLES = """
+body { font-family: sans-serif; margin: 0; }
+.primary_header { display: flex; justify-content: space-between; padding: 12px; }
+.shopping_cart_badge { background: #e2231a; color: #fff; border-radius: 50%;
+  padding: 2px 7px; }
+.inventory_item, .cart_item { display: flex; gap: 12px; padding: 12px;
+  border-bottom: 1px solid #ddd; }
+.inventory_item_img img { width: 120px; height: 120px; }
+.error-message-container { min-height: 40px; }
+.error-message-container.error { background: #e2231a; color: #fff; }
+.error-button { float: right; }
+"""
+
+# Client-side behaviour shared by all pages. Login state lives in the
+# session-username cookie and the cart in localStorage, as on SauceDemo.
+SHOP_SCRIPT = """
+(function () {
+  var CART_KEY = "cart-contents";
+  var USERS = __USERS__;
+  var PRODUCTS = __PRODUCTS__;
+
+  function byId(id) { return document.getElementById(id); }
+  function product(id) {
+    for (var i = 0; i < PRODUCTS.length; i++) {
+      if (PRODUCTS[i].id === id) { return PRODUCTS[i]; }
+    }
+    return null;
+  }
+  function money(value) { return "$" + value.toFixed(2); }
+  function readCart() {
+    try { return JSON.parse(localStorage.getItem(CART_KEY)) || []; }
+    catch (e) { return []; }
+  }
+  function writeCart(cart) {
+    if (cart.length) { localStorage.setItem(CART_KEY, JSON.stringify(cart)); }
+    else { localStorage.removeItem(CART_KEY); }
+    renderBadge();
+  }
+  function currentUser() {
+    var match = document.cookie.match(/(?:^|; )session-username=([^;]*)/);
+    return match ? decodeURIComponent(match[1]) : null;
+  }
+  function go(path) { window.location.href = path; }
+
+  function renderBadge() {
+    var link = document.querySelector(".shopping_cart_link");
+    if (!link) { return; }
+    var count = readCart().length;
+    var badge = link.querySelector(".shopping_cart_badge");
+    if (count && !badge) {
+      badge = document.createElement("span");
+      badge.className = "shopping_cart_badge";
+      badge.setAttribute("data-test", "shopping-cart-badge");
+      link.appendChild(badge);
+    }
+    if (badge) {
+      if (count) { badge.textContent = String(count); } else { badge.remove(); }
+    }
+  }
+
+  function showError(message) {
+    var container = document.querySelector(".error-message-container");
+    container.classList.add("error");
+    container.innerHTML = '<h3 data-test="error"><button class="error-button" ' +
+      'data-test="error-button" type="button">x</button></h3>';
+    container.querySelector("h3").appendChild(document.createTextNode(message));
+    container.querySelector(".error-button").addEventListener("click", function () {
+      container.classList.remove("error");
+      container.innerHTML = "";
+    });
+  }
+
+  function initLogin() {
+    var denied = new URLSearchParams(window.location.search).get("denied");
+    if (denied) {
+      showError("Epic sadface: You can only access '" + denied +
+        "' when you are logged in.");
+    }
+    byId("login_button_container").addEventListener("submit", function (event) {
+      event.preventDefault();
+      var username = byId("user-name").value;
+      var password = byId("password").value;
+      if (!username) { return showError("Epic sadface: Username is required"); }
+      if (!password) { return showError("Epic sadface: Password is required"); }
+      if (USERS.indexOf(username) < 0 || password !== __PASSWORD__) {
+        return showError("Epic sadface: Username and password do not match " +
+          "any user in this service");
+      }
+      if (username === "locked_out_user") {
+        return showError("Epic sadface: Sorry, this user has been locked out.");
+      }
+      var expires = new Date(Date.now() + 10 * 60 * 1000).toUTCString();
+      document.cookie = "session-username=" + encodeURIComponent(username) +
+        "; expires=" + expires + "; path=/";
+      go("/inventory.html");
+    });
+  }
+
+  function updateButton(button, inCart) {
+    var name = button.getAttribute("data-slug");
+    button.id = (inCart ? "remove-" : "add-to-cart-") + name;
+    button.setAttribute("data-test", button.id);
+    button.textContent = inCart ? "Remove" : "Add to cart";
+    button.className = "btn btn_small btn_inventory " +
+      (inCart ? "btn_secondary" : "btn_primary");
+  }
+
+  function initInventory() {
+    var cart = readCart();
+    var buttons = document.querySelectorAll(".btn_inventory");
+    Array.prototype.forEach.call(buttons, function (button) {
+      var id = Number(button.getAttribute("data-item-id"));
+      updateButton(button, cart.indexOf(id) >= 0);
+      button.addEventListener("click", function () {
+        var current = readCart();
+        var index = current.indexOf(id);
+        if (index >= 0) { current.splice(index, 1); } else { current.push(id); }
+        updateButton(button, index < 0);
+        writeCart(current);
+      });
+    });
+
+    byId("sort_container").addEventListener("change", function (event) {
+      if (currentUser() === "problem_user") { return; }
+      var list = document.querySelector(".inventory_list");
+      var items = Array.prototype.slice.call(list.children);
+      var key = event.target.value;
+      items.sort(function (a, b) {
+        var pa = product(Number(a.getAttribute("data-item-id")));
+        var pb = product(Number(b.getAttribute("data-item-id")));
+        if (key === "lohi") { return pa.price - pb.price; }
+        if (key === "hilo") { return pb.price - pa.price; }
+        var cmp = pa.name < pb.name ? -1 : (pa.name > pb.name ? 1 : 0);
+        return key === "za" ? -cmp : cmp;
+      });
+      items.forEach(function (item) { list.appendChild(item); });
+    });
+  }
+
+  function cartItemHtml(item) {
+    return '<div class="cart_item"><div class="cart_quantity">1</div>' +
+      '<div class="cart_item_label"><div class="inventory_item_name" ' +
+      'data-test="inventory-item-name"></div><div class="inventory_item_desc">' +
+      '</div><div class="item_pricebar"><div class="inventory_item_price" ' +
+      'data-test="inventory-item-price">' + money(item.price) + '</div>' +
+      '</div></div></div>';
+  }
+
+  function renderItems(container) {
+    readCart().forEach(function (id) {
+      var item = product(id);
+      if (!item) { return; }
+      container.insertAdjacentHTML("beforeend", cartItemHtml(item));
+      var row = container.lastElementChild;
+      row.querySelector(".inventory_item_name").textContent = item.name;
+      row.querySelector(".inventory_item_desc").textContent = item.desc;
+    });
+  }
+
+  function initCart() {
+    renderItems(document.querySelector(".cart_list"));
+    byId("checkout").addEventListener("click", function () {
+      go("/checkout-step-one.html");
+    });
+    byId("continue-shopping").addEventListener("click", function () {
+      go("/inventory.html");
+    });
+  }
+
+  function initCheckoutStepOne() {
+    byId("checkout_info_form").addEventListener("submit", function (event) {
+      event.preventDefault();
+      if (!byId("first-name").value) { return showError("Error: First Name is required"); }
+      if (!byId("last-name").value) { return showError("Error: Last Name is required"); }
+      if (!byId("postal-code").value) {
+        return showError("Error: Postal Code is required");
+      }
+      go("/checkout-step-two.html");
+    });
+    byId("cancel").addEventListener("click", function () { go("/cart.html"); });
+  }
+
+  function initCheckoutStepTwo() {
+    renderItems(document.querySelector(".cart_list"));
+    var subtotal = readCart().reduce(function (sum, id) {
+      var item = product(id);
+      return sum + (item ? item.price : 0);
+    }, 0);
+    var tax = Math.round(subtotal * 8) / 100;
+    document.querySelector(".summary_subtotal_label").textContent =
+      "Item total: " + money(subtotal);
+    document.querySelector(".summary_tax_label").textContent = "Tax: " + money(tax);
+    document.querySelector(".summary_total_label").textContent =
+      "Total: " + money(subtotal + tax);
+    byId("finish").addEventListener("click", function () {
+      writeCart([]);
+      go("/checkout-complete.html");
+    });
+    byId("cancel").addEventListener("click", function () { go("/inventory.html"); });
+  }
+
+  function initCheckoutComplete() {
+    byId("back-to-products").addEventListener("click", function () {
+      go("/inventory.html");
+    });
+  }
+
+  var PAGES = {
+    "login": initLogin,
+    "inventory": initInventory,
+    "cart": initCart,
+    "checkout-step-one": initCheckoutStepOne,
+    "checkout-step-two": initCheckoutStepTwo,
+    "checkout-complete": initCheckoutComplete
+  };
+
+  document.addEventListener("DOMContentLoaded", function () {
+    var link = document.querySelector(".shopping_cart_link");
+    if (link) {
+      link.addEventListener("click", function () { go("/cart.html"); });
+    }
+    renderBadge();
+    PAGES[document.body.getAttribute("data-page")]();
+  });
+})();
+"""
+
+
+def _slug(name):
+    """Button id suffix, e.g. 'Sauce Labs Backpack' -> 'sauce-labs-backpack'"""
+    slug = "".join(c if c.isalnum() or c in ".()" else "-" for c in name.lower())
+    while "--" in slug:
+        slug = slug.replace("--", "-")
+    return slug
+
+
+def _page(page, title, body):
+    """Wrap page content in the common document skeleton"""
+    return (
+        "<!DOCTYPE html>"
+        '<html lang="en"><head><meta charset="utf-8">'
+        f"<title>{title}</title>"
+        '<link rel="stylesheet" href="/static/css/shop.css">'
+        '<script src="/static/js/shop.js"></script>'
+        f'</head><body data-page="{page}">{body}</body></html>'
+    )
+
+
+def _header(secondary):
+    """Primary header with the shopping cart link"""
+    return (
+        '<div id="header_container" class="header_container">'
+        '<div class="primary_header"><div class="app_logo">Swag Labs</div>'
+        '<div id="shopping_cart_container" class="shopping_cart_container">'
+        '<a class="shopping_cart_link" data-test="shopping-cart-link"></a>'
+        "</div></div>"
+        f'<div class="header_secondary_container">{secondary}</div></div>'
+    )
+
+
+def render_login():
+    body = (
+        '<div class="login_container"><div class="login_logo">Swag Labs</div>'
+        '<div class="login_wrapper"><form id="login_button_container">'
+        '<input class="input_error form_input" placeholder="Username" type="text" '
+        'data-test="username" id="user-name" name="user-name" autocomplete="off">'
+        '<input class="input_error form_input" placeholder="Password" '
+        'type="password" data-test="password" id="password" name="password" '
+        'autocomplete="off">'
+        '<div class="error-message-container"></div>'
+        '<input type="submit" class="submit-button btn_action" data-test="login-button" '
+        'id="login-button" name="login-button" value="Login">'
+        "</form></div></div>"
+    )
+    return _page("login", "Swag Labs", body)
+
+
+def render_inventory(username):
+    items = []
+    for item in PRODUCTS:
+        name = html.escape(item["name"])
+        image = "sl-404" if username == "problem_user" else item["image"]
+        slug = _slug(item["name"])
+        items.append(
+            f'<div class="inventory_item" data-item-id="{item["id"]}">'
+            '<div class="inventory_item_img">'
+            f'<a href="#" id="item_{item["id"]}_img_link">'
+            f'<img alt="{name}" class="inventory_item_img" '
+            f'src="/static/media/{image}.svg"></a></div>'
+            '<div class="inventory_item_description"><div class="inventory_item_label">'
+            f'<a href="#" id="item_{item["id"]}_title_link">'
+            f'<div class="inventory_item_name" data-test="inventory-item-name">{name}'
+            "</div></a>"
+            f'<div class="inventory_item_desc">{html.escape(item["desc"])}</div></div>'
+            '<div class="pricebar">'
+            f'<div class="inventory_item_price">${item["price"]:.2f}</div>'
+            '<button class="btn btn_primary btn_small btn_inventory" '
+            f'id="add-to-cart-{slug}" data-test="add-to-cart-{slug}" '
+            f'data-slug="{slug}" data-item-id="{item["id"]}">Add to cart</button>'
+            "</div></div></div>"
+        )
+
+    sort = (
+        '<span class="title" data-test="title">Products</span>'
+        '<select class="product_sort_container" data-test="product-sort-container" '
+        'id="sort_container">'
+        '<option value="az">Name (A to Z)</option>'
+        '<option value="za">Name (Z to A)</option>'
+        '<option value="lohi">Price (low to high)</option>'
+        '<option value="hilo">Price (high to low)</option></select>'
+    )
+    body = (
+        '<div id="page_wrapper" class="page_wrapper">'
+        f"{_header(sort)}"
+        '<div id="inventory_container" class="inventory_container">'
+        f'<div class="inventory_list">{"".join(items)}</div></div></div>'
+    )
+    return _page("inventory", "Swag Labs", body)
+
+
+def render_cart():
+    body = (
+        _header('<span class="title">Your Cart</span>')
+        + '<div id="cart_contents_container"><div class="cart_list"></div>'
+        '<button class="btn btn_secondary back" id="continue-shopping">'
+        "Continue Shopping</button>"
+        '<button class="btn btn_action checkout_button" id="checkout" '
+        'data-test="checkout">Checkout</button></div>'
+    )
+    return _page("cart", "Swag Labs", body)
+
+
+def render_checkout_step_one():
+    body = (
+        _header('<span class="title">Checkout: Your Information</span>')
+        + '<div id="checkout_info_container"><form id="checkout_info_form">'
+        '<input class="form_input" placeholder="First Name" type="text" '
+        'data-test="firstName" id="first-name" name="firstName">'
+        '<input class="form_input" placeholder="Last Name" type="text" '
+        'data-test="lastName" id="last-name" name="lastName">'
+        '<input class="form_input" placeholder="Zip/Postal Code" type="text" '
+        'data-test="postalCode" id="postal-code" name="postalCode">'
+        '<div class="error-message-container"></div>'
+        '<button class="btn btn_secondary cart_cancel_link" id="cancel" '
+        'type="button">Cancel</button>'
+        '<input type="submit" class="submit-button btn btn_primary cart_button" '
+        'data-test="continue" id="continue" name="continue" value="Continue">'
+        "</form></div>"
+    )
+    return _page("checkout-step-one", "Swag Labs", body)
+
+
+def render_checkout_step_two():
+    body = (
+        _header('<span class="title">Checkout: Overview</span>')
+        + '<div id="checkout_summary_container"><div class="cart_list"></div>'
+        '<div class="summary_info">'
+        '<div class="summary_subtotal_label"></div>'
+        '<div class="summary_tax_label"></div>'
+        '<div class="summary_total_label"></div></div>'
+        '<button class="btn btn_secondary cart_cancel_link" id="cancel">Cancel'
+        "</button>"
+        '<button class="btn btn_action cart_button" id="finish" data-test="finish">'
+        "Finish</button></div>"
+    )
+    return _page("checkout-step-two", "Swag Labs", body)
+
+
+def render_checkout_complete():
+    body = (
+        _header('<span class="title">Checkout: Complete!</span>')
+        + '<div id="checkout_complete_container" class="checkout_complete_container">'
+        '<h2 class="complete-header" data-test="complete-header">'
+        "Thank you for your order!</h2>"
+        '<div class="complete-text">Your order has been dispatched, and will arrive '
+        "just as fast as the pony can get there!</div>"
+        '<button class="btn btn_primary btn_small" id="back-to-products" '
+        'data-test="back-to-products">Back Home</button></div>'
+    )
+    return _page("checkout-complete", "Swag Labs", body)
+
+
+PAGE_RENDERERS = {
+    "/": render_login,
+    "/index.html": render_login,
+    "/cart.html": render_cart,
+    "/checkout-step-one.html": render_checkout_step_one,
+    "/checkout-step-two.html": render_checkout_step_two,
+    "/checkout-complete.html": render_checkout_complete,
+}
+
+
+class ShopRequestHandler(BaseHTTPRequestHandler):
+    """Serves the stand-in pages and static assets"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "LocalShop/1.0"
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        username = self._session_user()
+
+        if path in PROTECTED_PAGES and username is None:
+            self._redirect(f"/?denied={quote(path)}")
+            return
+
+        # SauceDemo slows every page down for this user
+        if username == "performance_glitch_user" and path in PROTECTED_PAGES:
+            time.sleep(self.server.glitch_delay)
+
+        if path == "/inventory.html":
+            self._send(200, "text/html; charset=utf-8", render_inventory(username))
+        elif path in PAGE_RENDERERS:
+            self._send(200, "text/html; charset=utf-8", PAGE_RENDERERS[path]())
+        elif path == "/static/js/shop.js":
+            self._send(
+                200, "application/javascript", self.server.script, STATIC_CACHE_CONTROL
+            )
+        elif path == "/static/css/shop.css":
+            self._send(200, "text/css", STYLES, STATIC_CACHE_CONTROL)
+        elif path.startswith("/static/media/") and path.endswith(".svg"):
+            self._send(200, "image/svg+xml", PLACEHOLDER_IMAGE, STATIC_CACHE_CONTROL)
+        else:
+            self._send(404, "text/plain", "Not Found")
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _session_user(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        morsel = cookie.get(SESSION_COOKIE_NAME)
+        if morsel is None or morsel.value not in USERS:
+            return None
+        return morsel.value
+
+    def _redirect(self, location):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send(self, status, content_type, content, cache_control="no-cache"):
+        data = content.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", cache_control)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class LocalShop:
+    """
+    Local SauceDemo stand-in running in a background thread
+
+    Usage:
+        with LocalShop() as shop:
+            driver.get(shop.base_url)
+    """
+
+    def __init__(
+        self,
+        host=LOCAL_SHOP_HOST,
+        port=LOCAL_SHOP_PORT,
+        glitch_delay=PERFORMANCE_GLITCH_DELAY,
+    ):
+        self.host = host
+        self.port = port
+        self.glitch_delay = glitch_delay
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Root URL of the running shop, with trailing slash like BASE_URL"""
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        """Start serving, port 0 picks a free port"""
+        self._server = ThreadingHTTPServer((self.host, self.port), ShopRequestHandler)
+        self._server.daemon_threads = True
+        self._server.glitch_delay = self.glitch_delay
+        self._server.script = (
+            SHOP_SCRIPT.replace("__USERS__", json.dumps(sorted(USERS)))
+            .replace("__PASSWORD__", json.dumps(PASSWORD))
+            .replace("__PRODUCTS__", json.dumps(PRODUCTS))
+        )
+        self.port = self._server.server_address[1]
+
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="local-shop", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Local shop running at {self.base_url}")
+        return self
+
+    def stop(self):
+        """Stop serving and release the port"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        logger.info("Local shop stopped")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local SauceDemo stand-in")
+    parser.add_argument("--host", default=LOCAL_SHOP_HOST)
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    shop = LocalShop(host=args.host, port=args.port).start()
+    try:
+        shop._thread.join()
+    except KeyboardInterrupt:
+        shop.stop()
+
+
+if __name__ == "__main__":
+    main()
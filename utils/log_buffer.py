@@ -0,0 +1,45 @@
+"""
+Per-test log ring buffer
+Keeps the latest log records of the running test in memory and only formats
+them when the test fails
+"""
+
+import collections
+import logging
+
+from config.config import LOG_BUFFER_SIZE
+
+LOG_FORMAT = "%(asctime)s [%(levelname)8s] %(name)s: %(message)s"
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Logging handler that stores records without formatting them
+
+    Emitting only appends the record to a bounded deque, so a log call costs
+    the LogRecord creation and nothing else; messages and arguments are
+    formatted by flush() when the test turned out to need them.
+    """
+
+    def __init__(self, capacity=LOG_BUFFER_SIZE, level=logging.NOTSET):
+        super().__init__(level)
+        self.buffer = collections.deque(maxlen=capacity)
+        self.dropped = 0
+        self.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    def emit(self, record):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(record)
+
+    def clear(self):
+        """Start a new test"""
+        self.buffer.clear()
+        self.dropped = 0
+
+    def flush_text(self):
+        """Format the buffered records as log lines"""
+        lines = [self.format(record) for record in self.buffer]
+        if self.dropped:
+            lines.insert(0, f"... {self.dropped} earlier records dropped")
+        return "\n".join(lines)
@@ -0,0 +1,21 @@
+"""
+Metrics helpers
+Summary statistics shared by the load generator and the benchmarks
+"""
+
+import math
+
+
+def add_counts(totals, counts):
+    """Add the numbers of counts to totals key by key, returns totals"""
+    for key, value in counts.items():
+        totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile, None without values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
@@ -0,0 +1,168 @@
+"""
+Page transition timing
+Reads Navigation Timing and Resource Timing from the browser around a page
+transition
+"""
+
+import json
+import logging
+import os
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from config.config import EXPLICIT_WAIT, WAIT_POLL_FREQUENCY
+
+logger = logging.getLogger(__name__)
+
+# Marks the start of a transition in the current document
+MARK_SCRIPT = """
+window.__transitionMark = performance.now();
+return performance.timeOrigin;
+"""
+
+# True once a new document has replaced the one with timeOrigin arguments[0]
+# and finished loading
+NEW_DOCUMENT_LOADED_SCRIPT = """
+return performance.timeOrigin !== arguments[0]
+    && document.readyState === "complete";
+"""
+
+# Navigation entry of the current document and the resources it loaded since
+# the transition mark (the whole document when there is no mark)
+TIMING_SCRIPT = """
+var mark = window.__transitionMark || 0;
+var nav = performance.getEntriesByType("navigation")[0];
+var resources = performance.getEntriesByType("resource").filter(function (r) {
+    return r.startTime >= mark;
+});
+return {
+    timeOrigin: performance.timeOrigin,
+    navigation: nav ? {
+        ttfb: nav.responseStart,
+        response_end: nav.responseEnd,
+        dom_interactive: nav.domInteractive,
+        dom_content_loaded: nav.domContentLoadedEventEnd,
+        load: nav.loadEventEnd,
+        transfer_size: nav.transferSize
+    } : null,
+    resources: resources.map(function (r) {
+        return {
+            name: r.name,
+            type: r.initiatorType,
+            duration: Math.round(r.duration * 10) / 10,
+            transfer_size: r.transferSize
+        };
+    })
+};
+"""
+
+
+def measure_transition(driver, name, action, navigates=True, timeout=EXPLICIT_WAIT):
+    """
+    Run action and collect the browser timings of the resulting transition
+
+    For a navigation the Navigation Timing entry of the new document is
+    used, duration_ms is its load event end. For in-page transitions (e.g.
+    sorting) duration_ms is the wall clock time of action.
+
+    Args:
+        driver: WebDriver instance
+        name (str): Transition name, used for budgets and reports
+        action (callable): Performs the transition
+        navigates (bool): action loads a new document
+        timeout (float): Seconds to wait for the new document to load
+
+    Returns:
+        dict: name, duration_ms, wall_ms, navigation timings (or None) and a
+            resource summary
+    """
+    origin = driver.execute_script(MARK_SCRIPT)
+    start = time.perf_counter()
+    action()
+
+    if navigates:
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=WAIT_POLL_FREQUENCY).until(
+                lambda d: d.execute_script(NEW_DOCUMENT_LOADED_SCRIPT, origin)
+            )
+        except TimeoutException:
+            logger.warning(f"⚠️ {name}: new page did not finish loading")
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    timing = driver.execute_script(TIMING_SCRIPT)
+    navigation = timing["navigation"] if timing["timeOrigin"] != origin else None
+    resources = timing["resources"]
+
+    if navigation is not None:
+        duration_ms = navigation["load"] or navigation["dom_content_loaded"]
+    else:
+        duration_ms = wall_ms
+
+    result = {
+        "name": name,
+        "duration_ms": round(duration_ms, 1),
+        "wall_ms": round(wall_ms, 1),
+        "navigation": _rounded(navigation),
+        "resources": {
+            "count": len(resources),
+            "transfer_bytes": sum(r["transfer_size"] for r in resources),
+            "slowest": sorted(resources, key=lambda r: r["duration"], reverse=True)[:3],
+        },
+    }
+    logger.info(
+        f"Transition {name}: {result['duration_ms']:.0f} ms "
+        f"({len(resources)} resources)"
+    )
+    return result
+
+
+def write_trend(path, runs):
+    """Append one JSON line per journey run (user, browser, transitions)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        f.writelines(json.dumps(run) + "\n" for run in runs)
+
+
+def compare_users(runs, baseline_user, slow_user):
+    """
+    Transition durations of slow_user against baseline_user, per browser
+
+    Args:
+        runs (list[dict]): Journey runs with user, browser and transitions
+        baseline_user (str): Username the slowdown is relative to
+        slow_user (str): Username compared against it
+
+    Returns:
+        dict: {browser: {transition: {standard_ms, glitch_ms, slowdown}}} for
+            every browser on which both users ran
+    """
+    durations = {}
+    for run in runs:
+        durations[(run["browser"], run["user"])] = {
+            t["name"]: t["duration_ms"] for t in run["transitions"]
+        }
+
+    comparison = {}
+    for browser in sorted({browser for browser, _ in durations}):
+        standard = durations.get((browser, baseline_user))
+        glitch = durations.get((browser, slow_user))
+        if not (standard and glitch):
+            continue
+        comparison[browser] = {
+            name: {
+                "standard_ms": duration,
+                "glitch_ms": glitch[name],
+                "slowdown": round(glitch[name] / duration, 2) if duration else None,
+            }
+            for name, duration in standard.items()
+            if name in glitch
+        }
+    return comparison
+
+
+def _rounded(values):
+    if values is None:
+        return None
+    return {key: round(value, 1) for key, value in values.items()}
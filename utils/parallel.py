@@ -0,0 +1,170 @@
+"""
+Parallel execution helpers
+Worker identity, per-worker output paths and resource-aware worker sizing
+for pytest-xdist
+"""
+
+import json
+import logging
+import os
+
+from config.config import (
+    BROWSER_MEMORY_MB,
+    DRIVER_CACHE_DIR,
+    MAX_WORKERS,
+    RESERVED_MEMORY_MB,
+)
+from utils import processes
+
+logger = logging.getLogger(__name__)
+
+FOOTPRINT_FILE = "browser_footprint.json"
+
+# Browsers whose footprint this process has already measured
+_measured = set()
+
+
+def worker_id():
+    """xdist worker name (gw0, gw1, ...) or "main" when not running in parallel"""
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+def is_worker():
+    return "PYTEST_XDIST_WORKER" in os.environ
+
+
+def worker_path(path):
+    """
+    Per-worker variant of an output path, so parallel workers never write to
+    the same file: reports/commands.jsonl -> reports/commands-gw0.jsonl
+    """
+    if not is_worker():
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{worker_id()}{ext}"
+
+
+def merge_worker_files(path):
+    """Concatenate the per-worker variants of path into path and remove them"""
+    root, ext = os.path.splitext(path)
+    directory = os.path.dirname(path) or "."
+    prefix = os.path.basename(root) + "-gw"
+    if not os.path.isdir(directory):
+        return
+
+    parts = sorted(
+        name
+        for name in os.listdir(directory)
+        if name.startswith(prefix) and name.endswith(ext)
+    )
+    if not parts:
+        return
+
+    with open(path, "a", encoding="utf-8") as merged:
+        for name in parts:
+            part_path = os.path.join(directory, name)
+            with open(part_path, encoding="utf-8") as part:
+                merged.write(part.read())
+            os.remove(part_path)
+    logger.info(f"Merged {len(parts)} worker files into {path}")
+
+
+def cpu_count():
+    """CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        return os.cpu_count() or 1
+
+
+def available_memory_mb():
+    """Memory available for new processes, None if it cannot be determined"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+
+    try:
+        pages = os.sysconf("SC_AVPHYS_PAGES")
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        return pages * page_size // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def browser_footprint_mb(browser):
+    """Measured memory footprint of one browser, BROWSER_MEMORY_MB if unknown"""
+    measured = _read_footprints().get(browser)
+    return measured or BROWSER_MEMORY_MB
+
+
+def record_browser_footprint(driver, browser):
+    """
+    Measure the resident memory of the browser process tree behind driver
+    and keep the largest value seen for future worker sizing. Measured once
+    per browser and process, Linux only.
+    """
+    if browser in _measured:
+        return None
+    _measured.add(browser)
+
+    root_pid = processes.driver_root_pid(driver)
+    if root_pid is None:
+        return None
+
+    rss_mb = processes.tree_rss_kb(root_pid) / 1024
+    if not rss_mb:
+        return None
+
+    footprints = _read_footprints()
+    if rss_mb > footprints.get(browser, 0):
+        footprints[browser] = round(rss_mb)
+        os.makedirs(DRIVER_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{_footprint_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(footprints, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, _footprint_path())
+
+    logger.debug(f"{browser} browser footprint: {rss_mb:.0f} MB")
+    return rss_mb
+
+
+def recommended_workers(browser):
+    """
+    Number of xdist workers the machine can run without oversubscribing
+
+    One worker per CPU, capped by how many browsers fit into the available
+    memory (minus RESERVED_MEMORY_MB) and by MAX_WORKERS when set.
+    """
+    cpus = cpu_count()
+    workers = cpus
+
+    memory = available_memory_mb()
+    footprint = browser_footprint_mb(browser)
+    if memory is not None:
+        workers = min(workers, (memory - RESERVED_MEMORY_MB) // footprint)
+
+    if MAX_WORKERS:
+        workers = min(workers, MAX_WORKERS)
+
+    workers = max(1, int(workers))
+    logger.info(
+        f"Worker sizing: {cpus} CPUs, {memory} MB available, "
+        f"{footprint} MB per {browser} browser -> {workers} workers"
+    )
+    return workers
+
+
+def _footprint_path():
+    return os.path.join(DRIVER_CACHE_DIR, FOOTPRINT_FILE)
+
+
+def _read_footprints():
+    try:
+        with open(_footprint_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
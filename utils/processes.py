@@ -0,0 +1,95 @@
+"""
+Browser process helpers
+Process trees behind a WebDriver service, read from /proc (Linux only)
+"""
+
+import os
+import signal
+
+
+def driver_root_pid(driver):
+    """PID of the chromedriver/geckodriver process, None if unknown"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def process_tree(root_pid):
+    """root_pid and all its descendants, just root_pid without /proc"""
+    if not os.path.isdir("/proc"):
+        return [root_pid]
+
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        stat = _read_stat(int(name))
+        if stat is not None:
+            children.setdefault(int(stat[1]), []).append(int(name))
+
+    tree = []
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(children.get(pid, []))
+    return tree
+
+
+def start_time(pid):
+    """Start time of a process in clock ticks since boot, None if unknown"""
+    stat = _read_stat(pid)
+    return int(stat[19]) if stat is not None else None
+
+
+def is_alive(pid, started=None):
+    """
+    The process exists and, when started is given, is still the same process
+    (PIDs are reused). Zombies count as gone.
+    """
+    if started is not None:
+        stat = _read_stat(pid)
+        return stat is not None and stat[0] != "Z" and int(stat[19]) == started
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def kill(pid):
+    """Kill a process, True if a signal was delivered"""
+    try:
+        os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+    except OSError:
+        return False
+    return True
+
+
+def tree_rss_kb(root_pid):
+    """Sum of VmRSS over root_pid and all its descendants, 0 without /proc"""
+    if not os.path.isdir("/proc"):
+        return 0
+
+    total = 0
+    for pid in process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total
+
+
+def _read_stat(pid):
+    """Fields of /proc/<pid>/stat after the command name, None if unreadable"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces, fields after it are fixed
+            return f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
@@ -0,0 +1,186 @@
+"""
+Browser profile template
+Prepares a browser profile once per session and starts every browser on its
+own copy of it, instead of an empty incognito profile (--profile-template)
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urljoin
+
+from config import config
+from config.config import PROFILE_TEMPLATE_DIR, PROFILE_WARMUP_PATHS, STANDARD_USER
+from pages.login_page import LoginPage
+
+logger = logging.getLogger(__name__)
+
+# Files a running browser keeps in its profile, never copied
+LOCK_FILES = {
+    "SingletonLock",
+    "SingletonSocket",
+    "SingletonCookie",
+    "lock",
+    ".parentlock",
+    "parent.lock",
+}
+
+
+def copy_profile(source, target):
+    """
+    Copy a profile directory, sharing blocks with the source where the
+    filesystem supports copy-on-write (cp --reflink=auto on Linux)
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            subprocess.run(
+                ["cp", "-R", "--reflink=auto", source, target],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise OSError(f"Copying profile {source} failed: {e.stderr.strip()}")
+    else:
+        shutil.copytree(source, target, symlinks=True)
+
+    for directory, _, files in os.walk(target):
+        for name in LOCK_FILES.intersection(files):
+            os.remove(os.path.join(directory, name))
+
+
+def warm_up(driver):
+    """
+    Visit PROFILE_WARMUP_PATHS as standard_user so their resources land in the
+    HTTP cache, then drop the session again: copies must start logged out
+    with an empty cart
+    """
+    LoginPage(driver).inject_session(STANDARD_USER["username"])
+    for path in PROFILE_WARMUP_PATHS:
+        driver.get(urljoin(config.BASE_URL, path))
+    driver.delete_all_cookies()
+    driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+
+
+class ProfileTemplate:
+    """
+    Profiles prepared once, copied for every browser
+
+    The template of a browser/options combination is created on first use:
+    a browser is started on an empty profile directory, warmed up and quit,
+    which leaves first-run state, preferences and HTTP cache on disk.
+    launch() copies the template and starts a browser on the copy, the copy
+    is deleted when that browser quits.
+    """
+
+    def __init__(self, factory, warm_up=warm_up, root=PROFILE_TEMPLATE_DIR):
+        """
+        Args:
+            factory (callable): factory(browser, profile_dir=..., **options)
+                -> WebDriver
+            warm_up (callable): warm_up(driver), run on the template browser
+            root (str): Directory below which templates and copies are kept
+        """
+        self.factory = factory
+        self.warm_up = warm_up
+        os.makedirs(root, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix="session-", dir=root)
+        self._templates = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "prepared": 0,
+            "prepare_seconds": 0.0,
+            "copies": 0,
+            "copy_seconds": 0.0,
+        }
+
+    def prepare(self, browser, **options):
+        """
+        Return the template directory for browser and options, creating it
+        on first use
+
+        Args:
+            browser (str): Browser name: chrome, firefox
+            **options: Extra factory arguments, e.g. fast=True
+        """
+        key = (browser, tuple(sorted(options.items())))
+        # Prewarm threads may ask at the same time, only one prepares
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                template = self._prepare(browser, options, len(self._templates))
+                self._templates[key] = template
+        return template
+
+    def launch(self, browser, **options):
+        """Start a browser on a fresh copy of the template"""
+        template = self.prepare(browser, **options)
+
+        start = time.perf_counter()
+        profile_dir = tempfile.mkdtemp(prefix=f"{browser}-", dir=self.directory)
+        os.rmdir(profile_dir)
+        copy_profile(template, profile_dir)
+        self.stats["copies"] += 1
+        self.stats["copy_seconds"] += time.perf_counter() - start
+
+        try:
+            driver = self.factory(browser, profile_dir=profile_dir, **options)
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+
+        driver_quit = driver.quit
+
+        def quit_and_remove_profile():
+            try:
+                driver_quit()
+            finally:
+                shutil.rmtree(profile_dir, ignore_errors=True)
+
+        driver.quit = quit_and_remove_profile
+        return driver
+
+    def close(self):
+        """Delete the templates and any copy left behind"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def format_stats(stats):
+        """
+        Human readable summary of template preparation and copy cost
+
+        Args:
+            stats (dict): ProfileTemplate.stats, possibly added up over xdist
+                workers
+        """
+        copies = stats["copies"]
+        per_copy = stats["copy_seconds"] / copies * 1000 if copies else 0.0
+        return (
+            f"Profile template: {stats['prepared']} prepared "
+            f"({stats['prepare_seconds']:.2f}s), {copies} browsers started on "
+            f"copies ({per_copy:.0f} ms per copy)"
+        )
+
+    def _prepare(self, browser, options, number):
+        template = os.path.join(self.directory, f"template-{browser}-{number}")
+        os.makedirs(template)
+        logger.info(f"Preparing {browser} profile template in {template}")
+
+        start = time.perf_counter()
+        driver = self.factory(browser, profile_dir=template, **options)
+        try:
+            self.warm_up(driver)
+        finally:
+            # The browser writes its preferences and cache index on exit
+            driver.quit()
+        elapsed = time.perf_counter() - start
+
+        self.stats["prepared"] += 1
+        self.stats["prepare_seconds"] += elapsed
+        logger.info(f"{browser} profile template ready after {elapsed:.2f}s")
+        return template
@@ -0,0 +1,186 @@
+"""
+Test duration history
+Keeps per-test durations and outcomes between runs and uses them to balance
+shards and order tests
+"""
+
+import json
+import logging
+import os
+
+from config.config import (
+    DEFAULT_TEST_DURATION,
+    FLAKE_MIN_RUNS,
+    HISTORY_OUTCOMES,
+    HISTORY_SMOOTHING,
+)
+
+logger = logging.getLogger(__name__)
+
+HISTORY_VERSION = 1
+
+# One letter per outcome in the outcomes string, flaky = passed on a rerun
+OUTCOME_CODES = {"passed": "p", "failed": "f", "skipped": "s", "flaky": "r"}
+
+
+class TestHistory:
+    """
+    Durations and recent outcomes of tests, keyed by node id
+
+    The expected duration is an exponentially weighted moving average, so a
+    single slow run does not throw the balancing off. Outcomes are kept as a
+    short string of the most recent results (p = passed, f = failed,
+    s = skipped, r = passed on a rerun), newest last.
+    """
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, path):
+        self.path = path
+        self.tests = {}
+
+    @classmethod
+    def load(cls, path):
+        history = cls(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == HISTORY_VERSION:
+                history.tests = data["tests"]
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable test history {path}: {e}")
+        return history
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": HISTORY_VERSION, "tests": self.tests},
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    def record(self, nodeid, duration, outcome):
+        """
+        Add the result of one test run
+
+        Args:
+            nodeid (str): pytest node id
+            duration (float): setup + call + teardown time in seconds
+            outcome (str): passed, failed, skipped or flaky
+        """
+        entry = self.tests.setdefault(nodeid, {"duration": None, "outcomes": ""})
+        entry["outcomes"] = (entry["outcomes"] + OUTCOME_CODES[outcome])[
+            -HISTORY_OUTCOMES:
+        ]
+
+        # Skipped tests say nothing about how long the test takes
+        if outcome == "skipped":
+            return
+        if entry["duration"] is None:
+            entry["duration"] = round(duration, 3)
+        else:
+            entry["duration"] = round(
+                HISTORY_SMOOTHING * duration
+                + (1 - HISTORY_SMOOTHING) * entry["duration"],
+                3,
+            )
+
+    def expected_duration(self, nodeid):
+        """
+        Expected duration of a test in seconds
+        Tests without history are assumed to take the median known duration
+        """
+        entry = self.tests.get(nodeid)
+        if entry and entry["duration"] is not None:
+            return entry["duration"]
+        return self._default_duration()
+
+    def flake_rate(self, nodeid):
+        """
+        Share of the recent runs (skips excluded) that only passed on a rerun
+        None with fewer than FLAKE_MIN_RUNS runs
+        """
+        entry = self.tests.get(nodeid)
+        runs = entry["outcomes"].replace("s", "") if entry else ""
+        if len(runs) < FLAKE_MIN_RUNS:
+            return None
+        return runs.count("r") / len(runs)
+
+    def flaky_tests(self, threshold):
+        """Flake rate of every test at or above threshold, keyed by node id"""
+        rates = {nodeid: self.flake_rate(nodeid) for nodeid in self.tests}
+        return {
+            nodeid: rate
+            for nodeid, rate in rates.items()
+            if rate is not None and rate >= threshold
+        }
+
+    def _default_duration(self):
+        durations = sorted(
+            e["duration"] for e in self.tests.values() if e["duration"] is not None
+        )
+        if not durations:
+            return DEFAULT_TEST_DURATION
+        return durations[len(durations) // 2]
+
+
+def parse_shard(value):
+    """
+    Parse a --shard value
+
+    Args:
+        value (str): "i/n" with 1 <= i <= n
+
+    Returns:
+        tuple: (index, count), index is 1-based
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {value!r}, expected i/n such as 1/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {value!r}, i must be between 1 and n")
+    return index, count
+
+
+def balance_shards(items, count, history):
+    """
+    Split items into count shards with about the same expected duration
+
+    Longest processing time first: tests are handed out longest first, each
+    to the shard with the least expected time so far. Ties are broken by node
+    id and shard number, so every machine computes the same split from the
+    same history.
+
+    Returns:
+        list: count lists of items, each in collection order
+    """
+    shards = [[] for _ in range(count)]
+    loads = [0.0] * count
+    positions = {item.nodeid: position for position, item in enumerate(items)}
+
+    for item in sorted_longest_first(items, history):
+        target = min(range(count), key=lambda shard: (loads[shard], shard))
+        shards[target].append(item)
+        loads[target] += history.expected_duration(item.nodeid)
+
+    for shard in shards:
+        shard.sort(key=lambda item: positions[item.nodeid])
+    return shards
+
+
+def sorted_longest_first(items, history):
+    """Items by expected duration, longest first"""
+    return sorted(
+        items, key=lambda item: (-history.expected_duration(item.nodeid), item.nodeid)
+    )
+
+
+def expected_total(items, history):
+    return sum(history.expected_duration(item.nodeid) for item in items)